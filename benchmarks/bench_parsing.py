@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Compares parsing of large ticker payloads in calling threads with parsing in process pool.
+
+Local threaded HTTP/1.1 server serves ticker of `--rows` rows, calls are made concurrently from `--threads`
+threads through one API object, e.g. `python benchmarks/bench_parsing.py --rows 20000 --threads 8`.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import make_payload, make_request_class, start_http_server  # noqa: E402
+from pystexchapi.api import StocksExchangeAPI  # noqa: E402
+from pystexchapi.parsing import ParsePool  # noqa: E402
+from pystexchapi.response import FloatColumnsResponseParser  # noqa: E402
+
+
+def bench(name, api, request_class, calls, threads):
+    api.query(FloatColumnsResponseParser, request_class)  # warm up connections
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for _ in executor.map(lambda _: api.query(FloatColumnsResponseParser, request_class), range(calls)):
+            pass
+    elapsed = time.perf_counter() - started
+
+    print('{:<8} {:>6} calls {:>4} threads {:>8.3f} s {:>10.1f} calls/s'.format(name, calls, threads, elapsed,
+                                                                             calls / elapsed))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--calls', type=int, default=100)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    payload = make_payload(args.rows)
+    print('payload {:.1f} MB'.format(len(payload) / 1e6))
+
+    server, url = start_http_server(payload)
+    request_class = make_request_class(url)
+
+    bench('inline', StocksExchangeAPI(), request_class, args.calls, args.threads)
+
+    with ParsePool(max_workers=args.workers) as pool:
+        pool.warm_up()
+        bench('pool', StocksExchangeAPI(parse_pool=pool), request_class, args.calls, args.threads)
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Compares requests (HTTP/1.1) and httpx (HTTP/2) transports on concurrent ticker calls.
+
+Both transports are measured against local servers without network noise: requests against threaded HTTP/1.1
+server and httpx against HTTP/2 cleartext server (prior knowledge, requires `h2`), which multiplexes concurrent
+calls over one connection, e.g. `python benchmarks/bench_transport.py --calls 2000 --threads 16`.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import make_payload, make_request_class, start_http_server, start_h2_server  # noqa: E402
+from pystexchapi.api import StocksExchangeAPI  # noqa: E402
+from pystexchapi.response import StockExchangeResponseParser  # noqa: E402
+from pystexchapi.transport import RequestsTransport, HTTP2Transport  # noqa: E402
+
+
+def bench(name, transport, request_class, calls, threads):
+    api = StocksExchangeAPI(transport=transport)
+    api.query(StockExchangeResponseParser, request_class)  # warm up connection
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for _ in executor.map(lambda _: api.query(StockExchangeResponseParser, request_class), range(calls)):
+            pass
+    elapsed = time.perf_counter() - started
+    transport.close()
+
+    print('{:<10} {:>6} calls {:>4} threads {:>8.3f} s {:>10.1f} calls/s'.format(name, calls, threads, elapsed,
+                                                                               calls / elapsed))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=500)
+    parser.add_argument('--calls', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=16)
+    args = parser.parse_args()
+
+    payload = make_payload(args.rows)
+
+    server, url = start_http_server(payload)
+    bench('requests', RequestsTransport(), make_request_class(url), args.calls, args.threads)
+    server.shutdown()
+
+    try:
+        transport = HTTP2Transport(http1=False)  # HTTP/2 without upgrade over cleartext connection
+        server, url = start_h2_server(payload)
+    except ImportError as e:
+        print('httpx     skipped: {}'.format(e))
+    else:
+        bench('httpx', transport, make_request_class(url), args.calls, args.threads)
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
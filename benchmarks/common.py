@@ -0,0 +1,135 @@
+"""
+Local ticker servers and request class shared by benchmarks
+"""
+
+import os
+import socket
+import sys
+import threading
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pystexchapi.request import TickerRequest  # noqa: E402
+from tests import TICKER_RESPONSE  # noqa: E402
+
+
+def make_payload(rows: int) -> bytes:
+    return ('[' + ','.join([TICKER_RESPONSE[1:-1]] * rows) + ']').encode('utf-8')
+
+
+class TickerHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        payload = self.server.payload
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_http_server(payload: bytes) -> tuple:
+    """
+    Starts threaded HTTP/1.1 server of ticker payload, returns (server, ticker url)
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), TickerHandler)
+    server.payload = payload
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, 'http://127.0.0.1:{}/api2/ticker'.format(server.server_address[1])
+
+
+class H2TickerServer(object):
+    """
+    HTTP/2 server of ticker payload over cleartext TCP (h2c with prior knowledge), one thread per connection,
+    concurrent streams of connection are multiplexed. Requires `h2` package.
+    """
+
+    def __init__(self, payload: bytes):
+        import h2.config  # noqa: F401, imported here, so HTTP/1.1 benchmarks do not require it
+
+        self.payload = payload
+        self._socket = socket.socket()
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind(('127.0.0.1', 0))
+        self._socket.listen(64)
+        self.server_address = self._socket.getsockname()
+        self._stop = threading.Event()
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        while not self._stop.is_set():
+            try:
+                connection, _ = self._socket.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._handle, args=(connection,), daemon=True).start()
+
+    def _handle(self, connection: socket.socket):
+        import h2.config
+        import h2.connection
+        import h2.events
+
+        h2_connection = h2.connection.H2Connection(config=h2.config.H2Configuration(client_side=False))
+        h2_connection.initiate_connection()
+        connection.sendall(h2_connection.data_to_send())
+        pending = {}  # stream id -> unsent part of payload
+
+        with connection:
+            while True:
+                data = connection.recv(65536)
+                if not data:
+                    return
+
+                for event in h2_connection.receive_data(data):
+                    if isinstance(event, h2.events.RequestReceived):
+                        h2_connection.send_headers(event.stream_id, [
+                            (':status', '200'), ('content-type', 'application/json'),
+                            ('content-length', str(len(self.payload)))])
+                        pending[event.stream_id] = self.payload
+                    elif isinstance(event, h2.events.StreamReset):
+                        pending.pop(event.stream_id, None)
+                    elif isinstance(event, h2.events.ConnectionTerminated):
+                        return
+
+                # payload is sent as far as flow control windows allow, the rest after window updates
+                for stream_id, rest in list(pending.items()):
+                    size = min(len(rest), h2_connection.local_flow_control_window(stream_id),
+                               h2_connection.max_outbound_frame_size)
+                    while size > 0:
+                        h2_connection.send_data(stream_id, rest[:size])
+                        rest = rest[size:]
+                        size = min(len(rest), h2_connection.local_flow_control_window(stream_id),
+                                   h2_connection.max_outbound_frame_size)
+                    if rest:
+                        pending[stream_id] = rest
+                    else:
+                        h2_connection.end_stream(stream_id)
+                        del pending[stream_id]
+
+                connection.sendall(h2_connection.data_to_send())
+
+    def shutdown(self):
+        self._stop.set()
+        self._socket.close()
+
+
+def start_h2_server(payload: bytes) -> tuple:
+    """
+    Starts HTTP/2 cleartext server of ticker payload, returns (server, ticker url)
+    """
+    server = H2TickerServer(payload)
+    return server, 'http://127.0.0.1:{}/api2/ticker'.format(server.server_address[1])
+
+
+def make_request_class(url: str) -> type:
+    class BenchTickerRequest(TickerRequest):
+        def __init__(self, **kwargs):
+            super(BenchTickerRequest, self).__init__(**kwargs)
+            self.url = url
+    return BenchTickerRequest
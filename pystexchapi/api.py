@@ -1,18 +1,31 @@
+import hashlib
+import inspect
+import keyword
 import requests
 import time
 import threading
 import warnings
 
-from typing import Type
-
-from pystexchapi.exc import APINoMethodException
+from typing import Iterable, Type
+
+from pystexchapi.breaker import CircuitBreaker
+from pystexchapi.cache import ResponseCache
+from pystexchapi.diff import SnapshotDiffer, SnapshotDelta
+from pystexchapi.hedging import Hedger
+from pystexchapi.exc import APINoMethodException, APICircuitOpenException
+from pystexchapi.fixed import MarketPrecisions
+from pystexchapi.metrics import TransferStats
+from pystexchapi.parsing import ParsePool
+from pystexchapi.profiling import Profiler, phase, PHASE, NULL_CONTEXT
 from pystexchapi.request import TickerRequest, PricesRequest, StockExchangeRequest, CurrenciesRequest, MarketsRequest, \
     MarketSummaryRequest, TradeHistoryRequest, OrderbookRequest, GraficPublicRequest, GetAccountInfoRequest, \
     GetActiveOrdersRequest, TradeRequest, CancelOrderRequest, PrivateTradeHistoryRequest, TransactionHistoryRequest, \
     GraficPrivateRequest, DepositRequest, WithdrawRequest, GenerateWalletsRequest, TicketRequest, GetTicketsRequest, \
     ReplyTicketRequest
-from pystexchapi.response import StockExchangeResponseParser, APIResponse
-from pystexchapi.utils import ENCODING
+from pystexchapi.response import StockExchangeResponseParser, LazyResponseParser, APIResponse, BaseAPIResponse, \
+    COLUMNAR_PARSERS
+from pystexchapi.transport import BaseTransport, RequestsTransport, DEFAULT_POOL_MAXSIZE
+from pystexchapi.utils import ENCODING, Deadline, estimate_nbytes
 
 
 __all__ = ('StocksExchangeAPI', 'APIMethod')
@@ -20,14 +33,36 @@ __all__ = ('StocksExchangeAPI', 'APIMethod')
 
 try:
     import cachecontrol
-    cache_adapter = cachecontrol.CacheControlAdapter()
 except ImportError:
     warnings.warn('Caching is not enabled. Install CacheControl for cache enabling', ImportWarning)
-    cache_adapter = None
+    cachecontrol = None
 
 
 SAVING_TIME_KEY = 'saving_time'
 ONE_MINUTE = 60.0
+PAYLOAD_DIGEST_SIZE = 16
+DEFAULT_TIMEOUT = (3.05, 30.0)  # (connect, read) timeouts in seconds
+BULK_SUMMARY_THRESHOLD = 5  # above this number of pairs summaries are sliced from one markets call
+SAVING_LOCK_STRIPES = 64
+
+
+def _detached(data):
+    # lazy responses are cached and returned not decoded, so cache holds only their raw payloads
+    return data.detached() if isinstance(data, BaseAPIResponse) else data
+
+
+def _stored_nbytes(data) -> int:
+    return data.stored_nbytes() if isinstance(data, BaseAPIResponse) else estimate_nbytes(data)
+
+
+def make_cache_adapter(pool_maxsize: int=DEFAULT_POOL_MAXSIZE):
+    """
+    Returns new HTTP cache adapter or None if CacheControl is not installed. Every API object gets its own
+    adapter, so cache and connection pool are not shared between instances.
+    """
+    if cachecontrol is None:
+        return None
+    return cachecontrol.CacheControlAdapter(pool_maxsize=pool_maxsize)
 
 
 class APIMethod(object):
@@ -38,6 +73,77 @@ class APIMethod(object):
         self.parser = parser
 
 
+CALL_ARGUMENTS = ('deadline', 'hedge', 'with_saving', SAVING_TIME_KEY)
+CREDENTIAL_ARGUMENTS = ('api_key', 'api_secret', 'nonce_factory')
+
+
+def is_method_name(name: str) -> bool:
+    return name.isidentifier() and not keyword.iskeyword(name)
+
+
+def compile_api_method(api: 'StocksExchangeAPI', method: APIMethod):
+    """
+    Generates function calling API method with arguments of its request constructor (without credentials)
+    followed by keyword-only `deadline`, `hedge`, `with_saving` and `saving_time`. Parser and credentials are
+    resolved once, so call goes directly to fetching. Annotations of arguments are taken from the constructor.
+    """
+    if not is_method_name(method.name):
+        raise ValueError('Name of API method {!r} is not valid identifier'.format(method.name))
+
+    namespace = {'_api': api, '_request': method.request, '_parser': api.get_parser(method), '_name': method.name,
+                 '_make_deadline': Deadline.make, '_phase': phase, '_CONSTRUCT': PHASE.CONSTRUCT}
+    arguments, passed, keyword_only = [], [], False
+    annotations = {}
+
+    for param in list(inspect.signature(method.request.__init__).parameters.values())[1:]:
+        if param.name in CREDENTIAL_ARGUMENTS or param.kind in (param.VAR_POSITIONAL, param.VAR_KEYWORD):
+            continue
+        if param.name in CALL_ARGUMENTS:
+            raise ValueError('Argument {} of {} clashes with call arguments'.format(param.name, method.request))
+
+        if param.kind == param.KEYWORD_ONLY and not keyword_only:
+            arguments.append('*')
+            keyword_only = True
+        if param.default is param.empty:
+            arguments.append(param.name)
+        else:
+            namespace['_default_' + param.name] = param.default
+            arguments.append('{0}=_default_{0}'.format(param.name))
+        passed.append('{0}={0}'.format(param.name))
+        if param.annotation is not param.empty:
+            annotations[param.name] = param.annotation
+
+    if method.request.is_private:
+        namespace['_api_key'], namespace['_api_secret'] = api._api_key, api._api_secret
+        passed.extend(('api_key=_api_key', 'api_secret=_api_secret'))
+
+    if not keyword_only:
+        arguments.append('*')
+    arguments.extend(('deadline=None', 'hedge=False', 'with_saving=False', SAVING_TIME_KEY + '=None'))
+
+    source = '\n'.join((
+        'def {name}({arguments}):',
+        '    with _api._profile_call(_name):',
+        '        with _phase(_CONSTRUCT):',
+        '            req = _request({passed})',
+        '        timeout = _api.method_timeouts.get(_name, _api.timeout)',
+        '        if with_saving or {saving} is not None:',
+        '            return _api._query_with_saving(_parser, req, timeout=timeout, deadline=_make_deadline(deadline),',
+        '                                           hedge=hedge,',
+        '                                           {saving}={one_minute!r} if {saving} is None else {saving})',
+        '        return _api._fetch(_parser, req, timeout=timeout, deadline=_make_deadline(deadline), hedge=hedge)',
+        ''
+    )).format(name=method.name, arguments=', '.join(arguments), passed=', '.join(passed), saving=SAVING_TIME_KEY,
+              one_minute=ONE_MINUTE)
+    exec(source, namespace)
+
+    function = namespace[method.name]
+    function.__qualname__ = '{}.{}'.format(type(api).__qualname__, method.name)
+    function.__doc__ = 'Calls `{}` API method with request {}'.format(method.name, method.request.__name__)
+    function.__annotations__ = annotations
+    return function
+
+
 DEFAULT_STOCKS_EXCHANGE_API_METHODS = (
 
     # Public methods
@@ -74,88 +180,347 @@ class StocksExchangeAPI(object):
     Base class for implementing Stocks Exchange API
     """
 
-    def __init__(self, ssl_enabled: bool=True, api_key: str='', api_secret: str='', api_methods: dict=None):
+    def __init__(self, ssl_enabled: bool=True, api_key: str='', api_secret: str='', api_methods: dict=None,
+                 transport: BaseTransport=None, circuit_breaker: dict=None, timeout=DEFAULT_TIMEOUT,
+                 method_timeouts: dict=None, hedging: dict=None, numeric_columns: str=None, profiling: dict=None,
+                 lazy_responses: bool=False, response_cache: ResponseCache=None, parse_pool: ParsePool=None,
+                 market_precisions: MarketPrecisions=None):
         super(StocksExchangeAPI, self).__init__()
         self.ssl_enabled = ssl_enabled
+        self.timeout = timeout
+        self.method_timeouts = method_timeouts or {}  # timeouts by name of API method, e.g. {'ticker': (1, 5)}
+        self.transport = transport or RequestsTransport(adapter=make_cache_adapter())
+        self.transfer_stats = TransferStats()
+        self.circuit_breaker = circuit_breaker  # CircuitBreaker options, circuit breaking is disabled if not set
+        self._breakers = {}
+        self._breakers_lock = threading.Lock()
+        self.hedger = Hedger(**hedging) if hedging is not None else None  # hedging is disabled if not set
+        self.profiler = Profiler(**profiling) if profiling is not None else None  # Profiler options
+
+        if numeric_columns is not None and numeric_columns not in COLUMNAR_PARSERS:
+            raise ValueError('numeric_columns can be one of {}. Currently: {} {}'.format(
+                tuple(COLUMNAR_PARSERS), numeric_columns, type(numeric_columns)))
+        self.numeric_columns = numeric_columns  # convert numeric fields of responses to columns if set
+        self.market_precisions = market_precisions  # scales of fixed-point columns of pair responses if set
         self._api_key = bytes(api_key, encoding=ENCODING)
         self._api_secret = bytes(api_secret, encoding=ENCODING)
+        self._differs = {}
+        self._differs_lock = threading.Lock()
+        self._saving_locks = tuple(threading.Lock() for _ in range(SAVING_LOCK_STRIPES))
+        self.lazy_responses = lazy_responses  # keep raw payloads and decode them on first access to data
+        self.response_cache = response_cache if response_cache is not None else ResponseCache()
+        self.parse_pool = parse_pool  # large payloads are parsed in worker processes if set
+        self._markets_index = (None, {})
+        self._bound_methods = set()
         self._init_default_api_methods()
         if api_methods:
             self.update_api_methods(api_methods)
 
     def _init_default_api_methods(self):
         self.api_methods = {method.name: method for method in DEFAULT_STOCKS_EXCHANGE_API_METHODS}
+        self._bind_api_methods(self.api_methods.values())
 
     def update_api_methods(self, api_methods: dict):
         self.api_methods.update(api_methods)
+        self._bind_api_methods(api_methods.values())
 
-    def _query(self, req: requests.Request) -> requests.Response:
-        sess = requests.Session()
+    def _bind_api_methods(self, api_methods: Iterable[APIMethod]):
+        """
+        Makes API methods available as methods of instance, e.g. `api.orderbook('ETH', 'BTC')`. Methods which
+        names are taken by attributes of API or are not valid identifiers are available only through `call`.
+        """
+        for method in api_methods:
+            if not is_method_name(method.name):
+                warnings.warn('API method {} is available only through call'.format(method.name))
+                continue
+            if method.name not in self._bound_methods and (hasattr(type(self), method.name) or
+                                                           method.name in self.__dict__):
+                warnings.warn('API method {} is available only through call'.format(method.name))
+                continue
+            setattr(self, method.name, compile_api_method(self, method))
+            self._bound_methods.add(method.name)
+
+    def get_timeout(self, method: str=None):
+        return self.method_timeouts.get(method, self.timeout)
+
+    def _query(self, req: requests.Request, timeout=None, deadline: Deadline=None,
+               hedge: bool=False) -> requests.Response:
+        if timeout is None:
+            timeout = self.timeout
+        if deadline is not None:
+            timeout = deadline.limit(timeout)
+
+        with phase(PHASE.PREPARE):
+            prepared_request = req.prepare()
+
+        if hedge:
+            if req.is_private or req.method != 'GET':
+                raise ValueError('Only idempotent public methods can be hedged. Currently: {}'.format(req.api_method))
+            if self.hedger is None:
+                raise ValueError('Hedging is not configured, pass `hedging` options to API object')
+
+            return self.hedger.run(
+                req.api_method,
+                lambda: self._send(prepared_request, req.api_method, timeout=timeout),
+                lambda: self._send(prepared_request.copy(), req.api_method, timeout=timeout)
+            )
+
+        return self._send(prepared_request, req.api_method, req.is_private, timeout=timeout)
+
+    def _get_breaker(self, name: str) -> CircuitBreaker:
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            with self._breakers_lock:
+                breaker = self._breakers.get(name)
+                if breaker is None:
+                    breaker = self._breakers[name] = CircuitBreaker(name, **self.circuit_breaker)
+        return breaker
+
+    def _acquire_breakers(self, api_method: str, is_private: bool) -> tuple:
+        """
+        Every call passes through breaker of its method and breaker of public or private part of API
+        """
+        if self.circuit_breaker is None:
+            return ()
+
+        breakers = (self._get_breaker('private' if is_private else 'public'), self._get_breaker(api_method))
+        acquired = []
+        try:
+            for breaker in breakers:
+                breaker.acquire()
+                acquired.append(breaker)
+        except APICircuitOpenException:
+            for breaker in acquired:
+                breaker.release()
+            raise
+        return breakers
+
+    def get_circuit_states(self) -> dict:
+        return {name: breaker.state for name, breaker in list(self._breakers.items())}
+
+    def _send(self, prepared_request: requests.PreparedRequest, api_method: str, is_private: bool=False,
+              timeout=None) -> requests.Response:
+        breakers = self._acquire_breakers(api_method, is_private)
+        started = time.monotonic()
+
+        try:
+            with phase(PHASE.NETWORK):
+                response = self.transport.send(prepared_request, verify=self.ssl_enabled, timeout=timeout)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            # client errors do not indicate degradation of exchange
+            server_failure = e.response is None or e.response.status_code >= 500
+            for breaker in breakers:
+                if server_failure:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+            raise
+        except Exception:
+            for breaker in breakers:
+                breaker.release()
+            raise
+
+        latency = time.monotonic() - started
+        for breaker in breakers:
+            breaker.record_success(latency)
+
+        if self.hedger is not None:
+            self.hedger.record(api_method, latency)
+
+        decoded_bytes = getattr(response, 'decoded_bytes', None)
+        if decoded_bytes is None:
+            decoded_bytes = len(response.content)
+        self.transfer_stats.record(api_method, getattr(response, 'wire_bytes', decoded_bytes), decoded_bytes)
+        return response
 
-        if cache_adapter:
-            sess.mount('https://', cache_adapter)
-            sess.mount('http://', cache_adapter)
+    def query(self, parser: Type[StockExchangeResponseParser], req: Type[StockExchangeRequest], timeout=None,
+              deadline=None, hedge: bool=False, **kwargs) -> APIResponse:
+        """
+        `deadline` is number of seconds (or `Deadline`) within which call must be finished, it limits timeouts
+        of every request made during call. `hedge` enables hedged requests for idempotent public methods.
+        """
+        deadline = Deadline.make(deadline)
+
+        with self._profile_call(req.api_method):
+            with phase(PHASE.CONSTRUCT):
+                _req = req(**kwargs)
+
+            if any(k in kwargs for k in (SAVING_TIME_KEY, 'with_saving')):
+                response = self._query_with_saving(parser, _req, timeout=timeout, deadline=deadline, hedge=hedge,
+                                                   **kwargs)
+            else:
+                response = self._fetch(parser, _req, timeout=timeout, deadline=deadline, hedge=hedge)
 
-        prepared_request = req.prepare()
-        response = sess.send(prepared_request, verify=self.ssl_enabled)
-        response.raise_for_status()
         return response
 
-    def query(self, parser: Type[StockExchangeResponseParser], req: Type[StockExchangeRequest],
-              **kwargs) -> APIResponse:
-        _req = req(**kwargs)
+    @staticmethod
+    def _get_account_key(req: StockExchangeRequest):
+        """
+        Private responses are cached per account, as credentials are sent only in headers
+        """
+        return req.auth.api_key if req.is_private else None
 
-        if any(k in kwargs for k in (SAVING_TIME_KEY, 'with_saving')):
-            response = self._query_with_saving(parser, _req, **kwargs)
-        else:
-            response = parser.parse(self._query(_req))
+    def _fetch(self, parser: Type[StockExchangeResponseParser], req: StockExchangeRequest, timeout=None,
+               deadline: Deadline=None, hedge: bool=False) -> APIResponse:
+        """
+        Performs request and parses response. For requests with static reference data (`reuse_unchanged`)
+        conditional headers are sent when server provided validators, and raw payload is hashed otherwise,
+        so previously parsed response is returned without JSON decoding when nothing changed.
+        """
+        parser = self._get_pair_parser(parser, req)
+        if not req.reuse_unchanged:
+            return self._parse(parser, self._query(req, timeout=timeout, deadline=deadline, hedge=hedge), deadline)
 
-        return response
+        key = ('unchanged', parser, req.url, tuple(sorted(req.params.items())), self._get_account_key(req))
+        saved = self.response_cache.get(key)
+
+        if saved:
+            etag, last_modified = saved[1], saved[2]
+            if etag:
+                req.headers['If-None-Match'] = etag
+            if last_modified:
+                req.headers['If-Modified-Since'] = last_modified
+
+        response = self._query(req, timeout=timeout, deadline=deadline, hedge=hedge)
+
+        if saved and response.status_code == requests.codes.not_modified:
+            return _detached(saved[3])
 
-    def _query_with_saving(self, parser: Type[StockExchangeResponseParser],
-                           req: StockExchangeRequest, **kwargs) -> APIResponse:
+        digest = hashlib.blake2b(response.content, digest_size=PAYLOAD_DIGEST_SIZE).digest()
+        if saved and saved[0] == digest:
+            data = _detached(saved[3])
+        else:
+            data = self._parse(parser, response, deadline)
+
+        stored = _detached(data)
+        self.response_cache.put(key, (digest, response.headers.get('ETag'), response.headers.get('Last-Modified'),
+                                      stored), _stored_nbytes(stored))
+        return data
+
+    def _parse(self, parser: Type[StockExchangeResponseParser], response: requests.Response,
+               deadline: Deadline=None) -> APIResponse:
+        if self.parse_pool is not None and self.parse_pool.accepts(parser, response):
+            with phase(PHASE.PARSE_POOL):
+                return self.parse_pool.parse(parser, response, deadline=deadline)
+        return parser.parse(response)
+
+    def _query_with_saving(self, parser: Type[StockExchangeResponseParser], req: StockExchangeRequest,
+                           timeout=None, deadline: Deadline=None, hedge: bool=False, **kwargs) -> APIResponse:
         """
         Method enables user to save parsed response for specified time and prevents additional requests in
         this time interval. This method is convenient for ban avoidance in case of too frequent requests to API.
 
-        Reentrant lock ensures thread safety of method.
+        Concurrent calls of the same request wait for one of them to fetch response, they are serialized by
+        one of striped locks shared by all threads, so calls of other requests are not blocked.
         """
-        unix_timestamp_now = time.time()
+        saving_time = kwargs.get(SAVING_TIME_KEY, ONE_MINUTE)
+        if not saving_time:
+            return self._fetch(parser, req, timeout=timeout, deadline=deadline, hedge=hedge)
 
-        saved_data_attr_name = '{}_data'.format(req.api_method)
-        record_time_attr_name = '{}_time'.format(req.api_method)
+        # get saved response of the same request if period of saving is set
+        key = ('saved', parser, req.api_method, req.url, tuple(sorted(req.params.items())),
+               tuple(sorted(req.json.items())) if req.json else (), self._get_account_key(req))
 
-        saving_time = kwargs.get(SAVING_TIME_KEY, ONE_MINUTE)
+        with self._saving_locks[hash(key) % SAVING_LOCK_STRIPES]:
+            unix_timestamp_now = time.time()
+            saved = self.response_cache.get(key)
 
-        with threading.RLock():
-            if saving_time:
-                # get saved values from previous requests if period of saving is set
-                data = getattr(self, saved_data_attr_name, None)
-                prev_record_time = getattr(self, record_time_attr_name, None)
-
-                if not (data and prev_record_time and (unix_timestamp_now - prev_record_time) < saving_time):
-                    data = parser.parse(self._query(req))
-                    setattr(self, saved_data_attr_name, data)  # store parsed response in memory
-                    setattr(self, record_time_attr_name,
-                            unix_timestamp_now)  # save the recording time for response
-            else:
-                data = parser.parse(self._query(req))
+            if saved and (unix_timestamp_now - saved[0]) < saving_time:
+                return _detached(saved[1])
 
+            data = self._fetch(parser, req, timeout=timeout, deadline=deadline, hedge=hedge)
+            stored = _detached(data)
+            self.response_cache.put(key, (unix_timestamp_now, stored), _stored_nbytes(stored))
             return data
 
-    def call(self, method: str, **kwargs) -> APIResponse:
+    def get_method(self, method: str) -> APIMethod:
         _method = self.api_methods.get(method)
 
         if not _method:
             raise APINoMethodException(method=method)
 
-        if _method.request.is_private:
+        return _method
+
+    def _add_credentials(self, method: APIMethod, kwargs: dict) -> dict:
+        if method.request.is_private:
             kwargs.update({
                 'api_key': self._api_key,
                 'api_secret': self._api_secret
             })
+        return kwargs
+
+    def get_parser(self, method: APIMethod) -> Type[StockExchangeResponseParser]:
+        if self.numeric_columns and method.parser is StockExchangeResponseParser:
+            return COLUMNAR_PARSERS[self.numeric_columns]
+        if self.lazy_responses and method.parser is StockExchangeResponseParser:
+            return LazyResponseParser
+        return method.parser
 
-        return self.query(_method.parser, _method.request, **kwargs)
+    def _get_pair_parser(self, parser: Type[StockExchangeResponseParser],
+                         req: StockExchangeRequest) -> Type[StockExchangeResponseParser]:
+        """
+        Fixed-point columns of pair responses are scaled by precisions of pair if `market_precisions` is set
+        """
+        if self.market_precisions is None or parser is not COLUMNAR_PARSERS['fixed']:
+            return parser
+        pair = req.params.get('pair') or (req.json or {}).get('pair')
+        return self.market_precisions.columns_parser(pair) if pair else parser
+
+    def _profile_call(self, method: str):
+        if self.profiler is None:
+            return NULL_CONTEXT
+        return self.profiler.call(method)
+
+    def call(self, method: str, deadline=None, hedge: bool=False, **kwargs) -> APIResponse:
+        _method = self.get_method(method)
+        self._add_credentials(_method, kwargs)
+        with self._profile_call(method):
+            return self.query(self.get_parser(_method), _method.request, timeout=self.get_timeout(method),
+                              deadline=deadline, hedge=hedge, **kwargs)
+
+    def call_changes(self, method: str, key_field: str='market_name', **kwargs) -> SnapshotDelta:
+        """
+        Change-detection mode for list-shaped methods (ticker, prices, markets). Returns only rows which were
+        added, removed or changed since previous call of the same method.
+        """
+        data = self.call(method, **kwargs).data
+
+        with self._differs_lock:
+            differ = self._differs.get(method)
+            if differ is None or differ.key_field != key_field:
+                differ = self._differs[method] = SnapshotDiffer(key_field=key_field)
+            return differ.update(data)
+
+    def _get_markets_index(self, deadline=None) -> dict:
+        data = self.call('markets', deadline=deadline).data
+        indexed_data, index = self._markets_index
+        if data is not indexed_data:  # unchanged markets response is reused as is, so index is kept too
+            index = {row['market_name']: row for row in data if isinstance(row, dict) and 'market_name' in row}
+            self._markets_index = (data, index)
+        return index
+
+    def market_summaries(self, pairs: Iterable[str], bulk_threshold: int=BULK_SUMMARY_THRESHOLD,
+                         deadline=None) -> dict:
+        """
+        Returns summaries of pairs (e.g. 'ETH_BTC') as {pair: summary}. Up to `bulk_threshold` pairs are
+        requested with `market_summary` one by one, more pairs are sliced from single `markets` call which
+        returns summaries of all markets. Unknown pairs are omitted.
+        """
+        pairs = list(dict.fromkeys(pairs))
+        deadline = Deadline.make(deadline)
+
+        if len(pairs) > bulk_threshold:
+            index = self._get_markets_index(deadline=deadline)
+            return {pair: index[pair] for pair in pairs if pair in index}
+
+        summaries = {}
+        for pair in pairs:
+            currency1, _, currency2 = pair.partition('_')
+            data = self.call('market_summary', deadline=deadline, currency1=currency1, currency2=currency2).data
+            if data:
+                summaries[pair] = data[0]
+        return summaries
 
     def get_available_methods(self):
         return self.api_methods.keys()
@@ -0,0 +1,182 @@
+"""
+Scanner of cross-pair (triangular and longer) arbitrage cycles over ticker snapshots
+"""
+
+from typing import Iterable, List
+
+from pystexchapi.response import BaseAPIResponse
+from pystexchapi.utils import numpy, to_float_array
+
+
+__all__ = ('ArbitrageScanner',)
+
+
+DEFAULT_MAX_LENGTH = 3
+MIN_LENGTH = 3  # cycle of two edges is round trip over one market
+NAN = float('nan')
+
+# names of best bid and ask fields in rows of `ticker` and `prices`
+QUOTE_FIELDS = (('bid', 'ask'), ('buy', 'sell'))
+
+
+def _fee(market: dict, field: str) -> float:
+    return float(market.get(field) or 0) / 100
+
+
+class ArbitrageScanner(object):
+    """
+    Currency graph built once from `markets` response. Every market 'ETH_BTC' gives two edges: ETH -> BTC
+    (selling ETH at bid) and BTC -> ETH (buying ETH at ask), with fees of market subtracted when `with_fees`
+    is set. All simple cycles of `MIN_LENGTH`..`max_length` currencies are enumerated once and stored as
+    arrays of edge indices.
+
+    Snapshot of `ticker` or `prices` updates edge rates in place, then products of rates along all cycles
+    are computed in one vectorized pass (NumPy, pure Python otherwise). Cycle with product above 1 returns
+    more of starting currency than was spent.
+    """
+
+    def __init__(self, markets: Iterable[dict], max_length: int=DEFAULT_MAX_LENGTH, with_fees: bool=True):
+        super(ArbitrageScanner, self).__init__()
+
+        if max_length < MIN_LENGTH:
+            raise ValueError('max_length cannot be less than {}. Currently: {} {}'.format(
+                MIN_LENGTH, max_length, type(max_length)))
+
+        self.max_length = max_length
+        self.markets = []  # (market name, currency, partner)
+        self._index = {}  # market name -> market index
+        sell_fees, buy_fees = [], []
+
+        for market in markets:
+            if not market.get('active', True) or market['market_name'] in self._index:
+                continue
+            self._index[market['market_name']] = len(self.markets)
+            self.markets.append((market['market_name'], market['currency'], market['partner']))
+            sell_fees.append(_fee(market, 'sell_fee_percent') if with_fees else 0.0)
+            buy_fees.append(_fee(market, 'buy_fee_percent') if with_fees else 0.0)
+
+        # edge 2 * i sells currency of market i for partner, edge 2 * i + 1 buys it
+        if numpy is not None:
+            self._sell_factors = 1 - numpy.array(sell_fees, dtype=numpy.float64)
+            self._buy_factors = 1 - numpy.array(buy_fees, dtype=numpy.float64)
+            self.rates = numpy.full(2 * len(self.markets), NAN)
+        else:
+            self._sell_factors = [1 - fee for fee in sell_fees]
+            self._buy_factors = [1 - fee for fee in buy_fees]
+            self.rates = [NAN] * (2 * len(self.markets))
+
+        self.cycles = self._find_cycles()  # length -> cycles as rows of edge indices
+
+    def __len__(self):
+        return sum(len(cycles) for cycles in self.cycles.values())
+
+    def _edge_source(self, edge: int) -> str:
+        _, currency, partner = self.markets[edge // 2]
+        return currency if edge % 2 == 0 else partner
+
+    def _find_cycles(self) -> dict:
+        """
+        Enumerates every simple cycle once, starting from its smallest currency
+        """
+        currencies = sorted({c for _, currency, partner in self.markets for c in (currency, partner)})
+        ids = {currency: i for i, currency in enumerate(currencies)}
+
+        adjacency = [[] for _ in currencies]  # currency id -> [(target id, edge)]
+        for i, (_, currency, partner) in enumerate(self.markets):
+            adjacency[ids[currency]].append((ids[partner], 2 * i))
+            adjacency[ids[partner]].append((ids[currency], 2 * i + 1))
+
+        found = {length: [] for length in range(MIN_LENGTH, self.max_length + 1)}
+        for start in range(len(currencies)):
+            stack = [(start, [], {start})]
+            while stack:
+                node, edges, visited = stack.pop()
+                for target, edge in adjacency[node]:
+                    if target == start and len(edges) + 1 >= MIN_LENGTH:
+                        found[len(edges) + 1].append(edges + [edge])
+                    elif target > start and target not in visited and len(edges) + 1 < self.max_length:
+                        stack.append((target, edges + [edge], visited | {target}))
+
+        if numpy is not None:
+            return {length: numpy.array(cycles, dtype=numpy.int64).reshape(-1, length)
+                    for length, cycles in found.items()}
+        return found
+
+    def update(self, snapshot) -> int:
+        """
+        Updates edge rates from `ticker` or `prices` response (or its data) in place. Missing or zero
+        quotes make rates unknown, so cycles through them are skipped. Returns number of updated markets.
+        """
+        rows = snapshot.data if isinstance(snapshot, BaseAPIResponse) else snapshot
+        known = [(self._index[row['market_name']], row) for row in rows or () if row.get('market_name') in self._index]
+        if not known:
+            return 0
+
+        bid_field, ask_field = next((fields for fields in QUOTE_FIELDS if fields[0] in known[0][1]),
+                                    QUOTE_FIELDS[0])
+        positions = [i for i, _ in known]
+        bids = to_float_array([row.get(bid_field) or 0 for _, row in known])
+        asks = to_float_array([row.get(ask_field) or 0 for _, row in known])
+
+        if numpy is not None:
+            positions = numpy.array(positions, dtype=numpy.int64)
+            with numpy.errstate(divide='ignore'):
+                self.rates[2 * positions] = numpy.where(bids > 0, bids * self._sell_factors[positions], NAN)
+                self.rates[2 * positions + 1] = numpy.where(asks > 0, self._buy_factors[positions] / asks, NAN)
+        else:
+            for i, bid, ask in zip(positions, bids, asks):
+                self.rates[2 * i] = bid * self._sell_factors[i] if bid > 0 else NAN
+                self.rates[2 * i + 1] = self._buy_factors[i] / ask if ask > 0 else NAN
+
+        return len(known)
+
+    def _products(self, cycles) -> list:
+        if numpy is not None:
+            return self.rates[cycles].prod(axis=1)
+
+        products = []
+        for cycle in cycles:
+            product = 1.0
+            for edge in cycle:
+                product *= self.rates[edge]
+            products.append(product)
+        return products
+
+    def _describe(self, cycle, product: float) -> dict:
+        cycle = [int(edge) for edge in cycle]
+        return {
+            'path': tuple(self._edge_source(edge) for edge in cycle) + (self._edge_source(cycle[0]),),
+            'markets': tuple(self.markets[edge // 2][0] for edge in cycle),
+            'sides': tuple('SELL' if edge % 2 == 0 else 'BUY' for edge in cycle),
+            'profit': float(product) - 1
+        }
+
+    def opportunities(self, min_profit: float=0.0, limit: int=None) -> List[dict]:
+        """
+        Returns cycles with profit (relative gain of starting currency) above `min_profit`, most profitable
+        first, as [{'path': ('BTC', 'ETH', 'USDT', 'BTC'), 'markets': ('ETH_BTC', 'ETH_USDT', 'BTC_USDT'),
+        'sides': ('BUY', 'SELL', 'BUY'), 'profit': 0.004}]. Sides are sides of orders in listed markets.
+        """
+        threshold = 1 + min_profit
+        found = []
+
+        for cycles in self.cycles.values():
+            if not len(cycles):
+                continue
+            products = self._products(cycles)
+            if numpy is not None:
+                selected = numpy.flatnonzero(products > threshold)
+                selected = selected[numpy.argsort(-products[selected], kind='stable')[:limit]]
+                found.extend(zip(products[selected].tolist(), cycles[selected]))
+            else:
+                found.extend((product, cycle) for product, cycle in zip(products, cycles) if product > threshold)
+
+        found.sort(key=lambda item: -item[0])
+        return [self._describe(cycle, product) for product, cycle in found[:limit]]
+
+    def scan(self, snapshot, min_profit: float=0.0, limit: int=None) -> List[dict]:
+        """
+        Updates rates from snapshot and returns ranked opportunities
+        """
+        self.update(snapshot)
+        return self.opportunities(min_profit=min_profit, limit=limit)
@@ -4,23 +4,26 @@ import hashlib
 from requests import PreparedRequest
 from requests.auth import AuthBase
 
-from pystexchapi.utils import make_nonce, ENCODING
+from pystexchapi.profiling import phase, PHASE
+from pystexchapi.utils import shared_nonce_generator, ENCODING
 
 
 class HmacAuth(AuthBase):
 
-    def __init__(self, api_key, api_secret):
+    def __init__(self, api_key, api_secret, nonce_factory=None):
         self.api_key = api_key
         self.api_secret = api_secret
+        self.nonce_factory = nonce_factory or shared_nonce_generator
 
     def __call__(self, request: PreparedRequest):
-        data = json.loads(request.body)
-        data['nonce'] = make_nonce()
-        signdata = json.dumps(data)
-        sign = hmac.new(self.api_secret, bytearray(signdata, encoding=ENCODING), hashlib.sha512).hexdigest()
-        request.headers.update({
-            'Key': self.api_key,
-            'Sign': sign
-        })
-        request.body = signdata
+        with phase(PHASE.SIGN):
+            data = json.loads(request.body)
+            data['nonce'] = self.nonce_factory()
+            signdata = json.dumps(data)
+            sign = hmac.new(self.api_secret, bytearray(signdata, encoding=ENCODING), hashlib.sha512).hexdigest()
+            request.headers.update({
+                'Key': self.api_key,
+                'Sign': sign
+            })
+            request.body = signdata
         return request
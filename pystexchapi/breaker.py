@@ -0,0 +1,114 @@
+"""
+Circuit breaker for failing fast when exchange degrades
+"""
+
+import threading
+import time
+
+from pystexchapi.exc import APICircuitOpenException
+from pystexchapi.utils import Dotdict
+
+
+__all__ = ('CIRCUIT_STATE', 'CircuitBreaker')
+
+
+CIRCUIT_STATE = Dotdict(CLOSED='closed', OPEN='open', HALF_OPEN='half_open')
+
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RECOVERY_TIME = 30.0
+
+
+class CircuitBreaker(object):
+    """
+    Opens after `failure_threshold` consecutive failures (calls slower than `latency_threshold` are failures
+    too) and rejects calls for `recovery_time` seconds. Then up to `half_open_calls` probe calls are allowed,
+    successful probe closes circuit and failed one opens it again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int=DEFAULT_FAILURE_THRESHOLD, latency_threshold: float=None,
+                 recovery_time: float=DEFAULT_RECOVERY_TIME, half_open_calls: int=1):
+        super(CircuitBreaker, self).__init__()
+
+        if failure_threshold < 1:
+            raise ValueError('failure_threshold must be positive. Currently: {} {}'.format(failure_threshold,
+                                                                                          type(failure_threshold)))
+
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.latency_threshold = latency_threshold
+        self.recovery_time = recovery_time
+        self.half_open_calls = half_open_calls
+
+        self._lock = threading.Lock()
+        self._state = CIRCUIT_STATE.CLOSED
+        self._failures = 0
+        self._opened_at = None
+        self._probes = 0
+
+    def _current_state(self, now: float) -> str:
+        if self._state == CIRCUIT_STATE.OPEN and now - self._opened_at >= self.recovery_time:
+            self._state = CIRCUIT_STATE.HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def acquire(self):
+        """
+        Must be called before request. Raises `APICircuitOpenException` when circuit does not allow calls.
+        """
+        with self._lock:
+            now = time.monotonic()
+            state = self._current_state(now)
+
+            if state == CIRCUIT_STATE.OPEN:
+                raise APICircuitOpenException(circuit=self.name,
+                                              retry_after=self.recovery_time - (now - self._opened_at))
+
+            if state == CIRCUIT_STATE.HALF_OPEN:
+                if self._probes >= self.half_open_calls:
+                    raise APICircuitOpenException(circuit=self.name, retry_after=0.0)
+                self._probes += 1
+
+    def release(self):
+        """
+        Returns probe slot taken by `acquire` when call was not performed
+        """
+        with self._lock:
+            if self._state == CIRCUIT_STATE.HALF_OPEN and self._probes:
+                self._probes -= 1
+
+    def _open(self):
+        self._state = CIRCUIT_STATE.OPEN
+        self._opened_at = time.monotonic()
+        self._probes = 0
+
+    def record_success(self, latency: float=None):
+        if self.latency_threshold is not None and latency is not None and latency > self.latency_threshold:
+            self.record_failure()
+            return
+
+        with self._lock:
+            self._failures = 0
+            if self._state != CIRCUIT_STATE.CLOSED:
+                self._state = CIRCUIT_STATE.CLOSED
+                self._probes = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == CIRCUIT_STATE.OPEN:
+                return
+            if self._state == CIRCUIT_STATE.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._open()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                'state': self._current_state(time.monotonic()),
+                'failures': self._failures,
+                'opened_at': self._opened_at
+            }
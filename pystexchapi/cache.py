@@ -0,0 +1,92 @@
+"""
+Cache of parsed responses with bounded memory
+"""
+
+import collections
+import threading
+
+
+__all__ = ('ResponseCache',)
+
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+
+class ResponseCache(object):
+    """
+    Least recently used cache of responses which accounts size of their payloads. When total size exceeds
+    `max_bytes`, least recently used entries are evicted; entry larger than budget is not stored at all.
+    One cache can be shared by several API objects to have global budget.
+
+    Lazy responses are stored and returned not decoded and are accounted by size of raw payload. Size of decoded
+    responses is estimated from their data, so budget bounds memory held by cache in both modes.
+    """
+
+    def __init__(self, max_bytes: int=DEFAULT_MAX_BYTES):
+        super(ResponseCache, self).__init__()
+
+        if max_bytes < 0:
+            raise ValueError('max_bytes cannot be negative. Currently: {} {}'.format(max_bytes, type(max_bytes)))
+
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.evictions = 0
+        self._entries = collections.OrderedDict()  # key -> (value, nbytes)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, value, nbytes: int) -> bool:
+        """
+        Stores value and returns whether it was stored
+        """
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.nbytes -= previous[1]
+
+            if nbytes > self.max_bytes:
+                return False
+
+            self._entries[key] = (value, nbytes)
+            self.nbytes += nbytes
+
+            while self.nbytes > self.max_bytes:
+                _, (_, evicted_nbytes) = self._entries.popitem(last=False)
+                self.nbytes -= evicted_nbytes
+                self.evictions += 1
+            return True
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return default
+            self.nbytes -= entry[1]
+            return entry[0]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'nbytes': self.nbytes,
+                'max_bytes': self.max_bytes,
+                'evictions': self.evictions
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
@@ -0,0 +1,316 @@
+"""
+Local aggregation of candles into higher intervals
+"""
+
+import bisect
+import calendar
+import re
+import threading
+import time
+
+from typing import Iterable, List
+
+from pystexchapi.request import DEFAULT_ORDER, DEFAULT_COUNT, DEFAULT_INTERVAL
+from pystexchapi.response import APIResponse
+from pystexchapi.utils import numpy, Deadline
+
+
+__all__ = ('parse_interval', 'resample', 'candles_from_trades', 'CandleSeries', 'CandleStore')
+
+
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+INTERVAL_RE = re.compile(r'^(\d+)([HDW])$')
+INTERVAL_UNITS = {'H': 3600, 'D': 86400, 'W': 604800}
+WEEK_OFFSET = 4 * 86400  # epoch is Thursday, weeks start on Monday
+DEFAULT_BASE_INTERVAL = '1H'
+DEFAULT_HISTORY = 1000  # base candles requested on first fetch
+
+
+def parse_interval(interval: str) -> int:
+    """
+    Returns length of interval such as '1H', '4H', '1D' or '1W' in seconds
+    """
+    match = INTERVAL_RE.match(interval) if isinstance(interval, str) else None
+    if match is None or int(match.group(1)) == 0:
+        raise ValueError('Unsupported interval: {} {}'.format(interval, type(interval)))
+    return int(match.group(1)) * INTERVAL_UNITS[match.group(2)]
+
+
+def parse_date(date: str) -> int:
+    return calendar.timegm(time.strptime(date, DATE_FORMAT))
+
+
+def format_date(timestamp: int) -> str:
+    return time.strftime(DATE_FORMAT, time.gmtime(timestamp))
+
+
+def _bucket_offset(seconds: int) -> int:
+    return WEEK_OFFSET if seconds % INTERVAL_UNITS['W'] == 0 else 0
+
+
+def bucket_start(timestamp: int, seconds: int) -> int:
+    offset = _bucket_offset(seconds)
+    return (timestamp - offset) // seconds * seconds + offset
+
+
+def _group_bounds(times: List[int], seconds: int) -> tuple:
+    """
+    Returns bucket starts and (first, last) row indices of every bucket for sorted times
+    """
+    if numpy is not None:
+        offset = _bucket_offset(seconds)
+        buckets = (numpy.asarray(times, dtype=numpy.int64) - offset) // seconds * seconds + offset
+        first = numpy.flatnonzero(numpy.r_[True, buckets[1:] != buckets[:-1]])
+        last = numpy.r_[first[1:], len(buckets)] - 1
+        return buckets[first].tolist(), first, last
+
+    starts, first, last = [], [], []
+    for i, timestamp in enumerate(times):
+        start = bucket_start(timestamp, seconds)
+        if not starts or starts[-1] != start:
+            starts.append(start)
+            first.append(i)
+            if i:
+                last.append(i - 1)
+    if times:
+        last.append(len(times) - 1)
+    return starts, first, last
+
+
+def _extreme_indices(values: List[str], first, last, highest: bool) -> list:
+    """
+    Returns index of max (or min) value in every group, so original strings are kept without rounding
+    """
+    if numpy is not None:
+        numbers = numpy.array(values, dtype=numpy.float64)
+        groups = numpy.zeros(len(values), dtype=numpy.int64)
+        groups[first[1:]] = 1
+        order = numpy.lexsort((numbers, numpy.cumsum(groups)))  # sorted by value inside every group
+        return order[last if highest else first].tolist()
+
+    select = max if highest else min
+    return [select(range(f, l + 1), key=lambda i: float(values[i])) for f, l in zip(first, last)]
+
+
+def resample(candles: List[dict], interval: str, times: List[int]=None) -> List[dict]:
+    """
+    Aggregates candles sorted by date into candles of higher `interval`. Buckets are aligned to epoch,
+    weeks start on Monday. Bucket boundaries and extremes are computed in vectorized pass when NumPy is
+    installed.
+    """
+    if not candles:
+        return []
+
+    seconds = parse_interval(interval)
+    if times is None:
+        times = [parse_date(c['date']) for c in candles]
+
+    starts, first, last = _group_bounds(times, seconds)
+    highs = _extreme_indices([c['high'] for c in candles], first, last, highest=True)
+    lows = _extreme_indices([c['low'] for c in candles], first, last, highest=False)
+
+    return [
+        {
+            'open': candles[f]['open'],
+            'close': candles[l]['close'],
+            'low': candles[lo]['low'],
+            'high': candles[hi]['high'],
+            'date': format_date(start)
+        }
+        for start, f, l, hi, lo in zip(starts, list(first), list(last), highs, lows)
+    ]
+
+
+def candles_from_trades(trades: Iterable[dict], interval: str) -> List[dict]:
+    """
+    Builds candles from rows of `trade_history`
+    """
+    trades = sorted(trades, key=lambda t: t['timestamp'])
+    ticks = [{'open': t['price'], 'close': t['price'], 'low': t['price'], 'high': t['price']} for t in trades]
+    return resample(ticks, interval, times=[int(t['timestamp']) for t in trades])
+
+
+class CandleSeries(object):
+    """
+    Base candles of one pair sorted by date together with aggregated higher intervals. When base candles
+    are added, only aggregated buckets from the earliest changed one are rebuilt.
+    """
+
+    def __init__(self, base_interval: str=DEFAULT_BASE_INTERVAL):
+        super(CandleSeries, self).__init__()
+        self.base_interval = base_interval
+        self.base_seconds = parse_interval(base_interval)
+        self.times = []
+        self.candles = []
+        self._derived = {}  # interval -> (candles, their timestamps, base changed since timestamp)
+
+    def can_derive(self, interval: str) -> bool:
+        try:
+            seconds = parse_interval(interval)
+        except ValueError:
+            return False
+        return seconds > self.base_seconds and seconds % self.base_seconds == 0 and \
+            _bucket_offset(seconds) % self.base_seconds == 0
+
+    @property
+    def last_date(self) -> str:
+        return self.candles[-1]['date'] if self.candles else None
+
+    def update(self, candles: Iterable[dict]) -> int:
+        """
+        Adds base candles, candle with already known date replaces previous one (e.g. candle which was not
+        closed yet). Returns number of added or replaced candles.
+        """
+        changed_from = None
+        count = 0
+
+        for candle in candles:
+            timestamp = parse_date(candle['date'])
+            i = bisect.bisect_left(self.times, timestamp)
+            if i < len(self.times) and self.times[i] == timestamp:
+                if self.candles[i] == candle:
+                    continue
+                self.candles[i] = candle
+            else:
+                self.times.insert(i, timestamp)
+                self.candles.insert(i, candle)
+            count += 1
+            changed_from = timestamp if changed_from is None else min(changed_from, timestamp)
+
+        if changed_from is not None:
+            for interval, (derived, times, since) in self._derived.items():
+                since = changed_from if since is None else min(since, changed_from)
+                self._derived[interval] = (derived, times, since)
+
+        return count
+
+    def get(self, interval: str) -> List[dict]:
+        """
+        Returns candles of `interval` in ascending order of dates. The first bucket is left out when base
+        candles do not cover it from its start, as its open, high and low would be wrong.
+        """
+        if interval == self.base_interval:
+            return list(self.candles)
+
+        if not self.can_derive(interval):
+            raise ValueError('Interval {} cannot be built from {}'.format(interval, self.base_interval))
+
+        if interval not in self._derived:
+            derived = resample(self.candles, interval, times=self.times)
+            self._derived[interval] = (derived, [parse_date(c['date']) for c in derived], None)
+
+        derived, times, since = self._derived[interval]
+        if since is not None:
+            start = bucket_start(since, parse_interval(interval))
+            kept = bisect.bisect_left(times, start)
+            i = bisect.bisect_left(self.times, start)
+            rebuilt = resample(self.candles[i:], interval, times=self.times[i:])
+            derived = derived[:kept] + rebuilt
+            times = times[:kept] + [parse_date(c['date']) for c in rebuilt]
+            self._derived[interval] = (derived, times, None)
+
+        if self.times and bucket_start(self.times[0], parse_interval(interval)) != self.times[0]:
+            return derived[1:]
+        return list(derived)
+
+
+class CandleStore(object):
+    """
+    Serves `grafic` for any interval which is multiple of `base_interval` from locally cached base candles.
+    Only base interval is requested from exchange: the latest `history` candles on first fetch and only candles
+    since the last cached one afterwards. Other intervals are passed to exchange as is.
+
+    With `use_trades` the newest base candles are built from `trade_history` after first fetch, when trades
+    reach back before the last cached candle, and requested from `grafic` otherwise.
+    """
+
+    def __init__(self, api, base_interval: str=DEFAULT_BASE_INTERVAL, history: int=DEFAULT_HISTORY,
+                 use_trades: bool=False):
+        super(CandleStore, self).__init__()
+        self.api = api
+        self.base_interval = base_interval
+        self.history = history
+        self.use_trades = use_trades
+        self.series = {}
+        self._lock = threading.Lock()
+
+    def get_series(self, pair: str) -> CandleSeries:
+        series = self.series.get(pair)
+        if series is None:
+            series = self.series.setdefault(pair, CandleSeries(self.base_interval))
+        return series
+
+    def _fetch(self, currency1: str, currency2: str, order: str, deadline: Deadline=None, **kwargs) -> list:
+        response = self.api.call('grafic', deadline=deadline, currency1=currency1, currency2=currency2,
+                                 interval=self.base_interval, order=order, count=self.history, **kwargs)
+        return (response.data.get('data') or {}).get('graf') or []
+
+    def _refresh_from_trades(self, currency1: str, currency2: str, series: CandleSeries,
+                             deadline: Deadline=None) -> bool:
+        trades = self.api.call('trade_history', deadline=deadline, currency1=currency1,
+                               currency2=currency2).data.get('result') or []
+        candles = candles_from_trades(trades, self.base_interval)
+        last_time = series.times[-1]
+
+        # the first bucket of trades is partial, so trades must start before the last cached candle
+        if not candles or parse_date(candles[0]['date']) >= last_time:
+            return False
+        with self._lock:
+            series.update(c for c in candles if parse_date(c['date']) >= last_time)
+        return True
+
+    def refresh(self, currency1: str, currency2: str, deadline=None) -> CandleSeries:
+        """
+        Fetches new base candles of pair, `deadline` (seconds or `Deadline`) limits all pages together
+        """
+        series = self.get_series('{}_{}'.format(currency1, currency2))
+        deadline = Deadline.make(deadline)
+
+        if not series.candles:
+            candles = self._fetch(currency1, currency2, 'DESC', deadline=deadline)
+            with self._lock:
+                series.update(reversed(candles))
+            return series
+
+        if self.use_trades and self._refresh_from_trades(currency1, currency2, series, deadline=deadline):
+            return series
+
+        while True:
+            last_date = series.last_date
+            candles = self._fetch(currency1, currency2, 'ASC', deadline=deadline, since=last_date)
+            with self._lock:
+                series.update(candles)
+            if len(candles) < self.history or series.last_date == last_date:
+                return series
+
+    def grafic(self, currency1: str, currency2: str, interval: str=DEFAULT_INTERVAL, order: str=DEFAULT_ORDER,
+               count: int=DEFAULT_COUNT, refresh: bool=True, deadline=None) -> APIResponse:
+        """
+        Has signature of `grafic` call and returns response of the same shape
+        """
+        pair = '{}_{}'.format(currency1, currency2)
+        series = self.get_series(pair)
+
+        if interval != self.base_interval and not series.can_derive(interval):
+            return self.api.call('grafic', deadline=deadline, currency1=currency1, currency2=currency2,
+                                 interval=interval, order=order, count=count)
+
+        if refresh or not series.candles:
+            self.refresh(currency1, currency2, deadline=deadline)
+
+        with self._lock:
+            candles = series.get(interval)[-count:] if count else series.get(interval)
+
+        if order == 'DESC':
+            candles.reverse()
+
+        return APIResponse({
+            'success': 1,
+            'data': {
+                'pair': pair,
+                'interval': interval,
+                'order': order,
+                'count': str(len(candles)),
+                'graf': candles
+            }
+        })
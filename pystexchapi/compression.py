@@ -0,0 +1,121 @@
+"""
+Response compression negotiation and streaming decompression
+"""
+
+import zlib
+
+from typing import Iterable, Tuple
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+__all__ = ('ACCEPT_ENCODING', 'SUPPORTED_ENCODINGS', 'make_decompressor', 'parse_content_encoding',
+           'decompress_stream')
+
+
+CHUNK_SIZE = 64 * 1024
+
+
+class _ZlibDecompressor(object):
+
+    def __init__(self, wbits: int):
+        self._obj = zlib.decompressobj(wbits)
+
+    def decompress(self, data: bytes) -> bytes:
+        return self._obj.decompress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush()
+
+
+class _BrotliDecompressor(object):
+
+    def __init__(self):
+        self._obj = brotli.Decompressor()
+        # brotli and brotlicffi name streaming method differently
+        self._decompress = getattr(self._obj, 'process', None) or self._obj.decompress
+
+    def decompress(self, data: bytes) -> bytes:
+        return self._decompress(data) if data else b''
+
+    def flush(self) -> bytes:
+        return b''
+
+
+class _ZstdDecompressor(object):
+
+    def __init__(self):
+        self._obj = zstandard.ZstdDecompressor().decompressobj()
+
+    def decompress(self, data: bytes) -> bytes:
+        return self._obj.decompress(data) if data else b''
+
+    def flush(self) -> bytes:
+        return b''
+
+
+_DECOMPRESSORS = {
+    'gzip': lambda: _ZlibDecompressor(16 + zlib.MAX_WBITS),
+    'x-gzip': lambda: _ZlibDecompressor(16 + zlib.MAX_WBITS),
+    'deflate': lambda: _ZlibDecompressor(zlib.MAX_WBITS),
+}
+
+if zstandard is not None:
+    _DECOMPRESSORS['zstd'] = _ZstdDecompressor
+
+if brotli is not None:
+    _DECOMPRESSORS['br'] = _BrotliDecompressor
+
+
+# most efficient encodings go first
+SUPPORTED_ENCODINGS = tuple(e for e in ('zstd', 'br', 'gzip', 'deflate') if e in _DECOMPRESSORS)
+ACCEPT_ENCODING = ', '.join(SUPPORTED_ENCODINGS)
+
+
+def make_decompressor(encoding: str):
+    try:
+        return _DECOMPRESSORS[encoding.strip().lower()]()
+    except KeyError:
+        raise ValueError('Unsupported content encoding: {}'.format(encoding))
+
+
+def parse_content_encoding(content_encoding: str) -> list:
+    """
+    Returns decompressors in order of decoding (reverse to order of applying encodings by server)
+    """
+    encodings = [e for e in (content_encoding or '').split(',') if e.strip() and e.strip().lower() != 'identity']
+    return [make_decompressor(e) for e in reversed(encodings)]
+
+
+def decompress_stream(chunks: Iterable[bytes], content_encoding: str=None) -> Tuple[bytes, int]:
+    """
+    Decodes raw chunks of response body as they arrive. Returns decoded body and number of bytes received
+    from wire.
+    """
+    decompressors = parse_content_encoding(content_encoding)
+    wire_bytes = 0
+    decoded = []
+
+    for chunk in chunks:
+        wire_bytes += len(chunk)
+        for decompressor in decompressors:
+            chunk = decompressor.decompress(chunk)
+        decoded.append(chunk)
+
+    tail = b''
+    for decompressor in decompressors:
+        tail = decompressor.decompress(tail) + decompressor.flush()
+    decoded.append(tail)
+
+    return b''.join(decoded), wire_bytes
@@ -0,0 +1,208 @@
+"""
+Analytics of orderbook depth: spread, cost to fill, VWAP, slippage and imbalance
+"""
+
+import bisect
+import itertools
+import math
+
+from typing import Iterable
+
+from pystexchapi.response import BaseAPIResponse
+from pystexchapi.utils import numpy, to_float_array
+
+
+__all__ = ('OrderbookDepth',)
+
+
+SIDES = ('BUY', 'SELL')
+NAN = float('nan')
+
+
+def _cumsum(values):
+    if numpy is not None:
+        return numpy.cumsum(values)
+    return list(itertools.accumulate(values))
+
+
+class _BookSide(object):
+    """
+    Levels of one side of book sorted from the best price with cumulative amount and notional
+    """
+
+    def __init__(self, rows: list, descending: bool):
+        prices = to_float_array([row['Rate'] for row in rows])
+        amounts = to_float_array([row['Quantity'] for row in rows])
+
+        if numpy is not None:
+            order = numpy.argsort(-prices if descending else prices, kind='stable')
+            self.prices, self.amounts = prices[order], amounts[order]
+            self.notionals = self.prices * self.amounts
+        else:
+            levels = sorted(zip(prices, amounts), key=lambda level: level[0], reverse=descending)
+            self.prices = [price for price, _ in levels]
+            self.amounts = [amount for _, amount in levels]
+            self.notionals = [price * amount for price, amount in levels]
+
+        self.depth = _cumsum(self.amounts)
+        self.cumulative_notional = _cumsum(self.notionals)
+
+    def __len__(self):
+        return len(self.prices)
+
+    @property
+    def best(self) -> float:
+        return float(self.prices[0]) if len(self.prices) else NAN
+
+    def volume(self, levels: int=None, limit_price: float=None, descending: bool=False) -> float:
+        """
+        Amount within first `levels` levels and not beyond `limit_price`
+        """
+        count = len(self.prices) if levels is None else min(levels, len(self.prices))
+        if limit_price is not None:
+            if numpy is not None:
+                within = self.prices[:count] >= limit_price if descending else self.prices[:count] <= limit_price
+                count = int(numpy.count_nonzero(within))
+            else:
+                count = sum(1 for p in self.prices[:count] if (p >= limit_price if descending else p <= limit_price))
+        return float(self.depth[count - 1]) if count else 0.0
+
+    def cost(self, sizes):
+        """
+        Notional of filling every size by walking levels from the best one, NaN where depth is not enough
+        """
+        if numpy is not None:
+            sizes = numpy.asarray(sizes, dtype=numpy.float64)
+            if not len(self.prices):
+                return numpy.full(sizes.shape, NAN)
+            i = numpy.searchsorted(self.depth, sizes, side='left')
+            level = numpy.minimum(i, len(self.prices) - 1)
+            filled = numpy.where(i > 0, self.depth[numpy.maximum(i - 1, 0)], 0.0)
+            spent = numpy.where(i > 0, self.cumulative_notional[numpy.maximum(i - 1, 0)], 0.0)
+            cost = spent + (sizes - filled) * self.prices[level]
+            return numpy.where(i < len(self.prices), cost, NAN)
+
+        result = []
+        for size in sizes:
+            i = bisect.bisect_left(self.depth, size)
+            if i >= len(self.prices):
+                result.append(NAN)
+            elif i == 0:
+                result.append(size * self.prices[0])
+            else:
+                result.append(self.cumulative_notional[i - 1] + (size - self.depth[i - 1]) * self.prices[i])
+        return result
+
+
+class OrderbookDepth(object):
+    """
+    Orderbook converted once into sorted float arrays (NumPy, or lists if NumPy is not installed), so
+    pre-trade checks are computed for many sizes at once without touching string levels again.
+
+    `side` of methods is side of our order: 'BUY' walks asks ('sell' list of orderbook), 'SELL' walks
+    bids ('buy' list). Sizes are amounts of base currency; amounts beyond available depth give NaN.
+    """
+
+    def __init__(self, buy: Iterable[dict], sell: Iterable[dict]):
+        super(OrderbookDepth, self).__init__()
+        self.bids = _BookSide(list(buy or []), descending=True)
+        self.asks = _BookSide(list(sell or []), descending=False)
+
+    @classmethod
+    def from_response(cls, response) -> 'OrderbookDepth':
+        """
+        Accepts `orderbook` response or its data
+        """
+        data = response.data if isinstance(response, BaseAPIResponse) else response
+        result = data.get('result') or {}
+        return cls(result.get('buy'), result.get('sell'))
+
+    def _walked(self, side: str) -> _BookSide:
+        if side not in SIDES:
+            raise ValueError('The parameter side can be one of "BUY" or "SELL". Currently: {} {}'.format(
+                side, type(side)))
+        return self.asks if side == 'BUY' else self.bids
+
+    @property
+    def best_bid(self) -> float:
+        return self.bids.best
+
+    @property
+    def best_ask(self) -> float:
+        return self.asks.best
+
+    @property
+    def spread(self) -> float:
+        return self.best_ask - self.best_bid
+
+    @property
+    def mid(self) -> float:
+        return (self.best_ask + self.best_bid) / 2
+
+    @property
+    def relative_spread(self) -> float:
+        mid = self.mid
+        return self.spread / mid if mid else NAN
+
+    def depth(self, side: str):
+        """
+        Returns (prices, cumulative amounts) of levels walked by order of `side`, from the best price
+        """
+        book = self._walked(side)
+        return book.prices, book.depth
+
+    def cost_to_fill(self, side: str, sizes):
+        """
+        Quote currency spent (BUY) or received (SELL) when order of every size is filled by market.
+        Returns float for one size and array for iterable of sizes.
+        """
+        book = self._walked(side)
+        if isinstance(sizes, (int, float)):
+            return float(book.cost([sizes])[0])
+        return book.cost(sizes if numpy is not None else list(sizes))
+
+    def vwap(self, side: str, sizes):
+        """
+        Average fill price of every size
+        """
+        if isinstance(sizes, (int, float)):
+            return self.cost_to_fill(side, sizes) / sizes if sizes else self._walked(side).best
+
+        costs = self.cost_to_fill(side, sizes)
+        if numpy is not None:
+            sizes = numpy.asarray(sizes, dtype=numpy.float64)
+            with numpy.errstate(divide='ignore', invalid='ignore'):
+                return numpy.where(sizes > 0, costs / sizes, self._walked(side).best)
+        return [cost / size if size else self._walked(side).best for cost, size in zip(costs, sizes)]
+
+    def slippage(self, side: str, sizes):
+        """
+        Relative loss of average fill price against the best price, positive for worse fills
+        """
+        best = self._walked(side).best
+        sign = 1 if side == 'BUY' else -1
+        prices = self.vwap(side, sizes)
+
+        if isinstance(prices, float):
+            return sign * (prices - best) / best
+        if numpy is not None:
+            return sign * (prices - best) / best
+        return [sign * (price - best) / best for price in prices]
+
+    def imbalance(self, levels: int=None, band: float=None) -> float:
+        """
+        (bid volume - ask volume) / (bid volume + ask volume) over first `levels` levels of both sides and,
+        if `band` is set, within relative distance from mid price (e.g. 0.01 for 1%). Ranges from -1 (only
+        asks) to 1 (only bids).
+        """
+        bid_limit = ask_limit = None
+        if band is not None:
+            mid = self.mid
+            if math.isnan(mid):
+                return NAN
+            bid_limit, ask_limit = mid * (1 - band), mid * (1 + band)
+
+        bid_volume = self.bids.volume(levels, bid_limit, descending=True)
+        ask_volume = self.asks.volume(levels, ask_limit)
+        total = bid_volume + ask_volume
+        return (bid_volume - ask_volume) / total if total else NAN
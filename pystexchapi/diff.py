@@ -0,0 +1,94 @@
+"""
+Change detection between consecutive snapshots of list-shaped responses (ticker, prices)
+"""
+
+from typing import Iterable
+
+
+__all__ = ('RowChange', 'SnapshotDelta', 'SnapshotDiffer')
+
+
+DEFAULT_KEY_FIELD = 'market_name'
+DEFAULT_IGNORED_FIELDS = ('server_time',)
+
+
+class RowChange(object):
+
+    __slots__ = ('key', 'row', 'previous', 'fields')
+
+    def __init__(self, key, row: dict, previous: dict, fields: tuple):
+        self.key = key
+        self.row = row
+        self.previous = previous
+        self.fields = fields
+
+    def __repr__(self):
+        return '{}(key={!r}, fields={!r})'.format(self.__class__.__name__, self.key, self.fields)
+
+
+class SnapshotDelta(object):
+
+    def __init__(self, added: list=None, removed: list=None, changed: list=None):
+        self.added = added or []
+        self.removed = removed or []
+        self.changed = changed or []
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+
+    def __len__(self):
+        return len(self.added) + len(self.removed) + len(self.changed)
+
+    def __repr__(self):
+        return '{}(added={}, removed={}, changed={})'.format(self.__class__.__name__, len(self.added),
+                                                              len(self.removed), len(self.changed))
+
+
+class SnapshotDiffer(object):
+    """
+    Keeps previous snapshot of rows indexed by key field and returns only rows which were added, removed or
+    changed since previous update. Every row is reduced to hash of its values tuple, so unchanged rows are
+    skipped without field by field comparison.
+    """
+
+    def __init__(self, key_field: str=DEFAULT_KEY_FIELD, ignored_fields: Iterable[str]=DEFAULT_IGNORED_FIELDS):
+        super(SnapshotDiffer, self).__init__()
+        self.key_field = key_field
+        self.ignored_fields = frozenset(ignored_fields or ())
+        self._snapshot = {}
+
+    def _row_values(self, row: dict) -> tuple:
+        ignored = self.ignored_fields
+        return tuple((k, v) for k, v in sorted(row.items()) if k not in ignored)
+
+    def update(self, rows: Iterable[dict]) -> SnapshotDelta:
+        key_field = self.key_field
+        previous_snapshot = dict(self._snapshot)
+        snapshot = {}
+        delta = SnapshotDelta()
+
+        for row in rows:
+            key = row[key_field]
+            values = self._row_values(row)
+            row_hash = hash(values)
+            snapshot[key] = (row_hash, values, row)
+
+            previous = previous_snapshot.pop(key, None)
+            if previous is None:
+                delta.added.append(row)
+            elif previous[0] != row_hash:
+                prev_values = dict(previous[1])
+                fields = tuple(k for k, v in values if k not in prev_values or prev_values[k] != v)
+                fields += tuple(k for k in prev_values if k not in row)
+                delta.changed.append(RowChange(key, row, previous[2], fields))
+
+        delta.removed.extend(r for _, _, r in previous_snapshot.values())
+        self._snapshot = snapshot
+        return delta
+
+    def reset(self):
+        self._snapshot = {}
+
+    @property
+    def snapshot(self) -> dict:
+        return {k: v[2] for k, v in self._snapshot.items()}
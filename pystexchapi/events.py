@@ -0,0 +1,271 @@
+"""
+Publish-subscribe event bus on top of polling
+"""
+
+import collections
+import hashlib
+import itertools
+import json
+import logging
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+
+from pystexchapi.diff import SnapshotDiffer, SnapshotDelta
+
+
+__all__ = ('TOPIC', 'Event', 'EventBus')
+
+
+logger = logging.getLogger(__name__)
+
+
+TOPIC_SEPARATOR = ':'
+DEFAULT_INTERVAL = 1.0
+DEFAULT_MAX_WORKERS = 4
+
+
+class TOPIC(object):
+    TICKER = 'ticker'
+    ORDERBOOK = 'orderbook'
+    BALANCES = 'balances'
+
+    @staticmethod
+    def ticker(pair: str=None) -> str:
+        return TOPIC.TICKER + TOPIC_SEPARATOR + pair if pair else TOPIC.TICKER
+
+    @staticmethod
+    def orderbook(pair: str) -> str:
+        return TOPIC.ORDERBOOK + TOPIC_SEPARATOR + pair
+
+
+class Event(object):
+
+    __slots__ = ('topic', 'data')
+
+    def __init__(self, topic: str, data):
+        self.topic = topic
+        self.data = data
+
+    def __repr__(self):
+        return '{}(topic={!r})'.format(self.__class__.__name__, self.topic)
+
+
+def _split_topic(topic: str) -> tuple:
+    kind, _, pair = topic.partition(TOPIC_SEPARATOR)
+    if kind not in (TOPIC.TICKER, TOPIC.ORDERBOOK, TOPIC.BALANCES):
+        raise ValueError('Unknown topic: {}'.format(topic))
+    if kind == TOPIC.ORDERBOOK and not pair:
+        raise ValueError('Orderbook topic requires pair, e.g. orderbook:ETH_BTC. Currently: {}'.format(topic))
+    return kind, pair or None
+
+
+def _digest(data) -> bytes:
+    return hashlib.blake2b(json.dumps(data, sort_keys=True).encode('utf-8'), digest_size=16).digest()
+
+
+class EventBus(object):
+    """
+    Consumers subscribe callbacks to topics: `ticker` (all pairs), `ticker:<pair>`, `orderbook:<pair>` and
+    `balances`. Every poll performs minimal set of calls which satisfies all subscriptions: one `ticker` call
+    for any number of ticker topics, one `orderbook` call per pair and one `get_account_info` call for
+    balances. Events are published only when data changed and callbacks are run in thread pool.
+
+    Callbacks of one topic are run one after another in order of events, new subscriber gets current state of
+    its topic on the next poll. Failed call of one topic is logged and does not stop polling of others.
+    """
+
+    def __init__(self, api, interval: float=DEFAULT_INTERVAL, max_workers: int=DEFAULT_MAX_WORKERS):
+        super(EventBus, self).__init__()
+        self.api = api
+        self.interval = interval
+
+        self._lock = threading.Lock()
+        self._subscriptions = {}  # topic -> {token: callback}
+        self._tokens = {}  # token -> topic
+        self._token_counter = itertools.count(1)
+        self._ticker_differ = SnapshotDiffer()
+        self._digests = {}
+        self._pending = {}  # topic -> tokens of subscribers which have not got current state yet
+        self._queues = {}  # topic -> deque of (callbacks, event) waiting for dispatch
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='pystexchapi-events')
+        self._stop = threading.Event()
+        self._thread = None
+
+    def subscribe(self, topic: str, callback: Callable[[Event], None]) -> int:
+        _split_topic(topic)
+        with self._lock:
+            token = next(self._token_counter)
+            self._subscriptions.setdefault(topic, {})[token] = callback
+            self._tokens[token] = topic
+            self._pending.setdefault(topic, set()).add(token)
+        return token
+
+    def subscribe_queue(self, topic: str, queue, loop) -> int:
+        """
+        Delivers events to `asyncio.Queue` of given event loop
+        """
+        return self.subscribe(topic, lambda event: loop.call_soon_threadsafe(queue.put_nowait, event))
+
+    def unsubscribe(self, token: int):
+        with self._lock:
+            topic = self._tokens.pop(token, None)
+            if topic is None:
+                return
+            callbacks = self._subscriptions[topic]
+            callbacks.pop(token, None)
+            self._pending.get(topic, set()).discard(token)
+            if not callbacks:
+                del self._subscriptions[topic]
+                self._pending.pop(topic, None)
+                if topic.startswith(TOPIC.ORDERBOOK):
+                    self._digests.pop(topic, None)
+
+    def plan(self) -> List[tuple]:
+        """
+        Returns deduplicated list of (api method, kwargs, topic kind, pair) calls needed for current
+        subscriptions
+        """
+        with self._lock:
+            topics = list(self._subscriptions)
+
+        polls = []
+        kinds = {_split_topic(topic) for topic in topics}
+
+        if any(kind == TOPIC.TICKER for kind, _ in kinds):
+            polls.append(('ticker', {}, TOPIC.TICKER, None))
+
+        for kind, pair in sorted(k for k in kinds if k[0] == TOPIC.ORDERBOOK):
+            currency1, _, currency2 = pair.partition('_')
+            polls.append(('orderbook', {'currency1': currency1, 'currency2': currency2}, TOPIC.ORDERBOOK, pair))
+
+        if (TOPIC.BALANCES, None) in kinds:
+            polls.append(('get_account_info', {}, TOPIC.BALANCES, None))
+
+        return polls
+
+    def _publish(self, topic: str, data, tokens: set=None, exclude: set=()):
+        """
+        Publishes event to subscribers of topic, only to `tokens` if they are given
+        """
+        with self._lock:
+            callbacks = [callback for token, callback in self._subscriptions.get(topic, {}).items()
+                         if (tokens is None or token in tokens) and token not in exclude]
+            if not callbacks:
+                return
+
+            queue = self._queues.get(topic)
+            if queue is None:
+                queue = self._queues[topic] = collections.deque()
+                self._executor.submit(self._dispatch, topic)
+            queue.append((callbacks, Event(topic, data)))
+
+    def _dispatch(self, topic: str):
+        while True:
+            with self._lock:
+                queue = self._queues[topic]
+                if not queue:
+                    del self._queues[topic]
+                    return
+                callbacks, event = queue.popleft()
+
+            for callback in callbacks:
+                self._run_callback(callback, event)
+
+    @staticmethod
+    def _run_callback(callback: Callable, event: Event):
+        try:
+            callback(event)
+        except Exception:
+            logger.exception('Callback for topic %s failed', event.topic)
+
+    def _take_pending(self, kind: str) -> dict:
+        with self._lock:
+            return {topic: self._pending.pop(topic) for topic in list(self._pending)
+                    if _split_topic(topic)[0] == kind}
+
+    def _publish_ticker(self, data: list):
+        delta = self._ticker_differ.update(data)
+        pending = self._take_pending(TOPIC.TICKER)
+
+        all_pending = pending.pop(TOPIC.ticker(), set())
+        if all_pending:
+            self._publish(TOPIC.ticker(), SnapshotDelta(added=list(data)), tokens=all_pending)
+        if delta:
+            self._publish(TOPIC.ticker(), delta, exclude=all_pending)
+
+        for row in delta.added:
+            topic = TOPIC.ticker(row['market_name'])
+            self._publish(topic, row, exclude=pending.get(topic, ()))
+        for change in delta.changed:
+            topic = TOPIC.ticker(change.key)
+            self._publish(topic, change.row, exclude=pending.get(topic, ()))
+
+        if pending:
+            rows = {row['market_name']: row for row in data}
+            for topic, tokens in pending.items():
+                row = rows.get(_split_topic(topic)[1])
+                if row is not None:
+                    self._publish(topic, row, tokens=tokens)
+
+    def _publish_if_changed(self, topic: str, data):
+        digest = _digest(data)
+        with self._lock:
+            pending = self._pending.pop(topic, None)
+
+        if self._digests.get(topic) != digest:
+            self._digests[topic] = digest
+            self._publish(topic, data)
+        elif pending:
+            self._publish(topic, data, tokens=pending)
+
+    def poll_once(self) -> int:
+        """
+        Performs one round of planned calls. Returns number of calls made.
+        """
+        polls = self.plan()
+
+        for method, kwargs, kind, pair in polls:
+            try:
+                data = self.api.call(method, **kwargs).data
+            except Exception:
+                logger.exception('Polling of %s failed', pair or method)
+                continue
+
+            if kind == TOPIC.TICKER:
+                self._publish_ticker(data)
+            elif kind == TOPIC.ORDERBOOK:
+                self._publish_if_changed(TOPIC.orderbook(pair), data.get('result'))
+            else:
+                funds = data.get('data', {})
+                self._publish_if_changed(TOPIC.BALANCES, {'funds': funds.get('funds'),
+                                                          'hold_funds': funds.get('hold_funds')})
+
+        return len(polls)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll_once()
+            except Exception:
+                logger.exception('Polling failed')
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='pystexchapi-event-bus', daemon=True)
+            self._thread.start()
+
+    def stop(self, wait: bool=True):
+        self._stop.set()
+        if self._thread is not None and wait:
+            self._thread.join()
+
+    def close(self, wait: bool=True):
+        """
+        Stops polling and waits for running callbacks
+        """
+        self.stop(wait=wait)
+        self._executor.shutdown(wait=wait)
@@ -3,7 +3,8 @@ import requests
 import warnings
 
 
-__all__ = ('APIResponseParsingException', 'APIDataException', 'APINoMethodException')
+__all__ = ('APIResponseParsingException', 'APIDataException', 'APINoMethodException', 'APICircuitOpenException',
+           'APIDeadlineExceededException')
 
 
 class APIBaseException(requests.exceptions.RequestException):
@@ -56,3 +57,18 @@ class APIResponseParsingException(APIBaseException):
 
 class APIDataException(APIBaseException):
     error_code = '05'
+
+
+class APICircuitOpenException(APIBaseException):
+    error_code = '06'
+
+    def __init__(self, circuit, retry_after=None, exc=None, *args, **kwargs):
+        msg = 'Circuit <{}> is open, calls are rejected'.format(circuit)
+        super(APICircuitOpenException, self).__init__(msg=msg, exc=exc, *args, **kwargs)
+        self.circuit = circuit
+        self.retry_after = retry_after
+
+
+class APIDeadlineExceededException(APIBaseException, requests.exceptions.Timeout):
+    msg = 'Deadline of call exceeded'
+    error_code = '07'
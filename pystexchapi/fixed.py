@@ -0,0 +1,221 @@
+"""
+Fixed-point numbers for exact price and amount arithmetic
+"""
+
+import functools
+
+from decimal import Decimal
+from typing import Iterable
+
+from pystexchapi.response import FixedPointColumnsResponseParser
+from pystexchapi.utils import to_fixed_point, is_numeric, DEFAULT_SCALE
+
+
+__all__ = ('FixedPoint', 'MarketPrecisions')
+
+
+# fields of public and private responses scaled by precision of partner currency and of currency
+RATE_FIELDS = ('Rate', 'rate', 'price', 'bid', 'ask', 'last', 'lastDayAgo', 'buy', 'sell', 'open', 'high', 'low',
+               'close', 'min_buy_price', 'min_sell_price')
+AMOUNT_FIELDS = ('Quantity', 'quantity', 'amount', 'vol', 'volume', 'min_order_amount')
+
+
+def _div_toward_zero(a: int, b: int) -> int:
+    q = abs(a) // abs(b)
+    return q if (a >= 0) == (b > 0) else -q
+
+
+@functools.total_ordering
+class FixedPoint(object):
+    """
+    Number stored as integer `value` scaled by 10 ** `scale`, e.g. FixedPoint('0.00002905', 8).value == 2905.
+    Addition, subtraction and comparison are exact; results of multiplication and division are truncated to
+    the larger scale of operands. Numbers are equal to (and hashed as) ints and Decimals of the same value.
+    """
+
+    __slots__ = ('value', 'scale')
+
+    def __init__(self, value=0, scale: int=DEFAULT_SCALE):
+        if isinstance(value, FixedPoint):
+            value = value.rescale(scale).value
+        else:
+            value = to_fixed_point(value, scale)
+        self.value = value
+        self.scale = scale
+
+    @classmethod
+    def from_raw(cls, value: int, scale: int=DEFAULT_SCALE) -> 'FixedPoint':
+        number = cls.__new__(cls)
+        number.value = value
+        number.scale = scale
+        return number
+
+    def rescale(self, scale: int) -> 'FixedPoint':
+        if scale == self.scale:
+            return self
+        if scale > self.scale:
+            return FixedPoint.from_raw(self.value * 10 ** (scale - self.scale), scale)
+        return FixedPoint.from_raw(_div_toward_zero(self.value, 10 ** (self.scale - scale)), scale)
+
+    def _coerce(self, other, strings: bool=True) -> 'FixedPoint':
+        """
+        Numeric strings are accepted only by arithmetic, as in comparisons they would break hashing
+        """
+        if isinstance(other, FixedPoint):
+            return other
+        if isinstance(other, str) and (not strings or not is_numeric(other)):
+            return None
+        if isinstance(other, (int, str, Decimal)) and not isinstance(other, bool):
+            return FixedPoint(other, self.scale)
+        return None
+
+    def _align(self, other, strings: bool=True):
+        other = self._coerce(other, strings)
+        if other is None:
+            return None, None, None
+        scale = max(self.scale, other.scale)
+        return self.rescale(scale).value, other.rescale(scale).value, scale
+
+    def __add__(self, other):
+        a, b, scale = self._align(other)
+        if scale is None:
+            return NotImplemented
+        return FixedPoint.from_raw(a + b, scale)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        a, b, scale = self._align(other)
+        if scale is None:
+            return NotImplemented
+        return FixedPoint.from_raw(a - b, scale)
+
+    def __rsub__(self, other):
+        return -self + other
+
+    def __mul__(self, other):
+        if isinstance(other, int) and not isinstance(other, bool):
+            return FixedPoint.from_raw(self.value * other, self.scale)
+        other = self._coerce(other)
+        if other is None:
+            return NotImplemented
+        scale = max(self.scale, other.scale)
+        product = FixedPoint.from_raw(self.value * other.value, self.scale + other.scale)
+        return product.rescale(scale)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        if isinstance(other, int) and not isinstance(other, bool):
+            return FixedPoint.from_raw(_div_toward_zero(self.value, other), self.scale)
+        other = self._coerce(other)
+        if other is None:
+            return NotImplemented
+        scale = max(self.scale, other.scale)
+        value = _div_toward_zero(self.value * 10 ** (scale + other.scale - self.scale), other.value)
+        return FixedPoint.from_raw(value, scale)
+
+    def __rtruediv__(self, other):
+        other = self._coerce(other)
+        if other is None:
+            return NotImplemented
+        return other / self
+
+    def __neg__(self):
+        return FixedPoint.from_raw(-self.value, self.scale)
+
+    def __abs__(self):
+        return FixedPoint.from_raw(abs(self.value), self.scale)
+
+    def __bool__(self):
+        return bool(self.value)
+
+    def __eq__(self, other):
+        a, b, scale = self._align(other, strings=False)
+        if scale is None:
+            return NotImplemented
+        return a == b
+
+    def __lt__(self, other):
+        a, b, scale = self._align(other, strings=False)
+        if scale is None:
+            return NotImplemented
+        return a < b
+
+    def __hash__(self):
+        return hash(self.to_decimal())
+
+    def to_decimal(self) -> Decimal:
+        return Decimal(self.value).scaleb(-self.scale)
+
+    def __float__(self):
+        return self.value / 10 ** self.scale
+
+    def __int__(self):
+        return _div_toward_zero(self.value, 10 ** self.scale)
+
+    def __str__(self):
+        if not self.scale:
+            return str(self.value)
+        digits = str(abs(self.value)).rjust(self.scale + 1, '0')
+        sign = '-' if self.value < 0 else ''
+        return '{}{}.{}'.format(sign, digits[:-self.scale], digits[-self.scale:])
+
+    def __repr__(self):
+        return "{}('{}', {})".format(self.__class__.__name__, self, self.scale)
+
+
+class MarketPrecisions(object):
+    """
+    Index of pair precisions built from `markets` response. Amounts are scaled by precision of currency,
+    rates by precision of partner currency.
+    """
+
+    def __init__(self, markets: Iterable[dict]):
+        super(MarketPrecisions, self).__init__()
+        self._precisions = {}
+        self._parsers = {}
+        for market in markets:
+            amount_scale = int(market.get('currency_precision', DEFAULT_SCALE))
+            rate_scale = int(market.get('partner_precision', DEFAULT_SCALE))
+            self._precisions[market['market_name']] = (amount_scale, rate_scale)
+
+    def __contains__(self, pair: str):
+        return pair in self._precisions
+
+    def get(self, pair: str) -> tuple:
+        """
+        Returns (amount scale, rate scale) of pair
+        """
+        return self._precisions.get(pair, (DEFAULT_SCALE, DEFAULT_SCALE))
+
+    def amount(self, pair: str, value) -> FixedPoint:
+        return FixedPoint(value, self.get(pair)[0])
+
+    def rate(self, pair: str, value) -> FixedPoint:
+        return FixedPoint(value, self.get(pair)[1])
+
+    def columns_parser(self, pair: str) -> type:
+        """
+        Returns fixed-point columnar parser which scales rates and amounts of pair responses by precisions of
+        pair. Columns of these responses are built in calling thread, as parser is not importable by workers
+        of `ParsePool`.
+        """
+        parser = self._parsers.get(pair)
+        if parser is None:
+            amount_scale, rate_scale = self.get(pair)
+            field_scales = dict({f: rate_scale for f in RATE_FIELDS}, **{f: amount_scale for f in AMOUNT_FIELDS})
+            parser = self._parsers[pair] = type('FixedPointColumnsResponseParser', (FixedPointColumnsResponseParser,),
+                                                {'field_scales': field_scales, 'offload': False})
+        return parser
+
+    def orderbook(self, pair: str, data: dict) -> dict:
+        """
+        Converts `orderbook` response data into {'buy': [(rate, quantity), ...], 'sell': [...]} of fixed-point
+        numbers, levels keep order of response
+        """
+        amount_scale, rate_scale = self.get(pair)
+        result = data.get('result', data)
+        return {side: [(FixedPoint(level['Rate'], rate_scale), FixedPoint(level['Quantity'], amount_scale))
+                       for level in result.get(side) or ()]
+                for side in ('buy', 'sell')}
@@ -0,0 +1,169 @@
+"""
+Hedged requests for latency-critical idempotent methods
+"""
+
+import collections
+import threading
+
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable
+
+
+__all__ = ('LatencyTracker', 'Hedger')
+
+
+DEFAULT_PERCENTILE = 95.0
+DEFAULT_BUDGET = 0.1
+DEFAULT_MIN_SAMPLES = 20
+DEFAULT_WINDOW = 500
+DEFAULT_MAX_WORKERS = 8
+
+
+class LatencyTracker(object):
+    """
+    Keeps latencies of last `window` calls
+    """
+
+    def __init__(self, window: int=DEFAULT_WINDOW):
+        super(LatencyTracker, self).__init__()
+        self._latencies = collections.deque(maxlen=window)
+
+    def record(self, latency: float):
+        self._latencies.append(latency)
+
+    def __len__(self):
+        return len(self._latencies)
+
+    def percentile(self, p: float) -> float:
+        latencies = sorted(self._latencies)
+        if not latencies:
+            return None
+        index = min(int(round(p / 100.0 * (len(latencies) - 1))), len(latencies) - 1)
+        return latencies[index]
+
+
+class Hedger(object):
+    """
+    Sends request and, if it has not finished within `percentile` of observed latency of the method, sends
+    the same request once more and takes whichever response comes first. Response of the loser is discarded,
+    queued loser is cancelled. Hedge is sent only while number of hedges is less than `budget` fraction of all
+    requests.
+
+    Primary request runs in the pool only when a hedge could be sent for it, i.e. budget is left and there are
+    idle workers for both requests. Otherwise it runs in the caller's thread, so the pool neither limits
+    throughput of calls nor delays them in its queue.
+    """
+
+    def __init__(self, percentile: float=DEFAULT_PERCENTILE, budget: float=DEFAULT_BUDGET,
+                 min_samples: int=DEFAULT_MIN_SAMPLES, window: int=DEFAULT_WINDOW,
+                 max_workers: int=DEFAULT_MAX_WORKERS):
+        super(Hedger, self).__init__()
+
+        if not 0 < percentile < 100:
+            raise ValueError('percentile must be in range (0, 100). Currently: {} {}'.format(percentile,
+                                                                                           type(percentile)))
+        if budget < 0:
+            raise ValueError('budget cannot be negative. Currently: {} {}'.format(budget, type(budget)))
+
+        self.percentile = percentile
+        self.budget = budget
+        self.min_samples = min_samples
+        self.window = window
+
+        self._lock = threading.Lock()
+        self._trackers = {}
+        self._requests = 0
+        self._hedges = 0
+        self._max_workers = max_workers
+        self._busy = 0  # workers taken by submitted requests
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='pystexchapi-hedging')
+
+    def record(self, method: str, latency: float):
+        tracker = self._trackers.get(method)
+        if tracker is None:
+            tracker = self._trackers.setdefault(method, LatencyTracker(self.window))
+        tracker.record(latency)
+
+    def get_delay(self, method: str) -> float:
+        """
+        Returns time to wait before hedging or None if there are not enough observations
+        """
+        tracker = self._trackers.get(method)
+        if tracker is None or len(tracker) < self.min_samples:
+            return None
+        return tracker.percentile(self.percentile)
+
+    def _take_budget(self) -> bool:
+        with self._lock:
+            if self._hedges >= self.budget * self._requests:
+                return False
+            self._hedges += 1
+            return True
+
+    def _take_workers(self) -> bool:
+        """
+        Reserves workers for primary request and its hedge if budget allows to hedge
+        """
+        with self._lock:
+            if self._hedges >= self.budget * self._requests or self._busy + 2 > self._max_workers:
+                return False
+            self._busy += 2
+            return True
+
+    def _release_worker(self):
+        with self._lock:
+            self._busy -= 1
+
+    def _send(self, send: Callable):
+        try:
+            return send()
+        finally:
+            self._release_worker()
+
+    def _submit(self, send: Callable):
+        future = self._executor.submit(self._send, send)
+        future.add_done_callback(lambda f: f.cancelled() and self._release_worker())
+        return future
+
+    def run(self, method: str, send: Callable, hedge_send: Callable=None):
+        """
+        `send` performs the request, `hedge_send` performs its duplicate (defaults to `send`)
+        """
+        with self._lock:
+            self._requests += 1
+
+        delay = self.get_delay(method)
+        if delay is None or not self._take_workers():
+            return send()
+
+        primary = self._submit(send)
+        done, _ = wait((primary,), timeout=delay)
+        if done or not self._take_budget():
+            self._release_worker()  # worker reserved for hedge
+            return primary.result()
+
+        hedge = self._submit(hedge_send or send)
+        pending = {primary, hedge}
+        error = None
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for loser in pending:
+                        loser.cancel()
+                    return future.result()
+                error = error or future.exception()
+
+        raise error
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                'requests': self._requests,
+                'hedges': self._hedges,
+                'delays': {method: self.get_delay(method) for method in list(self._trackers)}
+            }
+
+    def close(self):
+        self._executor.shutdown(wait=False)
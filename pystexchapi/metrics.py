@@ -0,0 +1,48 @@
+"""
+Stocks Exchange API call metrics
+"""
+
+import threading
+
+
+__all__ = ('TransferStats',)
+
+
+class TransferStats(object):
+    """
+    Per-method accounting of bytes received from wire against bytes after decompression
+    """
+
+    def __init__(self):
+        super(TransferStats, self).__init__()
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, method: str, wire_bytes: int, decoded_bytes: int):
+        with self._lock:
+            stats = self._stats.get(method)
+            if stats is None:
+                stats = self._stats[method] = [0, 0, 0]
+            stats[0] += 1
+            stats[1] += wire_bytes
+            stats[2] += decoded_bytes
+
+    def get(self, method: str) -> dict:
+        with self._lock:
+            calls, wire_bytes, decoded_bytes = self._stats.get(method, (0, 0, 0))
+
+        return {
+            'calls': calls,
+            'wire_bytes': wire_bytes,
+            'decoded_bytes': decoded_bytes,
+            'ratio': (wire_bytes / decoded_bytes) if decoded_bytes else 1.0
+        }
+
+    def summary(self) -> dict:
+        with self._lock:
+            methods = list(self._stats)
+        return {method: self.get(method) for method in methods}
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
@@ -0,0 +1,95 @@
+"""
+Parsing of large responses in process pool, off the threads doing I/O
+"""
+
+import concurrent.futures
+import multiprocessing
+import os
+import requests
+
+from typing import Type
+
+from pystexchapi.exc import APIDeadlineExceededException
+from pystexchapi.response import APIResponse, StockExchangeResponseParser
+from pystexchapi.utils import Deadline
+
+
+__all__ = ('ParsePool',)
+
+
+DEFAULT_THRESHOLD = 256 * 1024  # smaller payloads are parsed faster than they are pickled to worker
+
+
+def _parse_payload(parser: Type[StockExchangeResponseParser], content: bytes, status_code: int, headers: dict,
+                   encoding: str) -> APIResponse:
+    """
+    Runs in worker process: restores response from raw payload and parses it
+    """
+    response = requests.Response()
+    response._content = content
+    response.status_code = status_code
+    response.headers.update(headers)
+    response.encoding = encoding
+    return parser.parse(response)
+
+
+def _noop():
+    return os.getpid()
+
+
+class ParsePool(object):
+    """
+    Process pool which decodes JSON and converts columns of payloads of at least `threshold` bytes, so threads
+    waiting for network are not stalled by parsing under GIL and parsing scales over cores. Raw bytes are sent
+    to worker and parsed `APIResponse` (with NumPy columns, if columnar parser is used) is pickled back.
+
+    Parser class must be importable by worker, i.e. defined at module level. Parsers with `offload` set to
+    False (e.g. lazy parser, which does not decode payload) always run in calling thread. Workers are started
+    with 'spawn' by default, as forking process with running I/O threads is unsafe. One pool can be shared
+    by several API objects.
+    """
+
+    def __init__(self, max_workers: int=None, threshold: int=DEFAULT_THRESHOLD, mp_context=None):
+        super(ParsePool, self).__init__()
+
+        if threshold < 0:
+            raise ValueError('threshold cannot be negative. Currently: {} {}'.format(threshold, type(threshold)))
+
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.threshold = threshold
+        self._executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.max_workers, mp_context=mp_context or multiprocessing.get_context('spawn'))
+
+    def accepts(self, parser: Type[StockExchangeResponseParser], response: requests.Response) -> bool:
+        return getattr(parser, 'offload', False) and len(response.content) >= self.threshold
+
+    def parse(self, parser: Type[StockExchangeResponseParser], response: requests.Response,
+              deadline: Deadline=None) -> APIResponse:
+        """
+        Parses response in worker process and waits for result, calling thread releases GIL while waiting.
+        Exceptions of parser are raised as is.
+        """
+        future = self._executor.submit(_parse_payload, parser, response.content, response.status_code,
+                                       dict(response.headers), response.encoding)
+        try:
+            return future.result(timeout=deadline.remaining() if deadline is not None else None)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise APIDeadlineExceededException()
+
+    def warm_up(self):
+        """
+        Starts all worker processes before first large payload
+        """
+        for future in [self._executor.submit(_noop) for _ in range(self.max_workers)]:
+            future.result()
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
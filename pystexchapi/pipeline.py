@@ -0,0 +1,150 @@
+"""
+Order entry pipeline for sending bursts of private calls concurrently
+"""
+
+import re
+import requests
+import threading
+
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Iterable, List
+
+from pystexchapi.exc import APIDataException
+from pystexchapi.request import STOCK_EXCHANGE_BASE_URL
+from pystexchapi.utils import shared_nonce_generator, Deadline
+
+
+__all__ = ('OrderPipeline',)
+
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_NONCE_RETRIES = 2
+NONCE_ERROR_RE = re.compile(r'nonce', re.IGNORECASE)
+
+
+class _Sequencer(object):
+    """
+    Releases tickets in order of their numbers: ticket passes `wait` only when all previous tickets were
+    released, either because they passed or because they were abandoned
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._issued = 0
+        self._released = 0  # all tickets below are released
+        self._done = set()  # released tickets above `_released`
+
+    def ticket(self) -> int:
+        with self._condition:
+            ticket = self._issued
+            self._issued += 1
+            return ticket
+
+    def wait(self, ticket: int, timeout: float=None) -> bool:
+        with self._condition:
+            return self._condition.wait_for(lambda: self._released >= ticket, timeout)
+
+    def release(self, ticket: int):
+        with self._condition:
+            self._done.add(ticket)
+            while self._released in self._done:
+                self._done.remove(self._released)
+                self._released += 1
+            self._condition.notify_all()
+
+
+class OrderPipeline(object):
+    """
+    Accepts trade and cancel intents, signs them in order of submission with strictly increasing nonces and
+    sends them concurrently through pooled transport of API object. Every intent gets its own future which
+    resolves to parsed `APIResponse` or raises exception of the call.
+
+    Signing happens in the submitting thread, so nonces follow submission order. Worker threads start sending
+    in the same order: intent is released to transport only after all previous intents were. Requests are
+    in flight concurrently over several connections, so exchange can still receive them out of order; intent
+    rejected because of nonce is signed again with new nonce and resent up to `nonce_retries` times.
+    """
+
+    def __init__(self, api, max_workers: int=DEFAULT_MAX_WORKERS, nonce_factory=None,
+                 nonce_retries: int=DEFAULT_NONCE_RETRIES):
+        super(OrderPipeline, self).__init__()
+        self.api = api
+        self.nonce_factory = nonce_factory or shared_nonce_generator
+        self.nonce_retries = nonce_retries
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='pystexchapi-orders')
+        self._sequencer = _Sequencer()
+        self._submit_lock = threading.Lock()
+
+    def warm_up(self, timeout=None):
+        """
+        Opens pooled connection to exchange before first burst of orders. `timeout` defaults to timeout of API.
+        """
+        request = requests.Request('HEAD', STOCK_EXCHANGE_BASE_URL.format(method='')).prepare()
+        try:
+            self.api.transport.send(request, verify=self.api.ssl_enabled,
+                                    timeout=timeout if timeout is not None else self.api.get_timeout())
+        except requests.exceptions.RequestException:
+            pass
+
+    def _wait_turn(self, ticket: int, deadline: Deadline=None):
+        try:
+            self._sequencer.wait(ticket, deadline.remaining() if deadline is not None else None)
+        finally:
+            self._sequencer.release(ticket)
+
+    def _send(self, parser, req, prepared_request: requests.PreparedRequest, timeout, ticket: int,
+              deadline: Deadline=None):
+        api_method = req.api_method
+
+        with self.api._profile_call(api_method):
+            self._wait_turn(ticket, deadline)
+
+            for attempt in range(self.nonce_retries + 1):
+                # intent could wait in queue
+                limited_timeout = deadline.limit(timeout) if deadline is not None else timeout
+                response = self.api._send(prepared_request, api_method, is_private=True, timeout=limited_timeout)
+                try:
+                    return self.api._parse(parser, response, deadline)
+                except APIDataException as e:
+                    if attempt == self.nonce_retries or not NONCE_ERROR_RE.search(str(e.msg or '')):
+                        raise
+                prepared_request = req.prepare()  # signed again with new nonce
+
+    def submit(self, method: str, deadline=None, **kwargs) -> Future:
+        _method = self.api.get_method(method)
+
+        if not _method.request.is_private:
+            raise ValueError('Only private methods can be pipelined. Currently: {}'.format(method))
+
+        req = _method.request(nonce_factory=self.nonce_factory, **self.api._add_credentials(_method, kwargs))
+        with self._submit_lock:
+            prepared_request = req.prepare()  # nonce is assigned while signing
+            ticket = self._sequencer.ticket()
+        return self._executor.submit(self._send, self.api.get_parser(_method), req, prepared_request,
+                                     self.api.get_timeout(method), ticket, Deadline.make(deadline))
+
+    def trade(self, _type: str, currency1: str, currency2: str, amount: float, rate: float) -> Future:
+        return self.submit('trade', _type=_type, currency1=currency1, currency2=currency2, amount=amount, rate=rate)
+
+    def cancel_order(self, order_id: int) -> Future:
+        return self.submit('cancel_order', order_id=order_id)
+
+    def cancel_orders(self, order_ids: Iterable[int]) -> List[Future]:
+        return [self.cancel_order(order_id) for order_id in order_ids]
+
+    def replace_orders(self, order_ids: Iterable[int], orders: Iterable[dict]) -> List[Future]:
+        """
+        Cancels ladder of orders and places new one in one burst. Cancels are signed first.
+        """
+        futures = self.cancel_orders(order_ids)
+        futures.extend(self.trade(**order) for order in orders)
+        return futures
+
+    def close(self, wait: bool=True):
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,267 @@
+"""
+Cache of account balances updated from results of own private calls
+"""
+
+import logging
+import re
+import threading
+import time
+
+from decimal import Decimal, InvalidOperation
+from typing import Callable
+
+from pystexchapi.request import DEFAULT_COUNT
+from pystexchapi.response import APIResponse, BaseAPIResponse
+from pystexchapi.utils import Deadline
+
+
+__all__ = ('Portfolio',)
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_RECONCILE_INTERVAL = 300.0
+ZERO = Decimal(0)
+FEE_RE = re.compile(r'^\s*(-?\d+(?:\.\d*)?)\s*([A-Za-z0-9]*)\s*$')  # e.g. '2NXT'
+TRANSACTION_SIGNS = {'DEPOSIT': 1, 'WITHDRAWAL': -1}
+
+
+def _to_decimal(value) -> Decimal:
+    if value is None or value == '':
+        return ZERO
+    try:
+        return Decimal(repr(value)) if isinstance(value, float) else Decimal(str(value))  # also FixedPoint
+    except InvalidOperation:
+        return ZERO
+
+
+def _parse_fee(value, currency: str) -> tuple:
+    """
+    Returns (amount, currency) of fee given as number or string with currency suffix, e.g. '1NXT'
+    """
+    match = FEE_RE.match(value) if isinstance(value, str) else None
+    if match is None:
+        return _to_decimal(value), currency
+    return Decimal(match.group(1)), match.group(2) or currency
+
+
+def _get_data(response) -> dict:
+    data = response.data if isinstance(response, BaseAPIResponse) else response
+    data = data.get('data') if isinstance(data, dict) else None
+    return data if isinstance(data, dict) else {}
+
+
+class Portfolio(object):
+    """
+    In-memory balances of account seeded from `get_account_info`. Free funds are replaced by funds returned
+    with results of own `trade` and `cancel_order` calls, and the amount which left free funds for new order
+    (or returned to them from cancelled one) is moved to (or from) held funds. Withdrawals are subtracted when
+    they are requested, deposits and withdrawals made elsewhere are applied from new records of
+    `transactions_history`. Full `get_account_info` is fetched again by `reconcile` (by `poll` every
+    `reconcile_interval` seconds), which also replaces held funds and reports drift of local balances.
+
+    Reads do not make requests except seeding on the first read. Network calls run outside the lock of
+    balances.
+    """
+
+    def __init__(self, api, reconcile_interval: float=DEFAULT_RECONCILE_INTERVAL, page_size: int=DEFAULT_COUNT,
+                 clock: Callable[[], float]=time.monotonic):
+        super(Portfolio, self).__init__()
+        self.api = api
+        self.reconcile_interval = reconcile_interval
+        self.page_size = page_size
+        self.clock = clock
+
+        self.funds = {}  # currency -> free amount
+        self.hold_funds = {}  # currency -> amount held by open orders and pending withdrawals
+        self.seeded = False
+        self.reconciled_at = None
+        self.drift = {}  # currency -> (local, remote) found by the last reconciliation
+
+        self._since = None  # timestamp of the latest seen transaction
+        self._server_time = None  # transactions up to this timestamp are included in funds of account info
+        self._seen = {}  # (kind, id) of applied transactions -> timestamp
+        self._lock = threading.RLock()
+        self._seeding_lock = threading.Lock()
+        self._stats = {'reconciliations': 0, 'history_polls': 0, 'applied_calls': 0, 'applied_transactions': 0}
+
+    ###################################################################
+    # Reads
+    ###################################################################
+
+    def _ensure_seeded(self, deadline: Deadline=None):
+        if not self.seeded:
+            with self._seeding_lock:  # concurrent first reads wait for one request
+                if not self.seeded:
+                    self.reconcile(deadline=deadline)
+
+    def available(self, currency: str) -> Decimal:
+        self._ensure_seeded()
+        with self._lock:
+            return self.funds.get(currency, ZERO)
+
+    def held(self, currency: str) -> Decimal:
+        self._ensure_seeded()
+        with self._lock:
+            return self.hold_funds.get(currency, ZERO)
+
+    def total(self, currency: str) -> Decimal:
+        self._ensure_seeded()
+        with self._lock:
+            return self.funds.get(currency, ZERO) + self.hold_funds.get(currency, ZERO)
+
+    def balances(self) -> dict:
+        """
+        Returns {currency: (available, held)} of currencies with non-zero balance
+        """
+        self._ensure_seeded()
+        with self._lock:
+            currencies = set(self.funds) | set(self.hold_funds)
+            return {c: (self.funds.get(c, ZERO), self.hold_funds.get(c, ZERO)) for c in sorted(currencies)
+                    if self.funds.get(c) or self.hold_funds.get(c)}
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, seeded=self.seeded, drifted=len(self.drift))
+
+    ###################################################################
+    # Updates
+    ###################################################################
+
+    def reconcile(self, deadline=None) -> dict:
+        """
+        Replaces local balances by `get_account_info` and returns drift as {currency: (local, remote)}.
+        Transactions older than server time of account info are not applied anymore.
+        """
+        data = _get_data(self.api.call('get_account_info', deadline=deadline))
+        funds = {c: _to_decimal(v) for c, v in (data.get('funds') or {}).items()}
+        hold_funds = {c: _to_decimal(v) for c, v in (data.get('hold_funds') or {}).items()}
+
+        with self._lock:
+            drift = {}
+            if self.seeded:
+                for currency in set(self.funds) | set(funds):
+                    local, remote = self.funds.get(currency, ZERO), funds.get(currency, ZERO)
+                    if local != remote:
+                        drift[currency] = (local, remote)
+                if drift:
+                    logger.warning('Balances drifted from account: %s', drift)
+
+            self.funds = funds
+            self.hold_funds = hold_funds
+            self.drift = drift
+            self.seeded = True
+            self.reconciled_at = self.clock()
+            self._stats['reconciliations'] += 1
+
+            self._server_time = self._since = int(data.get('server_time') or time.time())
+            self._seen = {key: date for key, date in self._seen.items() if date >= self._since}
+            return drift
+
+    def apply(self, method: str, response, **kwargs):
+        """
+        Applies result of own private call. `kwargs` are arguments of the call, they are used for
+        withdrawals, whose result does not contain funds.
+        """
+        data = _get_data(response)
+
+        with self._lock:
+            if method in ('trade', 'cancel_order'):
+                for currency, value in (data.get('funds') or {}).items():
+                    free = _to_decimal(value)
+                    moved = self.funds.get(currency, ZERO) - free  # positive when order took free funds
+                    if (moved > 0) if method == 'trade' else (moved < 0):
+                        self.hold_funds[currency] = max(self.hold_funds.get(currency, ZERO) + moved, ZERO)
+                    self.funds[currency] = free
+            elif method == 'withdraw':
+                currency = data.get('code') or kwargs.get('currency')
+                amount = _to_decimal(data.get('amount', kwargs.get('amount')))
+                fee, fee_currency = _parse_fee(data.get('withdrawal_fee'),
+                                               data.get('withdrawal_fee_currency') or currency)
+                self.funds[currency] = self.funds.get(currency, ZERO) - amount
+                self.funds[fee_currency] = self.funds.get(fee_currency, ZERO) - fee
+                if data.get('id') is not None:
+                    self._seen[('WITHDRAWAL', str(data['id']))] = float('inf')  # kept until it is seen in history
+            else:
+                return  # e.g. `deposit` returns address only, credited deposit is found in history
+            self._stats['applied_calls'] += 1
+
+    def trade(self, **kwargs) -> APIResponse:
+        response = self.api.call('trade', **kwargs)
+        self.apply('trade', response, **kwargs)
+        return response
+
+    def cancel_order(self, **kwargs) -> APIResponse:
+        response = self.api.call('cancel_order', **kwargs)
+        self.apply('cancel_order', response, **kwargs)
+        return response
+
+    def withdraw(self, **kwargs) -> APIResponse:
+        response = self.api.call('withdraw', **kwargs)
+        self.apply('withdraw', response, **kwargs)
+        return response
+
+    def deposit(self, **kwargs) -> APIResponse:
+        response = self.api.call('deposit', **kwargs)
+        self.apply('deposit', response, **kwargs)
+        return response
+
+    def _apply_transaction(self, kind: str, record: dict):
+        sign = TRANSACTION_SIGNS[kind]
+        currency = record.get('Currency')
+        self.funds[currency] = self.funds.get(currency, ZERO) + sign * _to_decimal(record.get('Amount'))
+
+        if kind == 'WITHDRAWAL':
+            fee, fee_currency = _parse_fee(record.get('Withdrawal_Fee'), currency)
+            self.funds[fee_currency] = self.funds.get(fee_currency, ZERO) - fee
+        self._stats['applied_transactions'] += 1
+
+    def poll_history(self, deadline=None) -> int:
+        """
+        Applies deposits and withdrawals which appeared in `transactions_history` since the latest seen one.
+        Withdrawals already applied from own `withdraw` calls are skipped. Returns number of applied records.
+
+        Pages are requested by offset from the same `since`, so records sharing one timestamp are not skipped.
+        `deadline` (seconds or `Deadline`) limits all pages together.
+        """
+        deadline = Deadline.make(deadline)
+        self._ensure_seeded(deadline)
+        applied, offset = 0, 0
+        with self._lock:
+            since = self._since
+
+        while True:
+            data = _get_data(self.api.call('transactions_history', deadline=deadline, order='ASC',
+                                           count=self.page_size, since=since, _from=offset or None))
+
+            with self._lock:
+                self._stats['history_polls'] += 1
+                received = 0
+
+                for kind in TRANSACTION_SIGNS:
+                    for transaction_id, record in (data.get(kind) or {}).items():
+                        received += 1
+                        date = int(record.get('Date') or 0)
+                        self._since = max(self._since, date)
+
+                        key = (kind, str(transaction_id))
+                        seen = key in self._seen
+                        self._seen[key] = date
+                        if not seen and date > self._server_time:
+                            self._apply_transaction(kind, record)
+                            applied += 1
+
+            if received < self.page_size:
+                return applied
+            offset += received
+
+    def poll(self, deadline=None) -> int:
+        """
+        Applies new transactions and reconciles balances when `reconcile_interval` has passed. Returns
+        number of applied transactions. Polling is expected from one thread, balances can be read from any.
+        """
+        deadline = Deadline.make(deadline)
+        if self.seeded and self.clock() - self.reconciled_at >= self.reconcile_interval:
+            self.reconcile(deadline=deadline)
+        return self.poll_history(deadline=deadline)
@@ -0,0 +1,257 @@
+"""
+Per-call phase timing of API calls with optional cProfile and tracemalloc sampling
+"""
+
+import cProfile
+import collections
+import pstats
+import random
+import sys
+import threading
+import time
+import tracemalloc
+
+from pystexchapi.utils import Dotdict
+
+
+__all__ = ('PHASE', 'SAMPLER', 'CallProfile', 'Profiler', 'phase', 'current_profile')
+
+
+PHASE = Dotdict(CONSTRUCT='construct', PREPARE='prepare', SIGN='sign', NETWORK='network', JSON='json',
+                CHECK='check_for_errors', COLUMNS='columns', PARSE_POOL='parse_pool', OTHER='other')
+SAMPLER = Dotdict(CPROFILE='cprofile', TRACEMALLOC='tracemalloc')
+
+DEFAULT_TOP_ALLOCATIONS = 10
+
+_local = threading.local()
+
+
+class _NullContext(object):
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+NULL_CONTEXT = _NullContext()
+
+
+class CallProfile(object):
+    """
+    Exclusive time of phases of one call in nanoseconds. Time of nested phase (e.g. signing inside
+    preparing) is not counted in the outer one.
+    """
+
+    __slots__ = ('method', 'phases', '_stack')
+
+    def __init__(self, method: str):
+        self.method = method
+        self.phases = {}
+        self._stack = []
+
+    def start(self, name: str):
+        self._stack.append([name, time.perf_counter_ns(), 0])
+
+    def stop(self):
+        name, started, nested = self._stack.pop()
+        duration = time.perf_counter_ns() - started
+        self.phases[name] = self.phases.get(name, 0) + duration - nested
+        if self._stack:
+            self._stack[-1][2] += duration
+
+
+class _Phase(object):
+
+    __slots__ = ('profile', 'name')
+
+    def __init__(self, profile: CallProfile, name: str):
+        self.profile = profile
+        self.name = name
+
+    def __enter__(self):
+        self.profile.start(self.name)
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.profile.stop()
+        return False
+
+
+def current_profile() -> CallProfile:
+    return getattr(_local, 'profile', None)
+
+
+def phase(name: str):
+    """
+    Context manager timing phase of profiled call running in current thread; does nothing otherwise
+    """
+    profile = getattr(_local, 'profile', None)
+    if profile is None:
+        return NULL_CONTEXT
+    return _Phase(profile, name)
+
+
+class _ProfiledCall(object):
+
+    def __init__(self, profiler: 'Profiler', method: str):
+        self.profiler = profiler
+        self.profile = CallProfile(method)
+        self.sampler = None
+        self.started = None
+
+    def __enter__(self):
+        _local.profile = self.profile
+        if self.profiler.sampler and random.random() < self.profiler.sample_rate:
+            self.sampler = self.profiler.start_sampling()
+        self.started = time.perf_counter_ns()
+        return self.profile
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        total = time.perf_counter_ns() - self.started
+        _local.profile = None
+        if self.sampler is not None:
+            self.profiler.stop_sampling(self.profile.method, self.sampler)
+        self.profiler.record(self.profile, total, failed=exc_type is not None)
+        return False
+
+
+class Profiler(object):
+    """
+    Aggregates phase timings of calls by API method: request construction, `prepare()`, signing, network,
+    JSON decoding and `check_for_errors`; the rest of call time is reported as 'other'. Fraction
+    `sample_rate` of calls is additionally run under cProfile or tracemalloc, as set by `sampler`.
+
+    Sends of hedged requests run in worker threads, so their time is reported as 'other'.
+    """
+
+    def __init__(self, sampler: str=None, sample_rate: float=0.01, top_allocations: int=DEFAULT_TOP_ALLOCATIONS):
+        super(Profiler, self).__init__()
+
+        if sampler is not None and sampler not in SAMPLER.values():
+            raise ValueError('sampler can be one of {}. Currently: {} {}'.format(tuple(SAMPLER.values()), sampler,
+                                                                                type(sampler)))
+        if not 0 <= sample_rate <= 1:
+            raise ValueError('sample_rate must be in range [0, 1]. Currently: {} {}'.format(sample_rate,
+                                                                                          type(sample_rate)))
+
+        self.sampler = sampler
+        self.sample_rate = sample_rate
+        self.top_allocations = top_allocations
+
+        self._lock = threading.Lock()
+        self._stats = {}  # method -> [calls, failed, total ns, {phase: ns}]
+        self._cprofile_stats = {}
+        self._allocations = {}
+        self._tracing = 0
+        self._started_tracing = False
+
+    def call(self, method: str):
+        """
+        Context manager profiling one call; nested calls (e.g. `call` inside `query`) are not profiled again
+        """
+        if getattr(_local, 'profile', None) is not None:
+            return NULL_CONTEXT
+        return _ProfiledCall(self, method)
+
+    def record(self, profile: CallProfile, total: int, failed: bool=False):
+        with self._lock:
+            stats = self._stats.get(profile.method)
+            if stats is None:
+                stats = self._stats[profile.method] = [0, 0, 0, collections.Counter()]
+            stats[0] += 1
+            stats[1] += failed
+            stats[2] += total
+            stats[3].update(profile.phases)
+            stats[3][PHASE.OTHER] += max(total - sum(profile.phases.values()), 0)
+
+    def start_sampling(self):
+        if self.sampler == SAMPLER.CPROFILE:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:  # another profiler is active
+                return None
+            return profile
+
+        with self._lock:
+            if self._tracing == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            self._tracing += 1
+        return tracemalloc.take_snapshot()
+
+    def stop_sampling(self, method: str, sample):
+        if self.sampler == SAMPLER.CPROFILE:
+            sample.disable()
+            with self._lock:
+                stats = self._cprofile_stats.get(method)
+                if stats is None:
+                    self._cprofile_stats[method] = pstats.Stats(sample)
+                else:
+                    stats.add(sample)
+            return
+
+        differences = tracemalloc.take_snapshot().compare_to(sample, 'lineno')
+        with self._lock:
+            self._tracing -= 1
+            if self._tracing == 0 and self._started_tracing:
+                tracemalloc.stop()
+                self._started_tracing = False
+
+            allocations = self._allocations.setdefault(method, collections.Counter())
+            for difference in differences[:self.top_allocations]:
+                allocations[str(difference.traceback)] += difference.size_diff
+
+    def get_stats(self, method: str) -> dict:
+        """
+        Returns number of calls, mean call time and breakdown of phases as
+        {phase: {'total_ms': ..., 'mean_us': ..., 'share': ...}}
+        """
+        with self._lock:
+            calls, failed, total, phases = self._stats.get(method, (0, 0, 0, {}))
+            phases = dict(phases)
+
+        return {
+            'calls': calls,
+            'failed': failed,
+            'mean_us': total / calls / 1e3 if calls else 0.0,
+            'phases': {
+                name: {
+                    'total_ms': ns / 1e6,
+                    'mean_us': ns / calls / 1e3,
+                    'share': ns / total if total else 0.0
+                }
+                for name, ns in sorted(phases.items(), key=lambda item: -item[1])
+            }
+        }
+
+    def summary(self) -> dict:
+        with self._lock:
+            methods = list(self._stats)
+        return {method: self.get_stats(method) for method in methods}
+
+    def get_cprofile_stats(self, method: str) -> pstats.Stats:
+        return self._cprofile_stats.get(method)
+
+    def get_allocations(self, method: str) -> list:
+        """
+        Returns [(source line, allocated bytes)] accumulated over sampled calls, largest first
+        """
+        with self._lock:
+            return self._allocations.get(method, collections.Counter()).most_common(self.top_allocations)
+
+    def dump(self, file=None):
+        file = file or sys.stdout
+        for method, stats in sorted(self.summary().items()):
+            print('{}: {} calls, {} failed, mean {:.1f}us'.format(method, stats['calls'], stats['failed'],
+                                                                 stats['mean_us']), file=file)
+            for name, phase_stats in stats['phases'].items():
+                print('    {:<18} {:>10.1f}us {:>6.1%}'.format(name, phase_stats['mean_us'], phase_stats['share']),
+                      file=file)
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._cprofile_stats.clear()
+            self._allocations.clear()
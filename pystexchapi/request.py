@@ -2,11 +2,14 @@
 Stocks Exchange API requests
 """
 
+from decimal import Decimal
 from requests import Request
 
 from pystexchapi import ORDER_STATUS
 from pystexchapi.auth import HmacAuth
-from pystexchapi.utils import set_not_none_dict_kwargs
+from pystexchapi.compression import ACCEPT_ENCODING
+from pystexchapi.fixed import FixedPoint
+from pystexchapi.schema import RequestMeta, Param, PairParam, OMIT
 
 
 __all__ = ('TickerRequest', 'PricesRequest', 'StockExchangeRequest', 'CurrenciesRequest', 'MarketsRequest',
@@ -18,15 +21,27 @@ __all__ = ('TickerRequest', 'PricesRequest', 'StockExchangeRequest', 'Currencies
 STOCK_EXCHANGE_BASE_URL = 'https://app.stocks.exchange/api2/{method}'
 
 
-class StockExchangeRequest(Request):
+def serialize_number(value):
+    """
+    Exact numbers (FixedPoint, Decimal) are sent as decimal strings to keep precision in JSON body
+    """
+    if isinstance(value, (FixedPoint, Decimal)):
+        return str(value)
+    return value
+
+
+class StockExchangeRequest(Request, metaclass=RequestMeta):
     api_method = None
     is_private = False
+    reuse_unchanged = False  # reuse previously parsed response if server returns the same payload
+    schema = None  # parameters compiled into constructor, see `pystexchapi.schema`
 
     def __init__(self, **kwargs):
         super(StockExchangeRequest, self).__init__()
         self.headers = {
             'Content-Type': 'application/json',
-            'User-Agent': 'pystexchapi'
+            'User-Agent': 'pystexchapi',
+            'Accept-Encoding': ACCEPT_ENCODING
         }
         self.url = STOCK_EXCHANGE_BASE_URL.format(method=self.api_method)
         self.method = 'GET'
@@ -47,10 +62,12 @@ class PricesRequest(StockExchangeRequest):
 
 class CurrenciesRequest(StockExchangeRequest):
     api_method = 'currencies'
+    reuse_unchanged = True
 
 
 class MarketsRequest(StockExchangeRequest):
     api_method = 'markets'
+    reuse_unchanged = True
 
 
 class MarketSummaryRequest(StockExchangeRequest):
@@ -63,10 +80,7 @@ class MarketSummaryRequest(StockExchangeRequest):
 
 class TradeHistoryRequest(StockExchangeRequest):
     api_method = 'trades'
-
-    def __init__(self, currency1: str, currency2: str, **kwargs):
-        super(TradeHistoryRequest, self).__init__(**kwargs)
-        self.params.update(pair='{}_{}'.format(currency1, currency2))
+    schema = (PairParam(),)
 
 
 class OrderbookRequest(TradeHistoryRequest):
@@ -76,22 +90,20 @@ class OrderbookRequest(TradeHistoryRequest):
 DEFAULT_ORDER = 'DESC'
 DEFAULT_COUNT = 50
 DEFAULT_INTERVAL = '1D'
+MAX_GRAFIC_COUNT = 100
 
 
 class GraficPublicRequest(StockExchangeRequest):
     api_method = 'grafic_public'
-
-    def __init__(self, currency1: str, currency2: str, order: str=DEFAULT_ORDER, count: int=DEFAULT_COUNT,
-                 interval: str=DEFAULT_INTERVAL, since: str=None, end: str=None, **kwargs):
-        super(GraficPublicRequest, self).__init__(**kwargs)
-        params = {
-            'pair': '{}_{}'.format(currency1, currency2),
-            'interval': interval,
-            'order': order,
-            'count': count
-        }
-        set_not_none_dict_kwargs(params, since=since, end=end)
-        self.params.update(params)
+    schema = (
+        PairParam(),
+        Param('order', default=DEFAULT_ORDER, annotation=str),
+        Param('count', default=DEFAULT_COUNT, annotation=int),
+        Param('interval', default=DEFAULT_INTERVAL, annotation=str),
+        Param('since', default=None, omit=OMIT.NONE, annotation=str),
+        Param('end', default=None, omit=OMIT.NONE, annotation=str)
+    )
+    body_order = ('pair', 'interval', 'order', 'count', 'since', 'end')
 
 
 ###################################################################
@@ -103,9 +115,9 @@ class StockExchangePrivateRequest(StockExchangeRequest):
 
     is_private = True
 
-    def __init__(self, api_key: str, api_secret: str, **kwargs):
+    def __init__(self, api_key: str, api_secret: str, nonce_factory=None, **kwargs):
         super(StockExchangePrivateRequest, self).__init__(**kwargs)
-        self.auth = HmacAuth(api_key=api_key, api_secret=api_secret)
+        self.auth = HmacAuth(api_key=api_key, api_secret=api_secret, nonce_factory=nonce_factory)
         self.url = STOCK_EXCHANGE_BASE_URL.format(method='')
         self.method = 'POST'
         self.json = {
@@ -123,164 +135,91 @@ DEFAULT_OWNER = 'OWN'
 
 class GetActiveOrdersRequest(StockExchangePrivateRequest):
     api_method = 'ActiveOrders'
-
-    def __init__(self, _from: str=None, from_id: str=None, end_id: str=None, since: str=None, end: str=None,
-                 pair: str=DEFAULT_TYPE, count: int=DEFAULT_COUNT, order: str=DEFAULT_ORDER, _type: str=DEFAULT_TYPE,
-                 owner: str=DEFAULT_OWNER, **kwargs):
-
-        super(GetActiveOrdersRequest, self).__init__(**kwargs)
-
-        if count and count > DEFAULT_COUNT:
-            raise ValueError('count cannot be greater than {}. Currently: {} {}'.format(DEFAULT_COUNT, count,
-                                                                                        type(count)))
-
-        request_data = {
-            'pair': pair,
-            'count': count,
-            'order': order,
-            'type': _type,
-            'owner': owner
-        }
-
-        optional_none_params = {
-            'from': _from,
-            'from_id': from_id,
-            'end_id': end_id,
-            'since': since,
-            'end': end
-        }
-        set_not_none_dict_kwargs(request_data, **optional_none_params)
-
-        self.json.update(request_data)
+    schema = (
+        Param('_from', default=None, omit=OMIT.NONE, annotation=str),
+        Param('from_id', default=None, omit=OMIT.NONE, annotation=str),
+        Param('end_id', default=None, omit=OMIT.NONE, annotation=str),
+        Param('since', default=None, omit=OMIT.NONE, annotation=str),
+        Param('end', default=None, omit=OMIT.NONE, annotation=str),
+        Param('pair', default=DEFAULT_TYPE, annotation=str),
+        Param('count', default=DEFAULT_COUNT, max_value=DEFAULT_COUNT, annotation=int),
+        Param('order', default=DEFAULT_ORDER, annotation=str),
+        Param('_type', default=DEFAULT_TYPE, annotation=str),
+        Param('owner', default=DEFAULT_OWNER, annotation=str)
+    )
 
 
 class TradeRequest(StockExchangePrivateRequest):
     api_method = 'Trade'
-    
-    def __init__(self, _type: str, currency1: str, currency2: str, amount: float, rate: float, **kwargs):
-        super(TradeRequest, self).__init__(**kwargs)
-
-        if amount and amount < 0:
-            raise ValueError('amount must be positive float number. Currently: {} {}'.format(amount, type(amount)))
-
-        if rate and rate < 0:
-            raise ValueError('rate must be positive float number. Currently: {} {}'.format(rate, type(rate)))
-
-        if _type and _type not in ('BUY', 'SELL'):
-            raise ValueError('The parameter type can be one of "BUY" or "SELL". Currently: {} {}'.format(_type,
-                             type(_type)))
-
-        self.json.update({
-            'pair': '{}_{}'.format(currency1, currency2),
-            'type': _type,
-            'amount': amount,
-            'rate': rate
-        })
+    schema = (
+        Param('_type', choices=('BUY', 'SELL'), annotation=str),
+        PairParam(),
+        Param('amount', min_value=0, serialize=serialize_number, annotation=float),  # float or FixedPoint
+        Param('rate', min_value=0, serialize=serialize_number, annotation=float)
+    )
 
 
 class CancelOrderRequest(StockExchangePrivateRequest):
     api_method = 'CancelOrder'
-
-    def __init__(self, order_id: int, **kwargs):
-        super(CancelOrderRequest, self).__init__(**kwargs)
-        self.json.update(order_id=order_id)
+    schema = (Param('order_id', annotation=int),)
 
 
 class PrivateTradeHistoryRequest(StockExchangePrivateRequest):
     api_method = 'TradeHistory'
-
-    def __init__(self, _from: int=None, from_id: str=None, end_id: str=None, since: str=None, end: str=None,
-                 pair: str='ALL', count: int=DEFAULT_COUNT, order: str=DEFAULT_ORDER, owner: str=DEFAULT_OWNER,
-                 status: int=3, **kwargs):
-        super(PrivateTradeHistoryRequest, self).__init__(**kwargs)
-        self.json.update({
-            'pair': pair,
-            'from': _from,
-            'count': count,
-            'from_id': from_id,
-            'end_id': end_id,
-            'order': order,
-            'since': since,
-            'end': end,
-            'status': status,
-            'owner': owner
-        })
+    schema = (
+        Param('_from', default=None, annotation=int),
+        Param('from_id', default=None, annotation=str),
+        Param('end_id', default=None, annotation=str),
+        Param('since', default=None, annotation=str),
+        Param('end', default=None, annotation=str),
+        Param('pair', default=DEFAULT_TYPE, annotation=str),
+        Param('count', default=DEFAULT_COUNT, annotation=int),
+        Param('order', default=DEFAULT_ORDER, annotation=str),
+        Param('owner', default=DEFAULT_OWNER, annotation=str),
+        Param('status', default=ORDER_STATUS.FINISHED, annotation=int)
+    )
 
 
 class TransactionHistoryRequest(StockExchangePrivateRequest):
     api_method = 'TransHistory'
-    
-    def __init__(self, currency: str=DEFAULT_TYPE, _from: int=None, count: int=DEFAULT_COUNT, from_id: int=None,
-                 end_id: int=None, order: str=DEFAULT_ORDER, since: str=None, end: str=None,
-                 status: int=ORDER_STATUS.FINISHED, **kwargs):
-        super(TransactionHistoryRequest, self).__init__(**kwargs)
-
-        # FIXME: similar to StockExchangeGetActiveOrdersRequest
-
-        if count and count > DEFAULT_COUNT:
-            raise ValueError('count cannot be greater than {}. Currently: {} {}'.format(DEFAULT_COUNT, count,
-                                                                                        type(count)))
-
-        request_data = {
-            'currency': currency,
-            'count': count,
-            'order': order,
-            'status': status
-        }
-        optional_none_params = {
-            'from': _from,
-            'from_id': from_id,
-            'end_id': end_id,
-            'since': since,
-            'end': end
-        }
-        set_not_none_dict_kwargs(request_data, **optional_none_params)
-        self.json.update(request_data)
+    schema = (
+        Param('currency', default=DEFAULT_TYPE, annotation=str),
+        Param('_from', default=None, omit=OMIT.NONE, annotation=int),
+        Param('count', default=DEFAULT_COUNT, max_value=DEFAULT_COUNT, annotation=int),
+        Param('from_id', default=None, omit=OMIT.NONE, annotation=int),
+        Param('end_id', default=None, omit=OMIT.NONE, annotation=int),
+        Param('order', default=DEFAULT_ORDER, annotation=str),
+        Param('since', default=None, omit=OMIT.NONE, annotation=str),
+        Param('end', default=None, omit=OMIT.NONE, annotation=str),
+        Param('status', default=ORDER_STATUS.FINISHED, annotation=int)
+    )
 
 
 class GraficPrivateRequest(StockExchangePrivateRequest):
     api_method = 'Grafic'
-
-    def __init__(self, pair: str=DEFAULT_TYPE, order: str=DEFAULT_ORDER, count: int=DEFAULT_COUNT,
-                 interval: str=DEFAULT_INTERVAL, page: int=1, since: str=None, end: str=None, **kwargs):
-        super(GraficPrivateRequest, self).__init__(**kwargs)
-
-        # FIXME: similiar to GraficPublicRequest
-
-        if count and count > 100:
-            raise ValueError('count cannot be greater than {}. Currently: {} {}'.format(100, count,
-                                                                                        type(count)))
-
-        request_data = {
-            'pair': pair,
-            'order': order,
-            'count': count,
-            'interval': interval,
-            'page': page
-        }
-        set_not_none_dict_kwargs(request_data, since=since, end=end)
-
-        self.json.update(request_data)
+    schema = (
+        Param('pair', default=DEFAULT_TYPE, annotation=str),
+        Param('order', default=DEFAULT_ORDER, annotation=str),
+        Param('count', default=DEFAULT_COUNT, max_value=MAX_GRAFIC_COUNT, annotation=int),
+        Param('interval', default=DEFAULT_INTERVAL, annotation=str),
+        Param('page', default=1, annotation=int),
+        Param('since', default=None, omit=OMIT.NONE, annotation=str),
+        Param('end', default=None, omit=OMIT.NONE, annotation=str)
+    )
 
 
 class DepositRequest(StockExchangePrivateRequest):
     api_method = 'Deposit'
-
-    def __init__(self, currency: str, **kwargs):
-        super(DepositRequest, self).__init__(**kwargs)
-        self.json.update(currency=currency)
+    schema = (Param('currency', annotation=str),)
 
 
 class WithdrawRequest(StockExchangePrivateRequest):
     api_method = 'Withdraw'
-    
-    def __init__(self, currency: str, address: str, amount: float, **kwargs):
-        super(WithdrawRequest, self).__init__(**kwargs)
-        self.json.update({
-            'currency': currency,
-            'address': address,
-            'amount': amount
-        })
+    schema = (
+        Param('currency', annotation=str),
+        Param('address', annotation=str),
+        Param('amount', serialize=serialize_number, annotation=float)  # float or FixedPoint
+    )
 
 
 class GenerateWalletsRequest(DepositRequest):
@@ -289,39 +228,26 @@ class GenerateWalletsRequest(DepositRequest):
 
 class TicketRequest(StockExchangePrivateRequest):
     api_method = 'Ticket'
-
-    def __init__(self, category: int, subject: str, message: str, currency_name=None, **kwargs):
-        super(TicketRequest, self).__init__(**kwargs)
-        request_data = {
-            'category': category,
-            'subject': subject,
-            'message': message
-        }
-
-        if currency_name:
-            request_data['currency_name'] = currency_name
-
-        self.json.update(request_data)
+    schema = (
+        Param('category', annotation=int),
+        Param('subject', annotation=str),
+        Param('message', annotation=str),
+        Param('currency_name', default=None, omit=OMIT.EMPTY)
+    )
 
 
 class GetTicketsRequest(StockExchangePrivateRequest):
     api_method = 'GetTickets'
-
-    def __init__(self, ticket_id: int, category: int, status: int, **kwargs):
-        super(GetTicketsRequest, self).__init__(**kwargs)
-        self.json.update({
-            'ticket_id': ticket_id,
-            'category': category,
-            'status': status
-        })
+    schema = (
+        Param('ticket_id', annotation=int),
+        Param('category', annotation=int),
+        Param('status', annotation=int)
+    )
 
 
 class ReplyTicketRequest(StockExchangePrivateRequest):
     api_method = 'ReplyTicket'
-
-    def __init__(self, ticket_id: int, message: str, **kwargs):
-        super(ReplyTicketRequest, self).__init__(**kwargs)
-        self.json.update({
-            'ticket_id': ticket_id,
-            'message': message
-        })
+    schema = (
+        Param('ticket_id', annotation=int),
+        Param('message', annotation=str)
+    )
@@ -2,37 +2,248 @@
 Stocks Exchange API response parsers
 """
 
+import json
+import re
 import requests
 
 from pystexchapi.exc import APIResponseParsingException, APIDataException
+from pystexchapi.profiling import phase, PHASE
+from pystexchapi.utils import is_numeric, convert_column, estimate_nbytes, DEFAULT_SCALE
 
 
-__all__ = ('APIResponse', 'StockExchangeResponseParser')
+__all__ = ('BaseAPIResponse', 'APIResponse', 'LazyAPIResponse', 'StockExchangeResponseParser',
+           'LazyResponseParser', 'ColumnarResponseParser', 'FloatColumnsResponseParser',
+           'FixedPointColumnsResponseParser', 'DecimalColumnsResponseParser', 'COLUMNAR_PARSERS')
 
 
-class APIResponse(object):
+class BaseAPIResponse(object):
+    """
+    Attributes shared by eager and lazy responses. `nbytes` is size of payload.
+    """
 
-    def __init__(self, data, exc=None):
-        self.data = data
+    __slots__ = ('exc', 'columns', 'nbytes')
+
+    def __init__(self, exc=None, columns=None, nbytes: int=0):
         self.exc = exc
+        self.columns = columns
+        self.nbytes = nbytes
+
+    def detached(self) -> 'BaseAPIResponse':
+        """
+        Returns response which can be kept in cache and given to other callers
+        """
+        return self
+
+    def stored_nbytes(self) -> int:
+        """
+        Memory held by response kept in cache
+        """
+        return self.nbytes
+
+    def column(self, field: str, table: str=None):
+        """
+        Returns converted numeric column. `table` is name of rows list inside result (e.g. 'buy' or 'sell'
+        for orderbook), it is not required for responses with one list of rows (ticker, trades).
+        """
+        if self.columns is None:
+            raise ValueError('Response has no columns, use one of columnar parsers')
+        return self.columns[table][field]
+
+
+class APIResponse(BaseAPIResponse):
+    """
+    Response with decoded data. Callers can set their own attributes on it.
+    """
+
+    __slots__ = ('data', '__dict__')
+
+    def __init__(self, data, exc=None, columns=None, nbytes: int=0):
+        super(APIResponse, self).__init__(exc=exc, columns=columns, nbytes=nbytes)
+        self.data = data
+
+    def stored_nbytes(self) -> int:
+        """
+        Decoded data is several times larger than payload, so its size is estimated
+        """
+        return estimate_nbytes(self.data) + estimate_nbytes(self.columns)
+
+
+_NOT_DECODED = object()
+
+
+class LazyAPIResponse(BaseAPIResponse):
+    """
+    Response which keeps raw payload and decodes it on first access to `data`. Decoded data can be
+    dropped with `release`, e.g. when response stays in cache.
+    """
+
+    __slots__ = ('_raw', '_data')
+
+    def __init__(self, raw: bytes, exc=None):
+        super(LazyAPIResponse, self).__init__(exc=exc, nbytes=len(raw))
+        self._raw = raw
+        self._data = _NOT_DECODED
+
+    @property
+    def data(self):
+        data = self._data
+        if data is _NOT_DECODED:
+            try:
+                data = self._data = json.loads(self._raw)
+            except (ValueError, TypeError) as e:
+                raise APIResponseParsingException(exc=e)
+        return data
+
+    @data.setter
+    def data(self, value):
+        self._data = value
+
+    @property
+    def decoded(self) -> bool:
+        return self._data is not _NOT_DECODED
+
+    def release(self):
+        self._data = _NOT_DECODED
+
+    def detached(self) -> 'LazyAPIResponse':
+        """
+        Returns not decoded response sharing raw payload, so decoded data stays only with callers
+        """
+        return LazyAPIResponse(self._raw, exc=self.exc)
 
 
 class StockExchangeResponseParser(object):
 
+    offload = True  # parsing of large payloads can be moved to `ParsePool`
+
     @classmethod
     def parse(cls, response: requests.Response) -> APIResponse:
         """
         Base parser for stocks exchange responses
         """
         try:
-            data = response.json()
+            with phase(PHASE.JSON):
+                data = response.json()
         except (ValueError, TypeError) as e:
             raise APIResponseParsingException(exc=e, response=response)
         else:
-            cls.check_for_errors(data)
-            return APIResponse(data)
+            with phase(PHASE.CHECK):
+                cls.check_for_errors(data)
+            return APIResponse(data, nbytes=len(response.content))
 
     @staticmethod
     def check_for_errors(data):
         if isinstance(data, dict) and not int(data.get('success')):
             raise APIDataException(msg=data.get('error'))
+
+
+SUCCESS_PREFIX_RE = re.compile(rb'\s*\{\s*"success"\s*:\s*"?(\d+)')
+
+
+class LazyResponseParser(StockExchangeResponseParser):
+    """
+    Returns `LazyAPIResponse` without decoding payload. Payload is decoded during parsing only when it can
+    be an error: dict which does not start with non-zero `success` flag.
+    """
+
+    offload = False
+
+    @classmethod
+    def parse(cls, response: requests.Response) -> APIResponse:
+        raw = response.content
+        if raw[:1] == b'[':
+            return LazyAPIResponse(raw)
+
+        match = SUCCESS_PREFIX_RE.match(raw)
+        if match is not None and int(match.group(1)):
+            return LazyAPIResponse(raw)
+
+        try:
+            data = json.loads(raw)
+        except (ValueError, TypeError) as e:
+            raise APIResponseParsingException(exc=e, response=response)
+        cls.check_for_errors(data)
+
+        lazy_response = LazyAPIResponse(raw)
+        lazy_response.data = data
+        return lazy_response
+
+
+class ColumnarResponseParser(StockExchangeResponseParser):
+    """
+    Parser which additionally converts numeric fields of row lists (ticker, prices, trades, orderbook sides,
+    grafic candles) into columns at once. Columns are available in `APIResponse.columns` as
+    {table: {field: column}}, where table is None for top-level list of rows.
+    """
+
+    numeric_kind = 'float'
+    scale = DEFAULT_SCALE
+    field_scales = {}  # scales of fixed-point fields which differ from `scale`
+
+    @classmethod
+    def parse(cls, response: requests.Response) -> APIResponse:
+        api_response = super(ColumnarResponseParser, cls).parse(response)
+        with phase(PHASE.COLUMNS):
+            api_response.columns = cls.make_columns(api_response.data)
+        return api_response
+
+    @staticmethod
+    def _is_rows(value) -> bool:
+        return isinstance(value, list) and bool(value) and isinstance(value[0], dict)
+
+    @classmethod
+    def get_tables(cls, data) -> dict:
+        if isinstance(data, list):
+            return {None: data} if cls._is_rows(data) else {}
+
+        result = data.get('result', data.get('data')) if isinstance(data, dict) else None
+        if cls._is_rows(result):
+            return {None: result}
+        if isinstance(result, dict):
+            return {k: v for k, v in result.items() if cls._is_rows(v)}
+        return {}
+
+    @classmethod
+    def make_column(cls, field: str, values: list):
+        """
+        In fixed-point columns only prices and amounts (numeric strings and floats) are scaled, fields given
+        as JSON integers (ids, timestamps) are kept unscaled
+        """
+        scale = cls.field_scales.get(field, cls.scale)
+        if cls.numeric_kind == 'fixed' and all(type(v) is int for v in values if v is not None):
+            scale = 0
+        return convert_column(values, kind=cls.numeric_kind, scale=scale)
+
+    @classmethod
+    def make_columns(cls, data) -> dict:
+        """
+        Fields are taken from all rows, values missing in some rows are gaps of column (see `convert_column`)
+        """
+        columns = {}
+        for table, rows in cls.get_tables(data).items():
+            columns[table] = {}
+            for field in dict.fromkeys(k for row in rows for k in row):
+                values = [row.get(field) for row in rows]
+                first = next((v for v in values if v is not None), None)
+                if first is not None and is_numeric(first):
+                    columns[table][field] = cls.make_column(field, values)
+        return columns
+
+
+class FloatColumnsResponseParser(ColumnarResponseParser):
+    numeric_kind = 'float'
+
+
+class FixedPointColumnsResponseParser(ColumnarResponseParser):
+    numeric_kind = 'fixed'
+
+
+class DecimalColumnsResponseParser(ColumnarResponseParser):
+    numeric_kind = 'decimal'
+
+
+COLUMNAR_PARSERS = {
+    'float': FloatColumnsResponseParser,
+    'fixed': FixedPointColumnsResponseParser,
+    'decimal': DecimalColumnsResponseParser
+}
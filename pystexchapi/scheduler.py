@@ -0,0 +1,254 @@
+"""
+Adaptive polling of public endpoints driven by observed change rates
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+
+from typing import Callable, List
+
+
+__all__ = ('PollJob', 'AdaptiveScheduler')
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_RATE_BUDGET = 5.0  # requests per second for all jobs
+DEFAULT_MIN_INTERVAL = 0.5
+DEFAULT_MAX_INTERVAL = 60.0
+DEFAULT_SMOOTHING = 0.3
+MIN_CHANGE_RATE = 0.001  # keeps quiet jobs polled at least rarely
+
+PAIR_METHODS = ('orderbook', 'trade_history', 'market_summary')
+ROW_METHODS = {'ticker': 'market_name', 'prices': 'market_name'}  # rows of all pairs, one call serves every pair
+
+
+class PollJob(object):
+    """
+    Periodic call of one public method (for one pair) with estimate of how often its data changes. Job of pair
+    of method in ROW_METHODS watches only row of its pair in data of all pairs.
+    """
+
+    def __init__(self, method: str, pair: str=None, initial_rate: float=None):
+        self.method = method
+        self.pair = pair
+        self.change_rate = max(initial_rate, MIN_CHANGE_RATE) if initial_rate is not None else MIN_CHANGE_RATE
+        self.interval = None
+        self.next_run = 0.0
+        self.last_run = None
+        self.polls = 0
+        self.changes = 0
+        self.digest = None
+
+    @property
+    def key(self) -> tuple:
+        return self.method, self.pair
+
+    @property
+    def call_key(self) -> tuple:
+        """
+        Jobs with the same key are served by one call
+        """
+        return (self.method, None) if self.method in ROW_METHODS else self.key
+
+    @property
+    def kwargs(self) -> dict:
+        if self.pair is None or self.method in ROW_METHODS:
+            return {}
+        currency1, _, currency2 = self.pair.partition('_')
+        return {'currency1': currency1, 'currency2': currency2}
+
+    def select(self, data):
+        """
+        Returns part of call data watched by job
+        """
+        if self.pair is None or self.method not in ROW_METHODS:
+            return data
+        key = ROW_METHODS[self.method]
+        return next((row for row in data if row.get(key) == self.pair), None)
+
+    def observe(self, data, now: float, smoothing: float) -> bool:
+        """
+        Updates change rate (changes per second, exponentially smoothed) with result of poll
+        """
+        digest = hashlib.blake2b(json.dumps(data, sort_keys=True).encode('utf-8'), digest_size=16).digest()
+        changed = self.digest is not None and digest != self.digest
+        self.digest = digest
+
+        if self.last_run is not None and now > self.last_run:
+            observed_rate = (1.0 if changed else 0.0) / (now - self.last_run)
+            self.change_rate = max(smoothing * observed_rate + (1 - smoothing) * self.change_rate, MIN_CHANGE_RATE)
+
+        self.last_run = now
+        self.polls += 1
+        self.changes += changed
+        return changed
+
+    def get_stats(self) -> dict:
+        return {
+            'method': self.method,
+            'pair': self.pair,
+            'change_rate': self.change_rate,
+            'interval': self.interval,
+            'next_run': self.next_run,
+            'polls': self.polls,
+            'changes': self.changes
+        }
+
+
+class AdaptiveScheduler(object):
+    """
+    Polls registered jobs sharing global budget of `rate_budget` requests per second. Budget is allocated
+    proportionally to observed change rates, so busy pairs are polled faster and quiet ones slower, within
+    [`min_interval`, `max_interval`]. `on_change` callback gets job and new data when data changed.
+
+    Jobs of pairs of `ticker` or `prices` share one call, which counts once against the budget, and are polled
+    together. Every call is made at least once per `max_interval`, so at most `rate_budget * max_interval`
+    distinct calls can be registered, adding more raises `ValueError`.
+    """
+
+    def __init__(self, api, rate_budget: float=DEFAULT_RATE_BUDGET, min_interval: float=DEFAULT_MIN_INTERVAL,
+                 max_interval: float=DEFAULT_MAX_INTERVAL, smoothing: float=DEFAULT_SMOOTHING,
+                 on_change: Callable=None, clock: Callable[[], float]=time.monotonic):
+        super(AdaptiveScheduler, self).__init__()
+
+        if rate_budget <= 0:
+            raise ValueError('rate_budget must be positive. Currently: {} {}'.format(rate_budget, type(rate_budget)))
+        if not 0 < smoothing <= 1:
+            raise ValueError('smoothing must be in range (0, 1]. Currently: {} {}'.format(smoothing, type(smoothing)))
+        if not 0 < min_interval <= max_interval:
+            raise ValueError('min_interval must be positive and not greater than max_interval. Currently: {} {}'.format(
+                min_interval, max_interval))
+
+        self.api = api
+        self.rate_budget = rate_budget
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.smoothing = smoothing
+        self.on_change = on_change
+        self.clock = clock
+
+        self.jobs = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add(self, method: str, pair: str=None, initial_rate: float=None) -> PollJob:
+        if method in PAIR_METHODS and not pair:
+            raise ValueError('Method {} requires pair'.format(method))
+        if pair and method not in PAIR_METHODS and method not in ROW_METHODS:
+            raise ValueError('Method {} does not take pair'.format(method))
+
+        with self._lock:
+            job = self.jobs.get((method, pair))
+            if job is None:
+                job = PollJob(method, pair, initial_rate)
+                calls = len({j.call_key for j in self.jobs.values()} | {job.call_key})
+                if calls / self.max_interval > self.rate_budget:
+                    raise ValueError('Cannot poll {} calls within rate_budget {} and max_interval {}'.format(
+                        calls, self.rate_budget, self.max_interval))
+                self.jobs[(method, pair)] = job
+                job.next_run = self.clock()
+            self._allocate()
+        return job
+
+    def remove(self, method: str, pair: str=None):
+        with self._lock:
+            self.jobs.pop((method, pair), None)
+            self._allocate()
+
+    def _allocate(self):
+        """
+        Splits budget between calls by water-filling: calls whose proportional share is out of interval bounds
+        get bound interval, the rest of budget is split between other calls again until all shares fit. Jobs
+        sharing call get its interval, change rate of call is the sum of their rates.
+        """
+        shared = {}
+        for job in self.jobs.values():
+            shared.setdefault(job.call_key, []).append(job)
+        calls, budget = [(sum(job.change_rate for job in jobs), jobs) for jobs in shared.values()], self.rate_budget
+
+        while calls:
+            total_rate = sum(rate for rate, _ in calls)
+            slow = [call for call in calls if budget * call[0] / total_rate * self.max_interval < 1]
+            fast = [call for call in calls if budget * call[0] / total_rate * self.min_interval > 1]
+            bounded, interval = (slow, self.max_interval) if slow else (fast, self.min_interval)
+
+            if not bounded:
+                for rate, jobs in calls:
+                    for job in jobs:
+                        job.interval = total_rate / (budget * rate)
+                return
+
+            for rate, jobs in bounded:
+                for job in jobs:
+                    job.interval = interval
+                budget -= 1.0 / interval
+            calls = [call for call in calls if call not in bounded]
+
+    def run_pending(self) -> List[PollJob]:
+        """
+        Polls jobs which are due together with jobs sharing their calls and reallocates budget. Returns polled
+        jobs.
+        """
+        now = self.clock()
+        with self._lock:
+            due = sorted((job for job in self.jobs.values() if job.next_run <= now), key=lambda j: j.next_run)
+            call_keys = list(dict.fromkeys(job.call_key for job in due))
+            calls = [[job for job in self.jobs.values() if job.call_key == key] for key in call_keys]
+
+        polled = []
+        for jobs in calls:
+            for job in jobs:
+                job.next_run = now + job.interval  # failed call is not retried before its interval
+            data = self.api.call(jobs[0].method, **jobs[0].kwargs).data
+            polled_at = self.clock()
+            changed = [job for job in jobs if job.observe(job.select(data), polled_at, self.smoothing)]
+
+            with self._lock:
+                self._allocate()
+                for job in jobs:
+                    job.next_run = polled_at + job.interval
+
+            if self.on_change is not None:
+                for job in changed:
+                    self.on_change(job, job.select(data))
+            polled.extend(jobs)
+
+        return polled
+
+    def next_due(self) -> float:
+        with self._lock:
+            return min((job.next_run for job in self.jobs.values()), default=None)
+
+    def decisions(self) -> List[dict]:
+        """
+        Current change rates and polling intervals of all jobs
+        """
+        with self._lock:
+            return [job.get_stats() for job in self.jobs.values()]
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_pending()
+            except Exception:
+                logger.exception('Polling failed')  # failed job is retried on next run
+            next_due = self.next_due()
+            delay = self.max_interval if next_due is None else max(next_due - self.clock(), 0.0)
+            self._stop.wait(min(delay, self.max_interval))
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='pystexchapi-scheduler', daemon=True)
+            self._thread.start()
+
+    def stop(self, wait: bool=True):
+        self._stop.set()
+        if self._thread is not None and wait:
+            self._thread.join()
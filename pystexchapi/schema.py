@@ -0,0 +1,155 @@
+"""
+Declarative parameters of requests compiled into constructors
+"""
+
+from typing import Callable, Iterable
+
+
+__all__ = ('REQUIRED', 'OMIT', 'Param', 'PairParam', 'RequestMeta', 'compile_init')
+
+
+REQUIRED = object()
+OMIT = type('OMIT', (), {'NEVER': None, 'NONE': 'none', 'EMPTY': 'empty'})
+
+
+class Param(object):
+    """
+    Parameter of request: argument `name` of constructor sent as `key` (defaults to `name` without leading
+    underscore). Checks are skipped for empty values, as empty values are sent as is.
+
+    `omit`: OMIT.NONE leaves out value None, OMIT.EMPTY leaves out any empty value.
+    `serialize`: callable applied to value before it is sent.
+    `annotation`: type of argument set in annotations of constructor.
+    """
+
+    def __init__(self, name: str, key: str=None, default=REQUIRED, max_value=None, min_value=None,
+                 choices: Iterable=None, omit: str=OMIT.NEVER, serialize: Callable=None, annotation=None):
+        self.name = name
+        self.key = key or name.lstrip('_')
+        self.default = default
+        self.max_value = max_value
+        self.min_value = min_value
+        self.choices = tuple(choices) if choices is not None else None
+        self.omit = omit
+        self.serialize = serialize
+        self.annotation = annotation
+
+    @property
+    def arguments(self) -> tuple:
+        return (self.name,)
+
+    @property
+    def annotations(self) -> dict:
+        return {self.name: self.annotation} if self.annotation is not None else {}
+
+    def get_value_expression(self, namespace: dict) -> str:
+        if self.serialize is None:
+            return self.name
+        namespace['_serialize_' + self.name] = self.serialize
+        return '_serialize_{0}({0})'.format(self.name)
+
+    def get_checks(self, namespace: dict) -> list:
+        lines = []
+        if self.max_value is not None:
+            namespace['_max_' + self.name] = self.max_value
+            namespace['_max_msg_' + self.name] = '{} cannot be greater than {}. Currently: {{}} {{}}'.format(
+                self.key, self.max_value)
+            lines.append('if {0} and {0} > _max_{0}:'.format(self.name))
+            lines.append('    raise ValueError(_max_msg_{0}.format({0}, type({0})))'.format(self.name))
+        if self.min_value is not None:
+            namespace['_min_' + self.name] = self.min_value
+            namespace['_min_msg_' + self.name] = '{} cannot be less than {}. Currently: {{}} {{}}'.format(
+                self.key, self.min_value)
+            lines.append('if {0} and {0} < _min_{0}:'.format(self.name))
+            lines.append('    raise ValueError(_min_msg_{0}.format({0}, type({0})))'.format(self.name))
+        if self.choices is not None:
+            namespace['_choices_' + self.name] = frozenset(self.choices)
+            namespace['_choices_msg_' + self.name] = 'The parameter {} can be one of {}. Currently: {{}} {{}}'.format(
+                self.key, ' or '.join('"{}"'.format(c) for c in self.choices))
+            lines.append('if {0} and {0} not in _choices_{0}:'.format(self.name))
+            lines.append('    raise ValueError(_choices_msg_{0}.format({0}, type({0})))'.format(self.name))
+        return lines
+
+
+class PairParam(Param):
+    """
+    Pair passed to constructor as `currency1` and `currency2` and sent as 'ETH_BTC'
+    """
+
+    def __init__(self, key: str='pair'):
+        super(PairParam, self).__init__('pair', key=key)
+
+    @property
+    def arguments(self) -> tuple:
+        return 'currency1', 'currency2'
+
+    @property
+    def annotations(self) -> dict:
+        return {'currency1': str, 'currency2': str}
+
+    def get_value_expression(self, namespace: dict) -> str:
+        return "currency1 + '_' + currency2"
+
+
+def compile_init(cls, schema: tuple, body_attr: str, body_order: tuple=None) -> Callable:
+    """
+    Generates constructor with arguments of schema, which validates them and fills `body_attr` dict
+    (`params` or `json`) in one pass. Remaining keyword arguments are passed to constructor of base class.
+    Keys are sent in order of schema unless `body_order` is given.
+    """
+    namespace = {'_cls': cls}
+    arguments, lines, items, optional = [], [], [], []
+    annotations = {}
+
+    body_schema = schema if body_order is None else sorted(schema, key=lambda p: body_order.index(p.key))
+
+    for param in schema:
+        for argument in param.arguments:
+            if param.default is REQUIRED:
+                arguments.append(argument)
+            else:
+                namespace['_default_' + argument] = param.default
+                arguments.append('{0}=_default_{0}'.format(argument))
+        lines.extend(param.get_checks(namespace))
+        annotations.update(param.annotations)
+
+    for param in body_schema:
+        value = param.get_value_expression(namespace)
+
+        if param.omit == OMIT.NONE:
+            optional.append('if {} is not None:'.format(param.name))
+        elif param.omit == OMIT.EMPTY:
+            optional.append('if {}:'.format(param.name))
+        else:
+            items.append('{!r}: {}'.format(param.key, value))
+            continue
+        optional.append('    body[{!r}] = {}'.format(param.key, value))
+
+    body = ['super(_cls, self).__init__(**kwargs)'] + lines
+    body.append('body = self.{}'.format(body_attr))
+    if items:
+        body.append('body.update({{{}}})'.format(', '.join(items)))
+    body.extend(optional)
+
+    source = 'def __init__(self, {}**kwargs):\n{}\n'.format(
+        ''.join(a + ', ' for a in arguments), '\n'.join('    ' + line for line in body))
+    exec(source, namespace)
+
+    __init__ = namespace['__init__']
+    __init__.__qualname__ = '{}.__init__'.format(cls.__qualname__)
+    __init__.__module__ = cls.__module__
+    __init__.__annotations__ = annotations
+    return __init__
+
+
+class RequestMeta(type):
+    """
+    Compiles `schema` declared in body of request class into its constructor when class is created
+    """
+
+    def __new__(mcs, name, bases, attrs):
+        cls = super(RequestMeta, mcs).__new__(mcs, name, bases, attrs)
+        if attrs.get('schema') is not None and '__init__' not in attrs:
+            cls.__init__ = compile_init(cls, attrs['schema'], 'json' if cls.is_private else 'params',
+                                        attrs.get('body_order'))
+        return cls
@@ -0,0 +1,201 @@
+"""
+Incremental tracking of own orders
+"""
+
+from typing import Callable, Iterator, List
+
+from pystexchapi import ORDER_STATUS
+from pystexchapi.request import DEFAULT_COUNT, DEFAULT_TYPE
+from pystexchapi.utils import Dotdict, Deadline
+
+
+__all__ = ('ORDER_EVENT', 'OrderRecord', 'OrderEvent', 'OrderTracker')
+
+
+ORDER_EVENT = Dotdict(NEW='new', FILLED='filled', CANCELED='canceled', CLOSED='closed')
+
+
+class OrderRecord(object):
+
+    __slots__ = ('order_id', 'pair', 'type', 'amount', 'rate', 'timestamp', 'status')
+
+    def __init__(self, order_id: int, pair: str, _type: str, amount: str, rate: str, timestamp: int,
+                 status: int=ORDER_STATUS.PENDING):
+        self.order_id = order_id
+        self.pair = pair
+        self.type = _type
+        self.amount = amount
+        self.rate = rate
+        self.timestamp = timestamp
+        self.status = status
+
+    @classmethod
+    def from_data(cls, order_id: int, data: dict, status: int=ORDER_STATUS.PENDING) -> 'OrderRecord':
+        return cls(order_id, data.get('pair'), data.get('type'), data.get('amount'), data.get('rate'),
+                   data.get('timestamp'), status)
+
+    def __repr__(self):
+        return '{}(order_id={}, pair={}, type={}, amount={}, rate={}, status={})'.format(
+            self.__class__.__name__, self.order_id, self.pair, self.type, self.amount, self.rate, self.status)
+
+
+class OrderEvent(object):
+
+    __slots__ = ('kind', 'order')
+
+    def __init__(self, kind: str, order: OrderRecord):
+        self.kind = kind
+        self.order = order
+
+    def __repr__(self):
+        return '{}(kind={}, order_id={})'.format(self.__class__.__name__, self.kind, self.order.order_id)
+
+
+class OrderTracker(object):
+    """
+    Maintains index of active orders by id. Every `poll` fetches active orders from the oldest tracked one and
+    new finished and canceled orders from private trade history using `from_id` cursors. History before the first
+    poll is skipped. Orders are not filled in order of their ids, so tracked order which left active orders and
+    is behind history cursors is looked up in history by its id. Changes are returned as events and passed to
+    subscribed callbacks.
+    """
+
+    def __init__(self, api, pair: str=DEFAULT_TYPE, page_size: int=DEFAULT_COUNT):
+        super(OrderTracker, self).__init__()
+        self.api = api
+        self.pair = pair
+        self.page_size = page_size
+        self.orders = {}
+        self._cursors = {}
+        self._callbacks = []
+
+    def subscribe(self, callback: Callable[[OrderEvent], None]):
+        self._callbacks.append(callback)
+
+    def _get_data(self, method: str, deadline: Deadline=None, **kwargs) -> dict:
+        data = self.api.call(method, deadline=deadline, pair=self.pair, **kwargs).data.get('data')
+        return data if isinstance(data, dict) else {}
+
+    def _seed_cursor(self, cursor: str, method: str, deadline: Deadline=None, **kwargs):
+        """
+        Moves cursor past the latest existing record, so history before start of tracking is not fetched
+        """
+        if cursor not in self._cursors:
+            data = self._get_data(method, deadline=deadline, order='DESC', count=1, **kwargs)
+            self._cursors[cursor] = max(map(int, data), default=-1) + 1
+
+    def _iter_records(self, method: str, cursor: str=None, start: int=None, deadline: Deadline=None,
+                      **kwargs) -> Iterator[tuple]:
+        """
+        Fetches pages in ascending order of ids starting from cursor (or from `start` if it is lower) and moves
+        cursor past the last record. Without cursor all records are fetched.
+        """
+        from_id = self._cursors.get(cursor)
+        if start is not None and from_id is not None:
+            from_id = min(from_id, start)
+
+        while True:
+            params = dict(kwargs, order='ASC', count=self.page_size)
+            if from_id is not None:
+                params['from_id'] = str(from_id)
+
+            data = self._get_data(method, deadline=deadline, **params)
+            if not data:
+                return
+
+            records = sorted((int(order_id), record) for order_id, record in data.items())
+            for order_id, record in records:
+                if from_id is None or order_id >= from_id:
+                    yield order_id, record
+
+            from_id = records[-1][0] + 1
+            if cursor is not None:
+                self._cursors[cursor] = max(self._cursors.get(cursor, from_id), from_id)
+            if len(records) < self.page_size:
+                return
+
+    def track(self, order_id: int, pair: str, _type: str, amount, rate, timestamp: int=None) -> OrderRecord:
+        """
+        Registers order placed by own `trade` call, so it is tracked before it is seen in active orders
+        """
+        order = self.orders[order_id] = OrderRecord(order_id, pair, _type, amount, rate, timestamp)
+        return order
+
+    def _close_from_history(self, cursor: str, status: int, kind: str, events: list, deadline: Deadline=None):
+        """
+        New records close tracked orders and orders placed and closed between polls
+        """
+        for order_id, record in self._iter_records('private_trade_history', cursor, deadline=deadline,
+                                                   status=status):
+            order = self.orders.pop(order_id, None) or OrderRecord.from_data(order_id, record)
+            order.status = status
+            events.append(OrderEvent(kind, order))
+
+    def _close_missing(self, order_id: int, events: list, deadline: Deadline=None):
+        """
+        Closes tracked order which is not active anymore, status is looked up in history by its id
+        """
+        order = self.orders.pop(order_id)
+        for status, kind in ((ORDER_STATUS.FINISHED, ORDER_EVENT.FILLED),
+                             (ORDER_STATUS.CANCELED, ORDER_EVENT.CANCELED)):
+            data = self._get_data('private_trade_history', deadline=deadline, status=status, order='ASC', count=1,
+                                  from_id=str(order_id))
+            if str(order_id) in data:
+                order.status = status
+                events.append(OrderEvent(kind, order))
+                return
+        events.append(OrderEvent(ORDER_EVENT.CLOSED, order))
+
+    def poll(self, deadline=None) -> List[OrderEvent]:
+        """
+        `deadline` (seconds or `Deadline`) limits all calls of poll together
+        """
+        events = []
+        deadline = Deadline.make(deadline)
+        self._seed_cursor('finished', 'private_trade_history', deadline=deadline, status=ORDER_STATUS.FINISHED)
+        self._seed_cursor('canceled', 'private_trade_history', deadline=deadline, status=ORDER_STATUS.CANCELED)
+
+        # active orders are listed from the oldest tracked one, so the number of calls does not grow with history
+        tracked = set(self.orders)
+        active = set()
+        for order_id, record in self._iter_records('get_active_orders', 'active', start=min(tracked, default=None),
+                                                   deadline=deadline):
+            active.add(order_id)
+            if order_id not in self.orders:
+                order = self.orders[order_id] = OrderRecord.from_data(order_id, record)
+                events.append(OrderEvent(ORDER_EVENT.NEW, order))
+
+        self._close_from_history('finished', ORDER_STATUS.FINISHED, ORDER_EVENT.FILLED, events, deadline)
+        self._close_from_history('canceled', ORDER_STATUS.CANCELED, ORDER_EVENT.CANCELED, events, deadline)
+
+        for order_id in sorted(tracked - active):
+            if order_id in self.orders:
+                self._close_missing(order_id, events, deadline)
+
+        self._dispatch(events)
+        return events
+
+    def reconcile(self, deadline=None) -> List[OrderEvent]:
+        """
+        Full scan of active orders. Orders which are tracked but are not active anymore and were not seen
+        in history are closed. Should be called rarely, e.g. after connectivity loss.
+        """
+        active = dict(self._iter_records('get_active_orders', deadline=Deadline.make(deadline)))
+
+        events = []
+        for order_id in [order_id for order_id in self.orders if order_id not in active]:
+            order = self.orders.pop(order_id)
+            events.append(OrderEvent(ORDER_EVENT.CLOSED, order))
+
+        for order_id, record in active.items():
+            if order_id not in self.orders:
+                order = self.orders[order_id] = OrderRecord.from_data(order_id, record)
+                events.append(OrderEvent(ORDER_EVENT.NEW, order))
+
+        self._dispatch(events)
+        return events
+
+    def _dispatch(self, events: List[OrderEvent]):
+        for event in events:
+            for callback in self._callbacks:
+                callback(event)
@@ -0,0 +1,309 @@
+"""
+Stocks Exchange API transports
+"""
+
+import base64
+import collections
+import datetime
+import json
+import requests
+import threading
+import time
+import zlib
+
+from requests import PreparedRequest
+from requests.structures import CaseInsensitiveDict
+from urllib3.exceptions import ProtocolError, ReadTimeoutError
+
+from pystexchapi.compression import CHUNK_SIZE, decompress_stream
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+__all__ = ('BaseTransport', 'RequestsTransport', 'HTTP2Transport', 'RecordingTransport', 'ReplayTransport')
+
+
+DEFAULT_POOL_MAXSIZE = 32  # connections kept to the same host, enough for thread pool of shared API object
+
+
+class BaseTransport(object):
+    """
+    Transport sends prepared request and returns `requests.Response`, so parsers work the same way regardless
+    of underlying HTTP client. Transports set `wire_bytes` and `decoded_bytes` attributes of response for
+    compression accounting.
+    """
+
+    def send(self, request: PreparedRequest, verify: bool=True, timeout=None) -> requests.Response:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class RequestsTransport(BaseTransport):
+    """
+    HTTP/1.1 transport based on single `requests.Session`, so connections are pooled between calls.
+    Response body is read from wire undecoded and decompressed chunk by chunk.
+    """
+
+    def __init__(self, adapter: requests.adapters.BaseAdapter=None, pool_maxsize: int=DEFAULT_POOL_MAXSIZE):
+        super(RequestsTransport, self).__init__()
+        self.session = requests.Session()
+
+        if adapter is None:
+            # connections are kept for up to `pool_maxsize` concurrent threads
+            adapter = requests.adapters.HTTPAdapter(pool_maxsize=pool_maxsize)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def send(self, request: PreparedRequest, verify: bool=True, timeout=None) -> requests.Response:
+        response = self.session.send(request, verify=verify, timeout=timeout, stream=True)
+        raw = response.raw
+
+        try:
+            content, wire_bytes = decompress_stream(raw.stream(CHUNK_SIZE, decode_content=False),
+                                                    response.headers.get('Content-Encoding'))
+        except ReadTimeoutError as e:
+            raise requests.exceptions.ConnectionError(e, request=request)
+        except ProtocolError as e:
+            raise requests.exceptions.ChunkedEncodingError(e, request=request)
+        except (ValueError, zlib.error) as e:
+            raise requests.exceptions.ContentDecodingError(e, request=request)
+        finally:
+            raw.release_conn()
+
+        response._content = content
+        response._content_consumed = True
+        response.wire_bytes = wire_bytes
+        response.decoded_bytes = len(content)
+        return response
+
+    def close(self):
+        self.session.close()
+
+
+class HTTP2Transport(BaseTransport):
+    """
+    HTTP/2 transport based on `httpx.Client`. Client is thread safe, so concurrent public and private calls
+    from many threads are multiplexed over one connection.
+    """
+
+    def __init__(self, **client_kwargs):
+        super(HTTP2Transport, self).__init__()
+
+        if httpx is None:
+            raise ImportError('HTTP/2 transport requires httpx. Install it with `pip install httpx[http2]`')
+
+        client_kwargs.setdefault('http2', True)
+        self._client_kwargs = client_kwargs
+        self._clients = {}
+        self._clients_lock = threading.Lock()
+
+    def _get_client(self, verify: bool) -> 'httpx.Client':
+        # certificate verification is configured per client in httpx
+        client = self._clients.get(verify)
+        if client is None:
+            with self._clients_lock:
+                client = self._clients.get(verify)
+                if client is None:
+                    client = self._clients[verify] = httpx.Client(verify=verify, **self._client_kwargs)
+        return client
+
+    @staticmethod
+    def _make_timeout(timeout) -> 'httpx.Timeout':
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            return httpx.Timeout(None, connect=connect, read=read)
+        return httpx.Timeout(timeout)
+
+    def send(self, request: PreparedRequest, verify: bool=True, timeout=None) -> requests.Response:
+        body = request.body
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+
+        started = time.perf_counter()
+        try:
+            resp = self._get_client(verify).request(request.method, request.url, headers=dict(request.headers),
+                                                    content=body, timeout=self._make_timeout(timeout))
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(e, request=request)
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(e, request=request)
+
+        response = self._build_response(request, resp)
+        response.wire_bytes = resp.num_bytes_downloaded
+        response.decoded_bytes = len(response.content)
+        response.elapsed = datetime.timedelta(seconds=time.perf_counter() - started)
+        return response
+
+    @staticmethod
+    def _build_response(request: PreparedRequest, resp: 'httpx.Response') -> requests.Response:
+        response = requests.Response()
+        response._content = resp.read()
+        response.status_code = resp.status_code
+        response.reason = resp.reason_phrase
+        response.headers = CaseInsensitiveDict(resp.headers)
+        response.url = str(resp.url)
+        response.encoding = resp.encoding
+        response.request = request
+        return response
+
+    def close(self):
+        for client in self._clients.values():
+            client.close()
+        self._clients.clear()
+
+
+SENSITIVE_HEADERS = ('Key', 'Sign')
+VOLATILE_BODY_FIELDS = ('nonce',)
+
+
+def _body_text(body) -> str:
+    if isinstance(body, bytes):
+        return body.decode('utf-8', errors='replace')
+    return body
+
+
+def _request_key(method: str, url: str, body) -> tuple:
+    """
+    Key for matching recorded requests. Nonce changes on every private call, so it is excluded from body.
+    """
+    body = _body_text(body)
+    if body:
+        try:
+            data = json.loads(body)
+        except ValueError:
+            pass
+        else:
+            if isinstance(data, dict):
+                for field in VOLATILE_BODY_FIELDS:
+                    data.pop(field, None)
+                body = json.dumps(data, sort_keys=True)
+    return method, url, body or None
+
+
+class RecordingTransport(BaseTransport):
+    """
+    Sends requests through wrapped transport and appends every request/response pair to log file, one JSON
+    record per line. Credentials headers are not recorded.
+    """
+
+    def __init__(self, transport: BaseTransport, path: str):
+        super(RecordingTransport, self).__init__()
+        self.transport = transport
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def _make_record(self, request: PreparedRequest, response: requests.Response, started: float,
+                     elapsed: float) -> dict:
+        content = response.content
+        record = {
+            'ts': started,
+            'elapsed': elapsed,
+            'method': request.method,
+            'url': request.url,
+            'headers': {k: v for k, v in request.headers.items() if k not in SENSITIVE_HEADERS},
+            'body': _body_text(request.body),
+            'status': response.status_code,
+            'reason': response.reason,
+            'response_headers': dict(response.headers),
+            'wire_bytes': getattr(response, 'wire_bytes', len(content))
+        }
+
+        try:
+            record['text'] = content.decode('utf-8')
+        except UnicodeDecodeError:
+            record['b64'] = base64.b64encode(content).decode('ascii')
+
+        return record
+
+    def send(self, request: PreparedRequest, verify: bool=True, timeout=None) -> requests.Response:
+        started = time.time()
+        perf_started = time.perf_counter()
+        response = self.transport.send(request, verify=verify, timeout=timeout)
+        record = self._make_record(request, response, started, time.perf_counter() - perf_started)
+        line = json.dumps(record, separators=(',', ':'))
+
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+
+        return response
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+        self.transport.close()
+
+
+class ReplayTransport(BaseTransport):
+    """
+    Serves responses recorded by `RecordingTransport`. Requests are matched by method, url and body (without
+    nonce), responses for the same request are served in order of recording. Recorded latency is reproduced
+    divided by `speed`, `speed=None` serves responses immediately. With `loop=True` recorded responses are
+    served again when exhausted.
+    """
+
+    def __init__(self, path: str, speed: float=1.0, loop: bool=False):
+        super(ReplayTransport, self).__init__()
+        if speed is not None and speed <= 0:
+            raise ValueError('speed must be positive number. Currently: {} {}'.format(speed, type(speed)))
+
+        self.speed = speed
+        self.loop = loop
+        self._lock = threading.Lock()
+        self._records = collections.OrderedDict()
+
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    key = _request_key(record['method'], record['url'], record['body'])
+                    self._records.setdefault(key, collections.deque()).append(record)
+
+    def _next_record(self, request: PreparedRequest) -> dict:
+        key = _request_key(request.method, request.url, request.body)
+
+        with self._lock:
+            records = self._records.get(key)
+            if not records:
+                raise requests.exceptions.ConnectionError('No recorded response for {} {}'.format(request.method,
+                                                                                               request.url),
+                                                          request=request)
+            record = records.popleft()
+            if self.loop:
+                records.append(record)
+
+        return record
+
+    @staticmethod
+    def _build_response(request: PreparedRequest, record: dict) -> requests.Response:
+        if 'text' in record:
+            content = record['text'].encode('utf-8')
+        else:
+            content = base64.b64decode(record['b64'])
+
+        response = requests.Response()
+        response._content = content
+        response.status_code = record['status']
+        response.reason = record['reason']
+        response.headers = CaseInsensitiveDict(record['response_headers'])
+        response.url = record['url']
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.elapsed = datetime.timedelta(seconds=record['elapsed'])
+        response.request = request
+        response.wire_bytes = record['wire_bytes']
+        response.decoded_bytes = len(content)
+        return response
+
+    def send(self, request: PreparedRequest, verify: bool=True, timeout=None) -> requests.Response:
+        record = self._next_record(request)
+
+        if self.speed:
+            time.sleep(record['elapsed'] / self.speed)
+
+        return self._build_response(request, record)
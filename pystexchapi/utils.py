@@ -1,8 +1,23 @@
+import re
 import time
 import random
+import itertools
+import sys
 
+from decimal import Decimal
+from typing import Iterable
 
-__all__ = ('Dotdict', 'make_nonce', 'set_not_none_dict_kwargs', 'ENCODING')
+from pystexchapi.exc import APIDeadlineExceededException
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+__all__ = ('Dotdict', 'make_nonce', 'NonceGenerator', 'shared_nonce_generator', 'Deadline', 'set_not_none_dict_kwargs',
+           'ENCODING', 'is_numeric', 'to_fixed_point', 'to_float_array', 'to_fixed_point_array', 'to_decimal_list',
+           'convert_column', 'NUMERIC_KINDS', 'DEFAULT_SCALE')
 
 
 ENCODING = 'utf-8'
@@ -19,8 +34,232 @@ def make_nonce(makeweight: int=1000000) -> int:
     return int(time.time()) * makeweight + random.randint(0, makeweight)
 
 
+class NonceGenerator(object):
+    """
+    Callable producing strictly increasing nonces, starting from current time scaled by makeweight.
+    `itertools.count` is advanced atomically under GIL, so generator is safe for concurrent use without locks.
+    """
+
+    def __init__(self, makeweight: int=1000000, start: int=None):
+        if not isinstance(makeweight, int) or makeweight < 0:
+            raise ValueError(makeweight)
+        if start is None:
+            start = int(time.time() * makeweight)
+        self._counter = itertools.count(start)
+
+    def __call__(self) -> int:
+        return next(self._counter)
+
+
+# default nonce source of private requests: random nonces of concurrent requests could collide or arrive
+# out of order, so every request of the process takes the next value of one generator
+shared_nonce_generator = NonceGenerator()
+
+
+class Deadline(object):
+    """
+    Point in time (by monotonic clock) by which call must be finished. Deadline is shared by every step of call,
+    so timeouts of each request are limited by time left.
+    """
+
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + seconds
+
+    @classmethod
+    def make(cls, deadline) -> 'Deadline':
+        if deadline is None or isinstance(deadline, Deadline):
+            return deadline
+        return cls(deadline)
+
+    def remaining(self) -> float:
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def check(self):
+        if self.expired:
+            raise APIDeadlineExceededException()
+
+    def limit(self, timeout):
+        """
+        Limits timeout (number or (connect, read) tuple) by time left. Raises when no time is left, as requests
+        does not accept zero timeout.
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise APIDeadlineExceededException()
+
+        if timeout is None:
+            return remaining
+        if isinstance(timeout, tuple):
+            return tuple(remaining if t is None else min(t, remaining) for t in timeout)
+        return min(timeout, remaining)
+
+
+def estimate_nbytes(value) -> int:
+    """
+    Approximate memory held by decoded JSON value together with its items, objects shared by several containers
+    are counted once. NumPy arrays report size of their buffers.
+    """
+    seen, stack, nbytes = set(), [value], 0
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        nbytes += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple)):
+            stack.extend(item)
+    return nbytes
+
+
 def set_not_none_dict_kwargs(dictionary: dict, **kwargs):
     if dictionary and isinstance(dictionary, dict):
         for k, v in kwargs.items():
             if v is not None:
                 dictionary[k] = v
+
+
+NUMERIC_RE = re.compile(r'^-?\d+(\.\d*)?$')
+DEFAULT_SCALE = 8  # satoshi
+NAN = float('nan')
+MAX_INT64_DIGITS = 18  # any number of 18 digits fits int64
+NUMERIC_KINDS = ('float', 'fixed', 'decimal')
+
+
+def is_numeric(value) -> bool:
+    if isinstance(value, str):
+        return bool(NUMERIC_RE.match(value))
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def to_float_array(values: Iterable):
+    """
+    Converts column of numeric strings to float64 array (list of floats if NumPy is not installed)
+    """
+    if numpy is not None:
+        return numpy.array(values, dtype=numpy.float64)
+    return list(map(float, values))
+
+
+def to_fixed_point(value, scale: int=DEFAULT_SCALE, multiplier: int=None) -> int:
+    """
+    Converts number or numeric string to integer scaled by 10 ** scale, digits beyond scale are truncated
+    """
+    if multiplier is None:
+        multiplier = 10 ** scale
+
+    if isinstance(value, Decimal):
+        return int(value.scaleb(scale))
+
+    if not isinstance(value, str):
+        if isinstance(value, int):
+            return value * multiplier
+        value = repr(value)
+
+    if 'e' in value or 'E' in value:
+        return int(Decimal(value).scaleb(scale))
+
+    whole, _, fraction = value.partition('.')
+    negative = whole.startswith('-')
+    fraction = fraction[:scale]
+    result = abs(int(whole or '0')) * multiplier + (int(fraction) * 10 ** (scale - len(fraction)) if fraction else 0)
+    return -result if negative else result
+
+
+def _to_fixed_point_numpy(values: list, scale: int, multiplier: int):
+    """
+    Parses column as matrix of ASCII codes, one vectorized step per character position for all values at
+    once. Values which are not plain decimal strings (exponent notation, too many digits for int64, invalid
+    characters) are converted one by one.
+    """
+    try:
+        codes = numpy.array(values, dtype=numpy.bytes_)
+    except (UnicodeError, ValueError, TypeError):
+        codes = None
+    if codes is None or not codes.size or not codes.itemsize:
+        return numpy.array([to_fixed_point(v, scale, multiplier) for v in values], dtype=numpy.int64)
+
+    matrix = codes.view(numpy.uint8).reshape(len(codes), codes.itemsize)
+    result = numpy.zeros(len(codes), dtype=numpy.int64)
+    fraction_digits = numpy.zeros(len(codes), dtype=numpy.int64)
+    taken_digits = numpy.zeros(len(codes), dtype=numpy.int64)
+    after_point = numpy.zeros(len(codes), dtype=bool)
+    valid = numpy.ones(len(codes), dtype=bool)
+    negative = matrix[:, 0] == ord('-')
+
+    for position in range(codes.itemsize):
+        code = matrix[:, position]
+        digit = code.astype(numpy.int64) - ord('0')
+        is_digit = (code >= ord('0')) & (code <= ord('9'))
+        is_point = code == ord('.')
+
+        take = is_digit & (~after_point | (fraction_digits < scale))  # digits beyond scale are truncated
+        result = numpy.where(take, result * 10 + digit, result)
+        fraction_digits += take & after_point
+        taken_digits += take
+
+        valid &= is_digit | is_point | (code == 0) | (negative if position == 0 else False)
+        valid &= ~(is_point & after_point)
+        after_point |= is_point
+
+    valid &= taken_digits + scale - fraction_digits <= MAX_INT64_DIGITS
+    valid &= (taken_digits > 0) & (~negative | (taken_digits > fraction_digits))  # '-', '.' or '-.5'
+    result = result * 10 ** numpy.minimum(scale - fraction_digits, MAX_INT64_DIGITS)
+    result = numpy.where(negative, -result, result)
+
+    for i in numpy.flatnonzero(~valid):
+        result[i] = to_fixed_point(values[i], scale, multiplier)  # raises OverflowError if it does not fit
+    return result
+
+
+def to_fixed_point_array(values: Iterable, scale: int=DEFAULT_SCALE):
+    """
+    Converts column of numeric strings to integers scaled by 10 ** scale without intermediate floats,
+    e.g. '0.00002905' -> 2905 for scale 8. Digits beyond scale are truncated. Returns int64 array converted
+    by vectorized string operations (list of ints if NumPy is not installed).
+    """
+    multiplier = 10 ** scale
+    if numpy is not None:
+        return _to_fixed_point_numpy(list(values), scale, multiplier)
+    return [to_fixed_point(v, scale, multiplier) for v in values]
+
+
+def to_decimal_list(values: Iterable) -> list:
+    """
+    Converts column of numeric strings to Decimals. Strings are passed to Decimal constructor directly,
+    without per-value `str` conversion.
+    """
+    return [Decimal(v) if isinstance(v, (str, int)) else Decimal(repr(v)) for v in values]
+
+
+def convert_column(values: list, kind: str='float', scale: int=DEFAULT_SCALE):
+    """
+    None values are gaps: NaN in float columns, masked in fixed columns (None without NumPy), None in decimal
+    """
+    if kind not in NUMERIC_KINDS:
+        raise ValueError('kind can be one of {}. Currently: {} {}'.format(NUMERIC_KINDS, kind, type(kind)))
+
+    gaps = [i for i, v in enumerate(values) if v is None]
+    if gaps:
+        if kind == 'decimal':
+            return [None if v is None else Decimal(v if isinstance(v, (str, int)) else repr(v)) for v in values]
+        if kind == 'float':
+            return to_float_array([NAN if v is None else v for v in values])
+        column = to_fixed_point_array([0 if v is None else v for v in values], scale=scale)
+        if numpy is None:
+            return [None if v is None else c for v, c in zip(values, column)]
+        mask = numpy.zeros(len(column), dtype=bool)
+        mask[gaps] = True
+        return numpy.ma.masked_array(column, mask=mask)
+
+    if kind == 'float':
+        return to_float_array(values)
+    if kind == 'fixed':
+        return to_fixed_point_array(values, scale=scale)
+    return to_decimal_list(values)
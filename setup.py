@@ -20,16 +20,23 @@ setup(
     install_requires=[
         'requests>=2.19.1'
     ],
+    extras_require={
+        'http2': ['httpx[http2]>=0.23.0'],
+        'compression': ['brotli', 'zstandard'],
+        'numpy': ['numpy']
+    },
     tests_require=[
         'requests-mock>=1.5.0'
     ],
     packages=['pystexchapi'],
-    python_requires='>=3.5',
+    python_requires='>=3.7',
     classifiers=[
         'Intended Audience :: Developers',
         'License :: OSI Approved :: MIT License',
-        'Programming Language :: Python :: 3.5',
-        'Programming Language :: Python :: 3.6',
-        'Programming Language :: Python :: 3.7'
+        'Programming Language :: Python :: 3.7',
+        'Programming Language :: Python :: 3.8',
+        'Programming Language :: Python :: 3.9',
+        'Programming Language :: Python :: 3.10',
+        'Programming Language :: Python :: 3.11'
     ]
 )
@@ -1,16 +1,18 @@
 import hmac
 import hashlib
+import inspect
 import requests
 import requests_mock
 
 from unittest import TestCase
 from unittest.mock import patch
 
-from pystexchapi.api import StocksExchangeAPI, APIMethod
-from pystexchapi.exc import APINoMethodException
+from pystexchapi.api import StocksExchangeAPI, APIMethod, compile_api_method
+from pystexchapi.cache import ResponseCache
+from pystexchapi.exc import APINoMethodException, APIDeadlineExceededException
 from pystexchapi.request import STOCK_EXCHANGE_BASE_URL, TickerRequest, StockExchangeRequest
-from pystexchapi.response import StockExchangeResponseParser
-from pystexchapi.utils import ENCODING
+from pystexchapi.response import StockExchangeResponseParser, LazyAPIResponse
+from pystexchapi.utils import ENCODING, Deadline
 from tests import TICKER_RESPONSE, PRICES_RESPONSE, MARKETS_RESPONSE, GET_ACCOUNT_INFO_RESPONSE, CURRENCIES_RESPONSE, \
     MARKET_SUMMARY_RESPONSE, TRADE_HISTORY_RESPONSE, ORDERBOOK_RESPONSE, PUBLIC_GRAFIC_RESPONSE, \
     GET_ACTIVE_ORDERS_RESPONSE, TRADE_RESPONSE, CANCEL_ORDER_RESPONSE, PRIVATE_TRADE_HISTORY_RESPONSE, \
@@ -112,6 +114,54 @@ class TestStocksExchangeAPI(TestCase):
         self.api.update_api_methods(api_methods=new_methods)
         self.assertIn(_method_name, self.api.get_available_methods())
 
+    @requests_mock.Mocker()
+    def test_bound_methods(self, m):
+        m.register_uri('GET', STOCK_EXCHANGE_BASE_URL.format(method='orderbook'), text=ORDERBOOK_RESPONSE)
+        m.register_uri('POST', STOCK_EXCHANGE_BASE_URL.format(method=''), text=TRADE_RESPONSE)
+
+        data = self.api.orderbook('BTC', 'NXT', deadline=5.0).data
+        self.assertEqual(data, self.api.call('orderbook', currency1='BTC', currency2='NXT').data)
+        self.assertEqual(m.request_history[0].qs, {'pair': ['btc_nxt']})
+
+        self.api.trade('BUY', 'BTC', 'NXT', amount=1.0, rate=2.0)
+        self.assertEqual(m.last_request.json()['pair'], 'BTC_NXT')
+        self.assertIn('Sign', m.last_request.headers)
+
+        with self.assertRaises(TypeError):
+            self.api.orderbook('BTC')
+        with self.assertRaises(TypeError):
+            self.api.orderbook('BTC', 'NXT', 5.0)  # call arguments are keyword-only
+        with self.assertRaises(ValueError):
+            self.api.trade('HOLD', 'BTC', 'NXT', amount=1.0, rate=2.0)
+
+        with patch('time.time', return_value=1000.0):
+            first = self.api.orderbook('BTC', 'NXT', saving_time=10)
+            self.assertIs(self.api.orderbook('BTC', 'NXT', with_saving=True), first)
+        self.assertEqual(m.call_count, 4)
+
+    def test_bind_updated_methods(self):
+        new_method = APIMethod(name='newmethod', request=TickerRequest, parser=StockExchangeResponseParser)
+        self.api.update_api_methods({new_method.name: new_method})
+        self.assertEqual(self.api.newmethod.__name__, 'newmethod')
+
+        clashing_method = APIMethod(name='transport', request=TickerRequest, parser=StockExchangeResponseParser)
+        with self.assertWarns(UserWarning):
+            self.api.update_api_methods({clashing_method.name: clashing_method})
+        self.assertNotIsInstance(self.api.transport, type(self.api.ticker))
+
+        for name in ('new-method', 'class'):
+            invalid_method = APIMethod(name=name, request=TickerRequest, parser=StockExchangeResponseParser)
+            with self.assertWarns(UserWarning):
+                self.api.update_api_methods({name: invalid_method})
+            self.assertIn(name, self.api.api_methods)
+            with self.assertRaises(ValueError):
+                compile_api_method(self.api, invalid_method)
+
+    def test_method_annotations(self):
+        self.assertEqual(self.api.grafic.__annotations__, {'currency1': str, 'currency2': str, 'order': str,
+                                                           'count': int, 'interval': str, 'since': str, 'end': str})
+        self.assertEqual(inspect.signature(self.api.trade).parameters['amount'].annotation, float)
+
     def test_raise_on_absent_method(self):
         with self.assertRaises(APINoMethodException) as cm:
             self.api.call('karabas')
@@ -145,10 +195,150 @@ class TestStocksExchangeAPI(TestCase):
         self.assertEqual(m.call_count, 2)
         self.assertTrue(data)
 
+    @requests_mock.Mocker()
+    def test_call_changes(self, m):
+        m.register_uri('GET', STOCK_EXCHANGE_BASE_URL.format(method='prices'), text=PRICES_RESPONSE)
+
+        delta = self.api.call_changes('prices')
+        self.assertEqual(len(delta.added), 3)
+
+        delta = self.api.call_changes('prices')
+        self.assertEqual(m.call_count, 2)
+        self.assertFalse(delta)
+
+    @requests_mock.Mocker()
+    def test_reuse_unchanged_response(self, m):
+        _url = STOCK_EXCHANGE_BASE_URL.format(method='markets')
+        m.register_uri('GET', _url, text=MARKETS_RESPONSE)
+
+        with patch.object(StockExchangeResponseParser, 'parse', wraps=StockExchangeResponseParser.parse) as parse:
+            first = self.api.call('markets')
+            second = self.api.call('markets')
+            self.assertEqual(m.call_count, 2)
+            self.assertEqual(parse.call_count, 1)  # identical payload is not decoded again
+            self.assertIs(first, second)
+
+        # server supports validators
+        m.register_uri('GET', _url, text=CURRENCIES_RESPONSE, headers={'ETag': '"v1"'})
+        third = self.api.call('markets')
+        self.assertIsNot(third, first)
+
+        m.register_uri('GET', _url, status_code=304)
+        self.assertIs(self.api.call('markets'), third)
+        self.assertEqual(m.request_history[-1].headers['If-None-Match'], '"v1"')
+
+    @requests_mock.Mocker()
+    def test_bounded_response_cache(self, m):
+        m.register_uri('GET', STOCK_EXCHANGE_BASE_URL.format(method='orderbook'), text=ORDERBOOK_RESPONSE)
+        api = StocksExchangeAPI(lazy_responses=True, response_cache=ResponseCache(max_bytes=len(ORDERBOOK_RESPONSE)))
+
+        with patch('time.time', return_value=100.0):
+            first = api.orderbook('BTC', 'NXT', with_saving=True)
+            self.assertIsInstance(first, LazyAPIResponse)
+            self.assertFalse(first.decoded)
+            self.assertEqual(first.data['result']['buy'][0]['Rate'], '58.27632628')
+
+            # cached response is not decoded by callers
+            saved = api.orderbook('BTC', 'NXT', with_saving=True)
+            self.assertIsNot(saved, first)
+            self.assertFalse(saved.decoded)
+            self.assertEqual(m.call_count, 1)
+
+            api.orderbook('ETH', 'BTC', with_saving=True)  # other pair is saved separately
+            self.assertEqual(m.call_count, 2)
+
+            api.orderbook('BTC', 'NXT', with_saving=True)  # evicted, as budget holds only one response
+            self.assertEqual(m.call_count, 3)
+
+        self.assertEqual(api.response_cache.get_stats()['evictions'], 2)
+        self.assertLessEqual(api.response_cache.nbytes, len(ORDERBOOK_RESPONSE))
+        self.assertEqual(first.data['result']['buy'][0]['Rate'], '58.27632628')
+
+        # decoded responses are accounted by estimated size of their data, not by size of payload
+        api = StocksExchangeAPI(response_cache=ResponseCache(max_bytes=len(ORDERBOOK_RESPONSE) * 20))
+        api.orderbook('BTC', 'NXT', with_saving=True)
+        self.assertGreater(api.response_cache.nbytes, len(ORDERBOOK_RESPONSE))
+
+        api = StocksExchangeAPI(response_cache=ResponseCache(max_bytes=len(ORDERBOOK_RESPONSE)))
+        api.orderbook('BTC', 'NXT', with_saving=True)
+        self.assertEqual(len(api.response_cache), 0)  # decoded data does not fit budget of payload size
+
+    @requests_mock.Mocker()
+    def test_shared_cache_private(self, m):
+        m.register_uri('POST', STOCK_EXCHANGE_BASE_URL.format(method=''), text=GET_ACCOUNT_INFO_RESPONSE)
+        cache = ResponseCache()
+        first = StocksExchangeAPI(api_key='first', api_secret='secret', response_cache=cache)
+        second = StocksExchangeAPI(api_key='second', api_secret='secret', response_cache=cache)
+
+        first.get_account_info(with_saving=True)
+        first.get_account_info(with_saving=True)
+        self.assertEqual(m.call_count, 1)
+
+        # responses of other account are not reused
+        second.get_account_info(with_saving=True)
+        self.assertEqual(m.call_count, 2)
+        self.assertEqual(m.request_history[-1].headers['Key'], b'second')
+
+    @requests_mock.Mocker()
+    def test_timeouts(self, m):
+        m.register_uri('GET', STOCK_EXCHANGE_BASE_URL.format(method='ticker'), text=TICKER_RESPONSE)
+        m.register_uri('GET', STOCK_EXCHANGE_BASE_URL.format(method='prices'), text=PRICES_RESPONSE)
+        api = StocksExchangeAPI(timeout=(2.0, 10.0), method_timeouts={'ticker': (1.0, 3.0)})
+
+        api.call('prices')
+        self.assertEqual(m.request_history[-1].timeout, (2.0, 10.0))
+
+        api.call('ticker')
+        self.assertEqual(m.request_history[-1].timeout, (1.0, 3.0))
+
+        api.call('ticker', deadline=0.5)
+        connect_timeout, read_timeout = m.request_history[-1].timeout
+        self.assertLessEqual(connect_timeout, 0.5)
+        self.assertLessEqual(read_timeout, 0.5)
+
+        with self.assertRaises(APIDeadlineExceededException):
+            api.call('ticker', deadline=Deadline(-1.0))
+        self.assertEqual(m.call_count, 3)
+
+        with self.assertRaises(requests.exceptions.Timeout):  # deadline exceeding is timeout for callers
+            api.call('prices', deadline=0)
+
+    @requests_mock.Mocker()
+    def test_numeric_columns(self, m):
+        m.register_uri('GET', STOCK_EXCHANGE_BASE_URL.format(method='ticker'), text=TICKER_RESPONSE)
+        api = StocksExchangeAPI(numeric_columns='fixed')
+        self.assertEqual(list(api.call('ticker').column('ask')), [3300])
+
+        with self.assertRaises(ValueError):
+            StocksExchangeAPI(numeric_columns='complex')
+
     ######################################################
     # Test public API methods
     ######################################################
 
+    @requests_mock.Mocker()
+    def test_market_summaries(self, m):
+        summary_url = STOCK_EXCHANGE_BASE_URL.format(method='market_summary')
+        m.register_uri('GET', summary_url + '/BTC/USD', text=MARKET_SUMMARY_RESPONSE)
+        m.register_uri('GET', summary_url + '/XXX/YYY', text='[]')
+        markets = m.register_uri('GET', STOCK_EXCHANGE_BASE_URL.format(method='markets'), text=MARKETS_RESPONSE)
+
+        summaries = self.api.market_summaries(['BTC_USD', 'XXX_YYY', 'BTC_USD'])
+        self.assertEqual(list(summaries), ['BTC_USD'])
+        self.assertEqual(summaries['BTC_USD']['partner'], 'USD')
+        self.assertEqual(m.call_count, 2)
+        self.assertFalse(markets.called)
+
+        summaries = self.api.market_summaries(['PRG_BTC', 'BTC_USDT', 'XXX_YYY'], bulk_threshold=2)
+        self.assertEqual(list(summaries), ['PRG_BTC', 'BTC_USDT'])
+        self.assertEqual(summaries['BTC_USDT']['currency'], 'BTC')
+        self.assertEqual(markets.call_count, 1)
+        self.assertEqual(m.call_count, 3)
+
+        index = self.api._markets_index[1]
+        self.api.market_summaries(['PRG_BTC', 'BTC_USDT', 'XXX_YYY'], bulk_threshold=2)
+        self.assertIs(self.api._markets_index[1], index)  # payload did not change, index is reused
+
     @requests_mock.Mocker()
     def test_ticker(self, m):
         _method_name = 'ticker'
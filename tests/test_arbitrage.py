@@ -0,0 +1,76 @@
+import json
+
+from unittest import TestCase
+
+from pystexchapi.arbitrage import ArbitrageScanner
+from pystexchapi.response import APIResponse
+
+
+def market(name, fee='0.2', active=True):
+    currency, partner = name.split('_')
+    return {'currency': currency, 'partner': partner, 'market_name': name, 'buy_fee_percent': fee,
+            'sell_fee_percent': fee, 'active': active}
+
+
+MARKETS = [market('ETH_BTC'), market('ETH_USDT'), market('BTC_USDT'), market('NXT_BTC', active=False)]
+
+TICKER = [
+    {'market_name': 'ETH_BTC', 'bid': '0.05', 'ask': '0.0501'},
+    {'market_name': 'ETH_USDT', 'bid': '1010', 'ask': '1011'},
+    {'market_name': 'BTC_USDT', 'bid': '20000', 'ask': '20010'},
+    {'market_name': 'NXT_BTC', 'bid': '0.000001', 'ask': '0.000002'}
+]
+
+
+class TestArbitrageScanner(TestCase):
+
+    def test_triangle(self):
+        scanner = ArbitrageScanner(MARKETS)
+        self.assertEqual(len(scanner), 2)  # one triangle in both directions
+        self.assertEqual(scanner.opportunities(), [])  # rates are unknown before first snapshot
+
+        self.assertEqual(scanner.update(APIResponse(TICKER)), 3)
+        opportunities = scanner.opportunities()
+        self.assertEqual(len(opportunities), 1)
+
+        opportunity = opportunities[0]
+        self.assertEqual(opportunity['path'], ('BTC', 'ETH', 'USDT', 'BTC'))
+        self.assertEqual(opportunity['markets'], ('ETH_BTC', 'ETH_USDT', 'BTC_USDT'))
+        self.assertEqual(opportunity['sides'], ('BUY', 'SELL', 'BUY'))
+        self.assertAlmostEqual(opportunity['profit'], 1 / 0.0501 * 1010 / 20010 * 0.998 ** 3 - 1)
+
+        self.assertEqual(scanner.opportunities(min_profit=0.01), [])
+
+        without_fees = ArbitrageScanner(MARKETS, with_fees=False)
+        self.assertAlmostEqual(without_fees.scan(TICKER)[0]['profit'], 1 / 0.0501 * 1010 / 20010 - 1)
+
+    def test_prices_snapshot(self):
+        scanner = ArbitrageScanner(MARKETS)
+        prices = [{'market_name': r['market_name'], 'buy': r['bid'], 'sell': r['ask']} for r in TICKER]
+        self.assertEqual(len(scanner.scan(json.loads(json.dumps(prices)))), 1)
+
+        # rates are updated in place, missing quote makes cycles unknown
+        prices[1]['sell'] = '0'
+        prices[1]['buy'] = '0'
+        self.assertEqual(scanner.scan(prices), [])
+
+        prices[1]['buy'] = '1000'
+        self.assertEqual(scanner.scan(prices), [])  # 1 / 0.0501 * 1000 / 20010 * 0.998 ** 3 < 1
+
+    def test_longer_cycles(self):
+        markets = MARKETS + [market('LTC_BTC'), market('LTC_USDT')]
+        self.assertEqual(len(ArbitrageScanner(markets)), 4)
+
+        scanner = ArbitrageScanner(markets, max_length=4, with_fees=False)
+        self.assertEqual(len(scanner), 6)
+
+        ticker = TICKER + [{'market_name': 'LTC_BTC', 'bid': '0.01', 'ask': '0.01'},
+                           {'market_name': 'LTC_USDT', 'bid': '200', 'ask': '200'}]
+        opportunities = scanner.scan(ticker, limit=2)
+        self.assertEqual(len(opportunities), 2)
+        self.assertGreaterEqual(opportunities[0]['profit'], opportunities[1]['profit'])
+        self.assertEqual(len(opportunities[0]['markets']), 4)
+        self.assertEqual(opportunities[0]['path'], ('BTC', 'ETH', 'USDT', 'LTC', 'BTC'))
+
+        with self.assertRaises(ValueError):
+            ArbitrageScanner(markets, max_length=2)
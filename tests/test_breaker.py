@@ -0,0 +1,80 @@
+import requests
+import requests_mock
+
+from unittest import TestCase
+from unittest.mock import patch
+
+from pystexchapi.api import StocksExchangeAPI
+from pystexchapi.breaker import CircuitBreaker, CIRCUIT_STATE
+from pystexchapi.exc import APICircuitOpenException
+from pystexchapi.request import STOCK_EXCHANGE_BASE_URL
+from tests import TICKER_RESPONSE
+
+
+class TestCircuitBreaker(TestCase):
+
+    @patch('time.monotonic')
+    def test_states(self, time_mock):
+        time_mock.return_value = 100.0
+        breaker = CircuitBreaker('ticker', failure_threshold=2, recovery_time=10.0)
+
+        breaker.acquire()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CIRCUIT_STATE.CLOSED)
+
+        breaker.acquire()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CIRCUIT_STATE.OPEN)
+
+        with self.assertRaises(APICircuitOpenException) as cm:
+            breaker.acquire()
+        self.assertEqual(cm.exception.retry_after, 10.0)
+
+        time_mock.return_value = 110.0
+        self.assertEqual(breaker.state, CIRCUIT_STATE.HALF_OPEN)
+        breaker.acquire()  # probe
+        with self.assertRaises(APICircuitOpenException):
+            breaker.acquire()  # only one probe at once
+
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CIRCUIT_STATE.OPEN)
+
+        time_mock.return_value = 120.0
+        breaker.acquire()
+        breaker.record_success(latency=0.1)
+        self.assertEqual(breaker.state, CIRCUIT_STATE.CLOSED)
+
+    def test_latency_threshold(self):
+        breaker = CircuitBreaker('ticker', failure_threshold=1, latency_threshold=1.0)
+        breaker.record_success(latency=0.5)
+        self.assertEqual(breaker.state, CIRCUIT_STATE.CLOSED)
+        breaker.record_success(latency=1.5)
+        self.assertEqual(breaker.state, CIRCUIT_STATE.OPEN)
+
+        with self.assertRaises(ValueError):
+            CircuitBreaker('ticker', failure_threshold=0)
+
+    @requests_mock.Mocker()
+    def test_api_fails_fast(self, m):
+        _url = STOCK_EXCHANGE_BASE_URL.format(method='ticker')
+        m.register_uri('GET', _url, status_code=503)
+        api = StocksExchangeAPI(circuit_breaker={'failure_threshold': 2, 'recovery_time': 60.0})
+
+        for _ in range(2):
+            with self.assertRaises(requests.exceptions.HTTPError):
+                api.call('ticker')
+
+        with self.assertRaises(APICircuitOpenException):
+            api.call('ticker')
+        self.assertEqual(m.call_count, 2)
+        self.assertEqual(api.get_circuit_states(), {'public': CIRCUIT_STATE.OPEN, 'ticker': CIRCUIT_STATE.OPEN})
+
+        # client errors do not open circuit
+        m.register_uri('GET', STOCK_EXCHANGE_BASE_URL.format(method='prices'), status_code=404)
+        api = StocksExchangeAPI(circuit_breaker={'failure_threshold': 1})
+        with self.assertRaises(requests.exceptions.HTTPError):
+            api.call('prices')
+        self.assertEqual(api.get_circuit_states()['prices'], CIRCUIT_STATE.CLOSED)
+
+        m.register_uri('GET', _url, text=TICKER_RESPONSE)
+        self.assertTrue(api.call('ticker').data)
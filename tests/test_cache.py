@@ -0,0 +1,33 @@
+from unittest import TestCase
+
+from pystexchapi.cache import ResponseCache
+
+
+class TestResponseCache(TestCase):
+
+    def test_budget(self):
+        cache = ResponseCache(max_bytes=100)
+        self.assertTrue(cache.put('a', 1, 40))
+        self.assertTrue(cache.put('b', 2, 40))
+        self.assertEqual(cache.get('a'), 1)  # 'a' becomes most recently used
+
+        self.assertTrue(cache.put('c', 3, 40))
+        self.assertNotIn('b', cache)
+        self.assertEqual(cache.get_stats(), {'entries': 2, 'nbytes': 80, 'max_bytes': 100, 'evictions': 1})
+
+        self.assertTrue(cache.put('a', 4, 10))  # replaced entry is accounted once
+        self.assertEqual(cache.nbytes, 50)
+
+        self.assertFalse(cache.put('d', 5, 101))
+        self.assertNotIn('d', cache)
+
+        self.assertEqual(cache.pop('c'), 3)
+        self.assertIsNone(cache.pop('c'))
+        self.assertEqual(cache.nbytes, 10)
+
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.nbytes, 0)
+
+        with self.assertRaises(ValueError):
+            ResponseCache(max_bytes=-1)
@@ -0,0 +1,144 @@
+import json
+import requests_mock
+
+from unittest import TestCase
+from unittest.mock import patch
+
+from pystexchapi.api import StocksExchangeAPI
+from pystexchapi.candles import parse_interval, resample, candles_from_trades, CandleSeries, CandleStore, \
+    format_date
+from pystexchapi.request import STOCK_EXCHANGE_BASE_URL
+from pystexchapi.utils import Deadline
+from tests import TRADE_HISTORY_RESPONSE
+
+
+START = 1523404800  # 2018-04-11 00:00:00 UTC
+
+
+def make_candles(hours: int, start: int=START) -> list:
+    candles = []
+    for hour in range(hours):
+        price = 100 + (hour * 7) % 13
+        candles.append({
+            'open': '{}.1'.format(price),
+            'close': '{}.2'.format(price),
+            'low': '{}.0'.format(price - 1),
+            'high': '{}.5'.format(price + 1),
+            'date': format_date(start + hour * 3600)
+        })
+    return candles
+
+
+class TestCandles(TestCase):
+
+    def test_parse_interval(self):
+        self.assertEqual(parse_interval('4H'), 4 * 3600)
+        self.assertEqual(parse_interval('1W'), 7 * 86400)
+
+        for interval in ('1M', '0H', 'H', 4):
+            with self.assertRaises(ValueError):
+                parse_interval(interval)
+
+    def test_resample(self):
+        candles = make_candles(48)
+        daily = resample(candles, '1D')
+
+        self.assertEqual(len(daily), 2)
+        self.assertEqual(daily[0]['date'], '2018-04-11 00:00:00')
+        self.assertEqual(daily[1]['date'], '2018-04-12 00:00:00')
+        self.assertEqual(daily[0]['open'], candles[0]['open'])
+        self.assertEqual(daily[0]['close'], candles[23]['close'])
+        self.assertEqual(daily[0]['high'], max((c['high'] for c in candles[:24]), key=float))
+        self.assertEqual(daily[1]['low'], min((c['low'] for c in candles[24:]), key=float))
+
+        weekly = resample(candles, '1W')
+        self.assertEqual([c['date'] for c in weekly], ['2018-04-09 00:00:00'])  # Monday
+
+    def test_candles_from_trades(self):
+        trades = json.loads(TRADE_HISTORY_RESPONSE)['result']
+        self.assertEqual(len(candles_from_trades(trades, '4H')), 3)
+
+        candles = candles_from_trades(trades, '12H')
+        self.assertEqual(candles, [{'open': '0.00003250', 'close': '0.00003251', 'low': '0.00003250',
+                                    'high': '0.00003989', 'date': '2018-04-11 12:00:00'}])
+
+    def test_incremental_update(self):
+        candles = make_candles(30)
+        series = CandleSeries('1H')
+        self.assertEqual(series.update(candles[:10]), 10)
+        self.assertEqual(series.get('4H'), resample(candles[:10], '4H'))
+
+        unclosed = dict(candles[9], close='1.0')
+        self.assertEqual(series.update([unclosed]), 1)
+        self.assertEqual(series.get('4H')[-1]['close'], '1.0')
+
+        self.assertEqual(series.update(candles[9:]), 21)
+        self.assertEqual(series.update(candles[20:]), 0)
+        self.assertEqual(series.get('4H'), resample(candles, '4H'))
+        self.assertEqual(series.get('1D'), resample(candles, '1D'))
+        self.assertEqual(series.get('1H'), candles)
+
+        # base candles start in the middle of the first day
+        series = CandleSeries('1H')
+        series.update(make_candles(30, start=START + 3 * 3600))
+        self.assertEqual([c['date'] for c in series.get('1D')], ['2018-04-12 00:00:00'])
+
+        self.assertFalse(series.can_derive('1H'))
+        with self.assertRaises(ValueError):
+            CandleSeries('5H').get('1D')
+
+    @requests_mock.Mocker()
+    def test_store(self, m):
+        candles = make_candles(30)
+        pages = [candles[:25], candles[24:]]
+
+        def grafic(request, context):
+            return json.dumps({'success': 1, 'data': {'graf': pages.pop(0)}})
+
+        url = STOCK_EXCHANGE_BASE_URL.format(method='grafic_public')
+        m.register_uri('GET', url, text=grafic)
+
+        store = CandleStore(StocksExchangeAPI(), base_interval='1H')
+        response = store.grafic('ETH', 'BTC', interval='4H', count=2)
+        self.assertEqual(response.data['data']['graf'], resample(candles[:25], '4H')[-2:][::-1])
+        self.assertNotIn('since', m.last_request.qs)
+        self.assertEqual(m.last_request.qs['order'], ['desc'])  # the latest candles
+
+        response = store.grafic('ETH', 'BTC', interval='1D', order='ASC')
+        self.assertEqual(response.data['data']['graf'], resample(candles, '1D'))
+        self.assertEqual(m.last_request.qs['since'], [candles[24]['date'].lower()])
+        self.assertEqual(m.last_request.qs['interval'], ['1h'])
+
+        response = store.grafic('ETH', 'BTC', interval='1D', refresh=False)
+        self.assertEqual(m.call_count, 2)
+        self.assertEqual(response.data['data']['count'], '2')
+
+        pages.append(candles[:1])
+        store.grafic('ETH', 'BTC', interval='1M')  # months cannot be built locally
+        self.assertEqual(m.last_request.qs['interval'], ['1m'])
+
+    @requests_mock.Mocker()
+    def test_store_from_trades(self, m):
+        pages = [make_candles(17)]
+        m.register_uri('GET', STOCK_EXCHANGE_BASE_URL.format(method='grafic_public'),
+                       text=lambda request, context: json.dumps({'success': 1, 'data': {'graf': pages.pop(0)}}))
+        m.register_uri('GET', STOCK_EXCHANGE_BASE_URL.format(method='trades'), text=TRADE_HISTORY_RESPONSE)
+
+        store = CandleStore(StocksExchangeAPI(), base_interval='1H', use_trades=True)
+        store.refresh('ETH', 'BTC')
+        series = store.refresh('ETH', 'BTC')
+        self.assertEqual([c['date'] for c in series.candles[-3:]],
+                         ['2018-04-11 16:00:00', '2018-04-11 17:00:00', '2018-04-11 20:00:00'])
+        self.assertEqual(series.candles[-1]['close'], '0.00003251')
+        self.assertEqual(m.call_count, 2)
+
+        # trades start after the last cached candle
+        api = StocksExchangeAPI()
+        store = CandleStore(api, base_interval='1H', use_trades=True)
+        store.get_series('ETH_BTC').update(make_candles(10))
+        pages.append(make_candles(11)[9:])
+        deadline = Deadline(10.0)
+        with patch.object(api, 'call', wraps=api.call) as call:
+            self.assertEqual(store.refresh('ETH', 'BTC', deadline=deadline).last_date, '2018-04-11 10:00:00')
+        self.assertEqual(m.last_request.qs['since'], ['2018-04-11 09:00:00'])
+        self.assertEqual([c[1]['deadline'] for c in call.call_args_list], [deadline, deadline])
@@ -0,0 +1,48 @@
+import gzip
+import zlib
+import requests_mock
+
+from unittest import TestCase
+
+from pystexchapi.api import StocksExchangeAPI
+from pystexchapi.compression import decompress_stream, make_decompressor, ACCEPT_ENCODING
+from pystexchapi.request import STOCK_EXCHANGE_BASE_URL
+from tests import TICKER_RESPONSE
+
+
+class TestCompression(TestCase):
+
+    def test_decompress_stream(self):
+        payload = TICKER_RESPONSE.encode('utf-8') * 10
+        compressed = zlib.compress(gzip.compress(payload))
+        chunks = [compressed[i:i + 7] for i in range(0, len(compressed), 7)]
+
+        content, wire_bytes = decompress_stream(chunks, 'gzip, deflate')
+        self.assertEqual(content, payload)
+        self.assertEqual(wire_bytes, len(compressed))
+
+        content, wire_bytes = decompress_stream([payload], None)
+        self.assertEqual(content, payload)
+        self.assertEqual(wire_bytes, len(payload))
+
+        with self.assertRaises(ValueError):
+            make_decompressor('compress')
+
+    @requests_mock.Mocker()
+    def test_transfer_stats(self, m):
+        payload = TICKER_RESPONSE.encode('utf-8')
+        compressed = gzip.compress(payload)
+        m.register_uri('GET', STOCK_EXCHANGE_BASE_URL.format(method='ticker'), content=compressed,
+                       headers={'Content-Encoding': 'gzip'})
+
+        api = StocksExchangeAPI()
+        self.assertEqual(len(api.call('ticker').data), 1)
+        self.assertEqual(m.request_history[0].headers['Accept-Encoding'], ACCEPT_ENCODING)
+        self.assertIn('gzip', ACCEPT_ENCODING)
+
+        api.call('ticker')
+        stats = api.transfer_stats.get('ticker')
+        self.assertEqual(stats['calls'], 2)
+        self.assertEqual(stats['wire_bytes'], 2 * len(compressed))
+        self.assertEqual(stats['decoded_bytes'], 2 * len(payload))
+        self.assertIn('ticker', api.transfer_stats.summary())
@@ -0,0 +1,105 @@
+import json
+import logging
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import TestCase
+
+from pystexchapi.api import StocksExchangeAPI
+from pystexchapi.request import STOCK_EXCHANGE_BASE_URL
+from pystexchapi.transport import RequestsTransport
+from tests import TICKER_RESPONSE, MARKETS_RESPONSE, GET_ACCOUNT_INFO_RESPONSE
+
+
+THREADS = 16
+CALLS = 400
+
+
+class FakeExchangeHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def _reply(self, payload: str):
+        body = payload.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.paths.append(self.path)
+        self._reply(MARKETS_RESPONSE if self.path.endswith('/markets') else TICKER_RESPONSE)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        with self.server.lock:
+            self.server.nonces.append(body['nonce'])
+        self._reply(GET_ACCOUNT_INFO_RESPONSE)
+
+    def log_message(self, *args):
+        pass
+
+
+class LocalTransport(RequestsTransport):
+    """
+    Sends requests to local server instead of exchange through the same pooled session
+    """
+
+    def __init__(self, base_url: str, **kwargs):
+        super(LocalTransport, self).__init__(**kwargs)
+        self.base_url = base_url
+
+    def send(self, request, verify: bool=True, timeout=None):
+        request.url = request.url.replace(STOCK_EXCHANGE_BASE_URL.format(method=''), self.base_url)
+        return super(LocalTransport, self).send(request, verify=verify, timeout=timeout)
+
+
+class TestSharedAPI(TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeExchangeHandler)
+        self.server.daemon_threads = True
+        self.server.lock = threading.Lock()
+        self.server.paths = []
+        self.server.nonces = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        base_url = 'http://127.0.0.1:{}/api2/'.format(self.server.server_address[1])
+        self.api = StocksExchangeAPI(api_key='key', api_secret='secret', transport=LocalTransport(base_url))
+
+    def tearDown(self):
+        self.api.transport.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _call(self, i: int):
+        if i % 4 == 0:
+            return self.api.get_account_info()
+        if i % 4 == 1:
+            return self.api.markets(with_saving=True)
+        return self.api.ticker()
+
+    def test_shared_instance(self):
+        with self.assertLogs('urllib3', level=logging.DEBUG) as logs:
+            with ThreadPoolExecutor(max_workers=THREADS) as executor:
+                responses = list(executor.map(self._call, range(CALLS)))
+            logging.getLogger('urllib3').debug('done')
+
+        self.assertTrue(all(r.data for r in responses))
+
+        # every private call got its own nonce
+        self.assertEqual(len(self.server.nonces), CALLS // 4)
+        self.assertEqual(len(set(self.server.nonces)), CALLS // 4)
+
+        # concurrent saved calls of the same request wait for one fetch
+        self.assertEqual(self.server.paths.count('/api2/markets'), 1)
+        self.assertEqual(self.server.paths.count('/api2/ticker'), CALLS // 2)
+
+        self.assertEqual(self.api.transfer_stats.get('ticker')['calls'], CALLS // 2)
+        self.assertEqual(self.api.transfer_stats.get('GetInfo')['calls'], CALLS // 4)
+        self.assertEqual(self.api.transfer_stats.get('markets')['calls'], 1)
+
+        # pool keeps connection of every thread
+        self.assertFalse([line for line in logs.output if 'Connection pool is full' in line])
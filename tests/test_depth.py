@@ -0,0 +1,71 @@
+import json
+import math
+
+from unittest import TestCase
+
+from pystexchapi.depth import OrderbookDepth
+from pystexchapi.response import APIResponse
+from tests import ORDERBOOK_RESPONSE
+
+
+def levels(*pairs):
+    return [{'Rate': rate, 'Quantity': quantity} for rate, quantity in pairs]
+
+
+class TestOrderbookDepth(TestCase):
+
+    def setUp(self):
+        # levels come unsorted, bids 100@3, 99@2, 98@1 and asks 101@1, 102@2, 103@3
+        self.book = OrderbookDepth(buy=levels(('99', '2'), ('100', '3'), ('98', '1')),
+                                   sell=levels(('103', '3'), ('101', '1'), ('102', '2')))
+
+    def assertListAlmostEqual(self, first, second):
+        self.assertEqual(len(first), len(second))
+        for a, b in zip(first, second):
+            if math.isnan(b):
+                self.assertTrue(math.isnan(a))
+            else:
+                self.assertAlmostEqual(float(a), b)
+
+    def test_spread(self):
+        self.assertEqual(self.book.best_bid, 100.0)
+        self.assertEqual(self.book.best_ask, 101.0)
+        self.assertEqual(self.book.spread, 1.0)
+        self.assertEqual(self.book.mid, 100.5)
+        self.assertAlmostEqual(self.book.relative_spread, 1 / 100.5)
+
+        prices, depth = self.book.depth('SELL')
+        self.assertListAlmostEqual(prices, [100, 99, 98])
+        self.assertListAlmostEqual(depth, [3, 5, 6])
+
+    def test_cost_to_fill(self):
+        self.assertListAlmostEqual(self.book.cost_to_fill('BUY', [0, 0.5, 1, 2, 6, 7]),
+                                   [0, 50.5, 101, 203, 614, float('nan')])
+        self.assertAlmostEqual(self.book.cost_to_fill('SELL', 4), 399)
+        self.assertTrue(math.isnan(self.book.cost_to_fill('SELL', 6.5)))
+
+        self.assertAlmostEqual(self.book.vwap('BUY', 2), 101.5)
+        self.assertListAlmostEqual(self.book.vwap('SELL', [0, 4]), [100, 99.75])
+
+        self.assertAlmostEqual(self.book.slippage('BUY', 2), 0.5 / 101)
+        self.assertListAlmostEqual(self.book.slippage('SELL', [1, 4]), [0, 0.0025])
+
+        with self.assertRaises(ValueError):
+            self.book.cost_to_fill('buy', 1)
+
+    def test_imbalance(self):
+        self.assertEqual(self.book.imbalance(), 0.0)
+        self.assertEqual(self.book.imbalance(levels=1), 0.5)
+        self.assertEqual(self.book.imbalance(band=0.006), 0.5)
+        self.assertEqual(self.book.imbalance(band=0.02), 0.25)
+
+    def test_from_response(self):
+        book = OrderbookDepth.from_response(APIResponse(json.loads(ORDERBOOK_RESPONSE)))
+        self.assertEqual(book.best_bid, 100.0)
+        self.assertEqual(book.best_ask, 0.5)
+        self.assertAlmostEqual(book.cost_to_fill('BUY', 0.00001995), 0.00001995 * 0.5)
+
+        empty = OrderbookDepth.from_response({'success': 1, 'result': {'buy': [], 'sell': []}})
+        self.assertTrue(math.isnan(empty.spread))
+        self.assertTrue(math.isnan(empty.imbalance()))
+        self.assertTrue(math.isnan(empty.cost_to_fill('BUY', 1)))
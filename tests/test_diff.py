@@ -0,0 +1,43 @@
+from unittest import TestCase
+
+from pystexchapi.diff import SnapshotDiffer
+
+
+def make_row(market_name, bid, ask, server_time=1520779505):
+    return {'market_name': market_name, 'bid': bid, 'ask': ask, 'server_time': server_time}
+
+
+class TestSnapshotDiffer(TestCase):
+
+    def test_update(self):
+        differ = SnapshotDiffer()
+
+        delta = differ.update([make_row('MUN_BTC', '0.1', '0.2'), make_row('ETH_BTC', '0.3', '0.4')])
+        self.assertEqual(len(delta.added), 2)
+        self.assertFalse(delta.removed)
+        self.assertFalse(delta.changed)
+
+        # server time is ignored by default, so nothing moved
+        delta = differ.update([make_row('MUN_BTC', '0.1', '0.2', 1), make_row('ETH_BTC', '0.3', '0.4', 1)])
+        self.assertFalse(delta)
+
+        delta = differ.update([make_row('MUN_BTC', '0.1', '0.25'), make_row('PRG_BTC', '0.5', '0.6')])
+        self.assertEqual([r['market_name'] for r in delta.added], ['PRG_BTC'])
+        self.assertEqual([r['market_name'] for r in delta.removed], ['ETH_BTC'])
+        self.assertEqual(len(delta.changed), 1)
+
+        change = delta.changed[0]
+        self.assertEqual(change.key, 'MUN_BTC')
+        self.assertEqual(change.fields, ('ask',))
+        self.assertEqual(change.previous['ask'], '0.2')
+        self.assertEqual(change.row['ask'], '0.25')
+
+        self.assertEqual(set(differ.snapshot), {'MUN_BTC', 'PRG_BTC'})
+
+    def test_reset(self):
+        differ = SnapshotDiffer(ignored_fields=())
+        differ.update([make_row('MUN_BTC', '0.1', '0.2')])
+        self.assertEqual(len(differ.update([make_row('MUN_BTC', '0.1', '0.2', 2)]).changed), 1)
+
+        differ.reset()
+        self.assertEqual(len(differ.update([make_row('MUN_BTC', '0.1', '0.2')]).added), 1)
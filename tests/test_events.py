@@ -0,0 +1,133 @@
+import asyncio
+import json
+import requests_mock
+import time
+
+from unittest import TestCase
+
+from pystexchapi.api import StocksExchangeAPI
+from pystexchapi.events import EventBus, TOPIC
+from pystexchapi.request import STOCK_EXCHANGE_BASE_URL
+from tests import PRICES_RESPONSE, ORDERBOOK_RESPONSE, GET_ACCOUNT_INFO_RESPONSE
+
+
+TICKER = json.loads(PRICES_RESPONSE)
+
+
+class TestEventBus(TestCase):
+
+    def setUp(self):
+        self.api = StocksExchangeAPI(api_key='key', api_secret='secret')
+        self.bus = EventBus(self.api)
+        self.events = []
+
+    def tearDown(self):
+        self.bus.close()
+
+    def test_plan(self):
+        self.assertEqual(self.bus.plan(), [])
+
+        self.bus.subscribe(TOPIC.ticker('BTC_USDT'), self.events.append)
+        self.bus.subscribe(TOPIC.ticker('PRG_BTC'), self.events.append)
+        self.bus.subscribe(TOPIC.ticker(), self.events.append)
+        token = self.bus.subscribe(TOPIC.orderbook('ETH_BTC'), self.events.append)
+        self.bus.subscribe(TOPIC.orderbook('ETH_BTC'), self.events.append)
+        self.bus.subscribe(TOPIC.BALANCES, self.events.append)
+
+        self.assertEqual([p[0] for p in self.bus.plan()], ['ticker', 'orderbook', 'get_account_info'])
+        self.assertEqual(self.bus.plan()[1][1], {'currency1': 'ETH', 'currency2': 'BTC'})
+
+        self.bus.unsubscribe(token)
+        self.assertEqual(len(self.bus.plan()), 3)  # one more subscriber of orderbook is left
+
+        with self.assertRaises(ValueError):
+            self.bus.subscribe('trades:ETH_BTC', self.events.append)
+
+        with self.assertRaises(ValueError):
+            self.bus.subscribe(TOPIC.ORDERBOOK, self.events.append)
+
+    @requests_mock.Mocker()
+    def test_poll_once(self, m):
+        m.register_uri('GET', STOCK_EXCHANGE_BASE_URL.format(method='ticker'), text=PRICES_RESPONSE)
+        m.register_uri('GET', STOCK_EXCHANGE_BASE_URL.format(method='orderbook'), text=ORDERBOOK_RESPONSE)
+        m.register_uri('POST', STOCK_EXCHANGE_BASE_URL.format(method=''), text=GET_ACCOUNT_INFO_RESPONSE)
+
+        self.bus.subscribe(TOPIC.ticker('BTC_USDT'), self.events.append)
+        self.bus.subscribe(TOPIC.orderbook('BTC_NXT'), self.events.append)
+        self.bus.subscribe(TOPIC.BALANCES, self.events.append)
+
+        self.assertEqual(self.bus.poll_once(), 3)
+        self.assertEqual(self.bus.poll_once(), 3)  # nothing changed
+
+        changed = [dict(row) for row in TICKER]
+        changed[1]['buy'] = '6500'
+        m.register_uri('GET', STOCK_EXCHANGE_BASE_URL.format(method='ticker'), text=json.dumps(changed))
+        self.bus.poll_once()
+        self.bus.close()
+
+        topics = [e.topic for e in self.events]
+        self.assertEqual(sorted(topics), sorted(['ticker:BTC_USDT', 'orderbook:BTC_NXT', 'balances',
+                                                 'ticker:BTC_USDT']))
+        ticker_events = [e for e in self.events if e.topic == 'ticker:BTC_USDT']
+        self.assertEqual(ticker_events[-1].data['buy'], '6500')
+        self.assertEqual(m.call_count, 9)
+
+    @requests_mock.Mocker()
+    def test_asyncio_queue(self, m):
+        m.register_uri('GET', STOCK_EXCHANGE_BASE_URL.format(method='ticker'), text=PRICES_RESPONSE)
+
+        async def consume():
+            queue = asyncio.Queue()
+            self.bus.subscribe_queue(TOPIC.ticker(), queue, asyncio.get_running_loop())
+            await asyncio.get_running_loop().run_in_executor(None, self.bus.poll_once)
+            return await asyncio.wait_for(queue.get(), 5.0)
+
+        event = asyncio.run(consume())
+        self.assertEqual(len(event.data.added), 3)
+
+    @requests_mock.Mocker()
+    def test_failed_topic(self, m):
+        m.register_uri('GET', STOCK_EXCHANGE_BASE_URL.format(method='orderbook'), status_code=503)
+        m.register_uri('POST', STOCK_EXCHANGE_BASE_URL.format(method=''), text=GET_ACCOUNT_INFO_RESPONSE)
+
+        self.bus.subscribe(TOPIC.orderbook('BTC_NXT'), self.events.append)
+        self.bus.subscribe(TOPIC.BALANCES, self.events.append)
+
+        with self.assertLogs('pystexchapi.events', level='ERROR'):
+            self.assertEqual(self.bus.poll_once(), 2)
+        self.bus.close()
+        self.assertEqual([e.topic for e in self.events], ['balances'])
+
+    @requests_mock.Mocker()
+    def test_resubscribe_gets_state(self, m):
+        m.register_uri('GET', STOCK_EXCHANGE_BASE_URL.format(method='ticker'), text=PRICES_RESPONSE)
+        m.register_uri('GET', STOCK_EXCHANGE_BASE_URL.format(method='orderbook'), text=ORDERBOOK_RESPONSE)
+
+        token = self.bus.subscribe(TOPIC.orderbook('BTC_NXT'), self.events.append)
+        self.bus.subscribe(TOPIC.ticker(), self.events.append)
+        self.bus.poll_once()
+
+        # new subscribers of ticker pair and of the same orderbook get current state once
+        self.bus.unsubscribe(token)
+        self.bus.subscribe(TOPIC.orderbook('BTC_NXT'), self.events.append)
+        self.bus.subscribe(TOPIC.ticker('BTC_USDT'), self.events.append)
+        self.bus.poll_once()
+        self.bus.poll_once()
+        self.bus.close()
+
+        topics = [e.topic for e in self.events]
+        self.assertEqual(sorted(topics), ['orderbook:BTC_NXT', 'orderbook:BTC_NXT', 'ticker', 'ticker:BTC_USDT'])
+        self.assertEqual(len([e for e in self.events if e.topic == 'ticker'][0].data.added), 3)
+
+    def test_ordered_dispatch(self):
+        received = []
+
+        def slow(event):
+            time.sleep(0.01 if event.data % 2 else 0)
+            received.append(event.data)
+
+        self.bus.subscribe(TOPIC.BALANCES, slow)
+        for i in range(20):
+            self.bus._publish(TOPIC.BALANCES, i)
+        self.bus.close()
+        self.assertEqual(received, list(range(20)))
@@ -0,0 +1,92 @@
+import json
+import requests_mock
+
+from decimal import Decimal
+from unittest import TestCase
+
+from pystexchapi.api import StocksExchangeAPI
+from pystexchapi.fixed import FixedPoint, MarketPrecisions
+from pystexchapi.request import TradeRequest, WithdrawRequest, STOCK_EXCHANGE_BASE_URL
+from tests import MARKETS_RESPONSE, ORDERBOOK_RESPONSE
+
+
+class TestFixedPoint(TestCase):
+
+    def test_arithmetic(self):
+        bid = FixedPoint('0.00002905')
+        self.assertEqual(bid.value, 2905)
+        self.assertEqual(str(bid), '0.00002905')
+        self.assertEqual(repr(bid), "FixedPoint('0.00002905', 8)")
+
+        self.assertEqual(bid + FixedPoint('0.00000095'), FixedPoint('0.00003'))
+        self.assertEqual(bid - '0.00002905', 0)
+        self.assertEqual(1 - FixedPoint('0.25', 2), FixedPoint('0.75', 2))
+        self.assertEqual(bid * 2, FixedPoint('0.0000581'))
+        self.assertEqual(FixedPoint('1.5', 2) * FixedPoint('0.333', 3), FixedPoint('0.499', 3))
+        self.assertEqual(FixedPoint('1', 8) / 3, FixedPoint('0.33333333'))
+        self.assertEqual(FixedPoint('-1', 2) / FixedPoint('3', 2), FixedPoint('-0.33', 2))
+        self.assertEqual(1 / FixedPoint('4', 2), FixedPoint('0.25', 2))
+        self.assertEqual('1' / FixedPoint('3', 2), FixedPoint('0.33', 2))
+        self.assertEqual(str(FixedPoint('-0.05', 2)), '-0.05')
+
+        # sums are exact, unlike floats
+        self.assertEqual(sum([FixedPoint('0.1')] * 3, FixedPoint()), FixedPoint('0.3'))
+
+    def test_comparison(self):
+        self.assertEqual(FixedPoint('1.10', 2), FixedPoint('1.1', 3))
+        self.assertEqual(hash(FixedPoint('1.10', 2)), hash(FixedPoint('1.1', 3)))
+        self.assertEqual(FixedPoint('1'), 1)
+        self.assertEqual(hash(FixedPoint('1')), hash(1))
+        self.assertEqual(hash(FixedPoint('0.5')), hash(Decimal('0.5')))
+        self.assertEqual(len({FixedPoint('2'), 2, Decimal('2.00')}), 1)
+        self.assertNotEqual(FixedPoint(1), 'abc')
+        self.assertFalse(FixedPoint(1) == 'abc')
+        self.assertNotEqual(FixedPoint('1'), '1')  # like Decimal, never equal to strings
+        with self.assertRaises(TypeError):
+            FixedPoint('1') < '2'
+        self.assertEqual(FixedPoint('1') + '0.5', FixedPoint('1.5'))
+        self.assertLess(FixedPoint('0.1'), FixedPoint('0.2'))
+        self.assertGreater(FixedPoint('0.1'), 0)
+        self.assertFalse(FixedPoint(0))
+        self.assertEqual(FixedPoint('2.5').to_decimal(), Decimal('2.5'))
+        self.assertEqual(float(FixedPoint('2.5')), 2.5)
+        self.assertEqual(int(FixedPoint('-2.5')), -2)
+        self.assertEqual(FixedPoint('1.23456', 2).value, 123)  # truncated to scale
+
+    def test_market_precisions(self):
+        precisions = MarketPrecisions(json.loads(MARKETS_RESPONSE))
+        self.assertIn('BTC_USDT', precisions)
+        self.assertEqual(precisions.get('BTC_USDT'), (8, 8))
+        self.assertEqual(precisions.amount('BTC_USDT', '1.5').value, 150000000)
+
+        book = precisions.orderbook('BTC_NXT', json.loads(ORDERBOOK_RESPONSE))
+        self.assertEqual(book['buy'][0], (FixedPoint('58.27632628'), FixedPoint('0.00189631')))
+        self.assertEqual(len(book['sell']), 2)
+
+    def test_requests_body(self):
+        req = TradeRequest(_type='BUY', currency1='BTC', currency2='USDT', amount=FixedPoint('0.5'),
+                           rate=FixedPoint('6401.1', 2), api_key=b'key', api_secret=b'secret')
+        self.assertEqual(req.json['amount'], '0.50000000')
+        self.assertEqual(req.json['rate'], '6401.10')
+
+        with self.assertRaises(ValueError):
+            TradeRequest(_type='BUY', currency1='BTC', currency2='USDT', amount=FixedPoint('-0.5'), rate=1,
+                         api_key=b'key', api_secret=b'secret')
+
+        req = WithdrawRequest(currency='BTC', address='XXX', amount=Decimal('0.1'), api_key=b'key',
+                              api_secret=b'secret')
+        self.assertEqual(req.json['amount'], '0.1')
+        self.assertIn('"amount": "0.1"', req.prepare().body)
+
+    @requests_mock.Mocker()
+    def test_columns_by_precision(self, m):
+        m.register_uri('GET', STOCK_EXCHANGE_BASE_URL.format(method='orderbook'), text=ORDERBOOK_RESPONSE)
+        markets = [{'market_name': 'BTC_NXT', 'currency_precision': 10, 'partner_precision': 4}]
+        api = StocksExchangeAPI(numeric_columns='fixed', market_precisions=MarketPrecisions(markets))
+
+        response = api.call('orderbook', currency1='BTC', currency2='NXT')
+        self.assertEqual(response.column('Rate', table='buy')[0], 582763)  # 58.27632628 at scale 4
+        self.assertEqual(response.column('Quantity', table='buy')[0], 18963100)  # 0.00189631 at scale 10
+
+        response = api.call('orderbook', currency1='ETH', currency2='BTC')  # unknown pair
+        self.assertEqual(response.column('Rate', table='buy')[0], 5827632628)
@@ -0,0 +1,115 @@
+import itertools
+import threading
+import time
+import requests_mock
+
+from unittest import TestCase
+
+from pystexchapi.api import StocksExchangeAPI
+from pystexchapi.hedging import LatencyTracker, Hedger
+from pystexchapi.request import STOCK_EXCHANGE_BASE_URL
+from tests import TICKER_RESPONSE
+
+
+class TestLatencyTracker(TestCase):
+
+    def test_percentile(self):
+        tracker = LatencyTracker(window=100)
+        self.assertIsNone(tracker.percentile(95))
+
+        for latency in range(1, 201):
+            tracker.record(latency / 1000.0)
+
+        self.assertEqual(len(tracker), 100)  # only last calls are kept
+        self.assertEqual(tracker.percentile(0), 0.101)
+        self.assertEqual(tracker.percentile(50), 0.151)
+        self.assertEqual(tracker.percentile(100), 0.2)
+
+
+class TestHedger(TestCase):
+
+    def setUp(self):
+        self.hedger = Hedger(percentile=50, budget=0.5, min_samples=5)
+        for _ in range(5):
+            self.hedger.record('ticker', 0.01)
+
+    def tearDown(self):
+        self.hedger.close()
+
+    def test_hedge_slow_request(self):
+        calls = itertools.count()
+        release = threading.Event()
+
+        def send():
+            if next(calls) == 0:
+                release.wait(5.0)  # primary request stalls
+                return 'primary'
+            return 'hedge'
+
+        started = time.monotonic()
+        self.assertEqual(self.hedger.run('ticker', send), 'hedge')
+        self.assertLess(time.monotonic() - started, 1.0)
+        release.set()
+
+        stats = self.hedger.get_stats()
+        self.assertEqual(stats['requests'], 1)
+        self.assertEqual(stats['hedges'], 1)
+        self.assertEqual(stats['delays'], {'ticker': 0.01})
+
+        # budget is exhausted: 2 hedges would exceed half of 2 requests
+        release.clear()
+        calls = itertools.count()
+        threading.Timer(0.1, release.set).start()
+        self.assertEqual(self.hedger.run('ticker', send), 'primary')
+        self.assertEqual(self.hedger.get_stats()['hedges'], 1)
+
+    def test_primary_in_caller_thread(self):
+        caller = threading.current_thread()
+        in_caller = lambda: threading.current_thread() is caller
+
+        self.assertTrue(self.hedger.run('orderbook', in_caller))  # no observations
+
+        hedger = Hedger(percentile=50, budget=0.0, min_samples=1)
+        hedger.record('ticker', 0.01)
+        self.assertTrue(hedger.run('ticker', in_caller))  # no budget for hedge
+        hedger.close()
+
+        # pool is busy with other hedged calls
+        hedger = Hedger(percentile=50, budget=1.0, min_samples=1, max_workers=2)
+        hedger.record('ticker', 1.0)
+        release = threading.Event()
+        busy = threading.Thread(target=hedger.run, args=('ticker', release.wait))
+        busy.start()
+        time.sleep(0.05)
+        self.assertTrue(hedger.run('ticker', in_caller))
+        release.set()
+        busy.join()
+        self.assertFalse(hedger.run('ticker', in_caller))  # workers are released
+        hedger.close()
+
+    def test_no_hedge_without_observations(self):
+        self.assertEqual(self.hedger.run('orderbook', lambda: 'primary'), 'primary')
+
+        def fail():
+            raise ValueError()
+
+        with self.assertRaises(ValueError):
+            self.hedger.run('orderbook', fail)
+
+        with self.assertRaises(ValueError):
+            Hedger(percentile=100)
+
+    @requests_mock.Mocker()
+    def test_api_hedges_only_public_methods(self, m):
+        m.register_uri('GET', STOCK_EXCHANGE_BASE_URL.format(method='ticker'), text=TICKER_RESPONSE)
+        api = StocksExchangeAPI(api_key='key', api_secret='secret', hedging={'budget': 1.0, 'min_samples': 1})
+
+        for _ in range(3):
+            self.assertEqual(len(api.call('ticker', hedge=True).data), 1)
+        self.assertEqual(api.hedger.get_stats()['requests'], 3)
+
+        with self.assertRaises(ValueError):
+            api.call('get_account_info', hedge=True)
+
+        with self.assertRaises(ValueError):
+            StocksExchangeAPI().call('ticker', hedge=True)  # hedging is not configured
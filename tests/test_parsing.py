@@ -0,0 +1,63 @@
+import json
+import requests_mock
+
+from unittest import TestCase
+
+from pystexchapi.api import StocksExchangeAPI
+from pystexchapi.exc import APIDataException, APIResponseParsingException
+from pystexchapi.parsing import ParsePool
+from pystexchapi.request import STOCK_EXCHANGE_BASE_URL
+from pystexchapi.response import LazyAPIResponse
+from tests import TICKER_RESPONSE, GENERIC_ERROR_RESPONSE
+
+
+class TestParsePool(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.pool = ParsePool(max_workers=1, threshold=0)
+        cls.pool.warm_up()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.close()
+
+    @requests_mock.Mocker()
+    def test_parse_in_pool(self, m):
+        m.register_uri('GET', STOCK_EXCHANGE_BASE_URL.format(method='ticker'), text=TICKER_RESPONSE)
+
+        api = StocksExchangeAPI(parse_pool=self.pool, numeric_columns='float', profiling={})
+        response = api.ticker()
+        self.assertIn('parse_pool', api.profiler.get_stats('ticker')['phases'])
+        self.assertEqual(response.data, json.loads(TICKER_RESPONSE))
+        self.assertEqual(list(response.column('ask')), [float(r['ask']) for r in json.loads(TICKER_RESPONSE)])
+        self.assertEqual(response.nbytes, len(TICKER_RESPONSE))
+
+    @requests_mock.Mocker()
+    def test_errors_from_pool(self, m):
+        m.register_uri('GET', STOCK_EXCHANGE_BASE_URL.format(method='ticker'), text=GENERIC_ERROR_RESPONSE)
+        m.register_uri('GET', STOCK_EXCHANGE_BASE_URL.format(method='prices'), text='{not json')
+
+        api = StocksExchangeAPI(parse_pool=self.pool)
+        with self.assertRaises(APIDataException) as cm:
+            api.ticker()
+        self.assertEqual(cm.exception.msg, 'Invalid request')
+
+        with self.assertRaises(APIResponseParsingException):
+            api.prices()
+
+    @requests_mock.Mocker()
+    def test_threshold(self, m):
+        m.register_uri('GET', STOCK_EXCHANGE_BASE_URL.format(method='ticker'), text=TICKER_RESPONSE)
+
+        with ParsePool(max_workers=1, threshold=len(TICKER_RESPONSE) + 1) as pool:
+            api = StocksExchangeAPI(parse_pool=pool, profiling={})
+            api.ticker()
+            self.assertNotIn('parse_pool', api.profiler.get_stats('ticker')['phases'])
+
+        # lazy responses are not decoded during parsing, so they are not sent to pool
+        api = StocksExchangeAPI(parse_pool=self.pool, lazy_responses=True)
+        self.assertIsInstance(api.ticker(), LazyAPIResponse)
+
+        with self.assertRaises(ValueError):
+            ParsePool(threshold=-1)
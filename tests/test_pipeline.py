@@ -0,0 +1,84 @@
+import json
+import requests_mock
+
+from unittest import TestCase
+
+from pystexchapi.api import StocksExchangeAPI
+from pystexchapi.pipeline import OrderPipeline
+from pystexchapi.request import STOCK_EXCHANGE_BASE_URL
+from tests import TRADE_RESPONSE, CANCEL_ORDER_RESPONSE
+
+
+class TestOrderPipeline(TestCase):
+
+    def setUp(self):
+        self.api = StocksExchangeAPI(api_key='key', api_secret='secret')
+
+    @staticmethod
+    def _response(request, context):
+        if request.json()['method'] == 'Trade':
+            return TRADE_RESPONSE
+        return CANCEL_ORDER_RESPONSE
+
+    @requests_mock.Mocker()
+    def test_replace_orders(self, m):
+        m.register_uri('POST', STOCK_EXCHANGE_BASE_URL.format(method=''), text=self._response)
+
+        orders = [dict(_type='BUY', currency1='BTC', currency2='NXT', amount=1, rate=r) for r in range(1, 6)]
+        with OrderPipeline(self.api, max_workers=4) as pipeline:
+            futures = pipeline.replace_orders(range(100, 105), orders)
+            results = [f.result() for f in futures]
+
+        self.assertEqual(len(results), 10)
+        self.assertTrue(all(r.data['success'] == 1 for r in results))
+        self.assertEqual(m.call_count, 10)
+
+        # nonces are strictly increasing in order of submission
+        bodies = [json.loads(r.text) for r in m.request_history]
+        nonces = {b.get('order_id') or 'rate{}'.format(b.get('rate')): b['nonce'] for b in bodies}
+        submitted = [nonces[i] for i in range(100, 105)] + [nonces['rate{}'.format(r)] for r in range(1, 6)]
+        self.assertEqual(submitted, sorted(submitted))
+        self.assertEqual(len(set(submitted)), 10)
+        self.assertTrue(all('Sign' in r.headers for r in m.request_history))
+
+    @requests_mock.Mocker()
+    def test_invalid_intents(self, m):
+        with OrderPipeline(self.api) as pipeline:
+            with self.assertRaises(ValueError):
+                pipeline.submit('ticker')
+
+            with self.assertRaises(ValueError):
+                pipeline.trade('DUMP', 'BTC', 'NXT', 1, 1)
+
+        self.assertFalse(m.called)
+
+    @requests_mock.Mocker()
+    def test_resign_rejected_nonce(self, m):
+        last_nonce = [0]
+
+        def exchange(request, context):
+            nonce = request.json()['nonce']
+            if nonce <= last_nonce[0]:
+                return json.dumps({'success': 0, 'error': 'Invalid nonce'})
+            last_nonce[0] = nonce
+            return TRADE_RESPONSE
+
+        m.register_uri('POST', STOCK_EXCHANGE_BASE_URL.format(method=''), text=exchange)
+
+        orders = [dict(_type='BUY', currency1='BTC', currency2='NXT', amount=1, rate=r) for r in range(1, 21)]
+        with OrderPipeline(self.api, max_workers=4, nonce_retries=20) as pipeline:
+            futures = [pipeline.trade(**order) for order in orders]
+            results = [f.result() for f in futures]
+
+        self.assertTrue(all(r.data['success'] == 1 for r in results))
+        self.assertGreaterEqual(m.call_count, 20)
+
+    @requests_mock.Mocker()
+    def test_warm_up_timeout(self, m):
+        m.register_uri('HEAD', STOCK_EXCHANGE_BASE_URL.format(method=''))
+
+        with OrderPipeline(self.api) as pipeline:
+            pipeline.warm_up()
+            pipeline.warm_up(timeout=2)
+
+        self.assertEqual([r.timeout for r in m.request_history], [self.api.get_timeout(), 2])
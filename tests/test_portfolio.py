@@ -0,0 +1,148 @@
+import json
+import requests_mock
+
+from decimal import Decimal
+from unittest import TestCase
+from unittest.mock import patch
+
+from pystexchapi.api import StocksExchangeAPI
+from pystexchapi.portfolio import Portfolio
+from pystexchapi.request import STOCK_EXCHANGE_BASE_URL
+from pystexchapi.utils import Deadline
+from tests import TRADE_RESPONSE, CANCEL_ORDER_RESPONSE, WITHDRAW_RESPONSE, DEPOSIT_RESPONSE
+
+
+SERVER_TIME = 1461360000
+
+
+class FakeAccount(object):
+
+    def __init__(self):
+        self.funds = {'BTC': '1.5', 'NXT': '100', 'UAH': '5000'}
+        self.hold_funds = {'BTC': '0.5', 'NXT': '0', 'UAH': '0'}
+        self.transactions = {'DEPOSIT': {}, 'WITHDRAWAL': {}}
+        self.calls = []
+
+    def __call__(self, request, context):
+        body = request.json()
+        self.calls.append(body['method'])
+
+        if body['method'] == 'GetInfo':
+            data = {'funds': self.funds, 'hold_funds': self.hold_funds, 'server_time': SERVER_TIME}
+        elif body['method'] == 'TransHistory':
+            found = sorted(((r['Date'], kind, i) for kind, records in self.transactions.items()
+                            for i, r in records.items() if r['Date'] >= int(body.get('since') or 0)))
+            start = int(body.get('from') or 0)
+            data = {kind: {} for kind in self.transactions}
+            for _, kind, i in found[start:start + int(body['count'])]:
+                data[kind][i] = self.transactions[kind][i]
+        elif body['method'] == 'Trade':
+            return TRADE_RESPONSE
+        elif body['method'] == 'CancelOrder':
+            return CANCEL_ORDER_RESPONSE
+        elif body['method'] == 'Withdraw':
+            return WITHDRAW_RESPONSE
+        else:
+            return DEPOSIT_RESPONSE
+        return json.dumps({'success': 1, 'data': data})
+
+
+def transaction(currency, amount, date, **kwargs):
+    return dict({'Currency': currency, 'Amount': amount, 'Status': 'Finished', 'Date': date}, **kwargs)
+
+
+class TestPortfolio(TestCase):
+
+    def setUp(self):
+        self.api = StocksExchangeAPI(api_key='key', api_secret='secret')
+        self.account = FakeAccount()
+        self.now = 0.0
+        self.portfolio = Portfolio(self.api, reconcile_interval=60, clock=lambda: self.now)
+
+    @requests_mock.Mocker()
+    def test_reads_and_own_calls(self, m):
+        m.register_uri('POST', STOCK_EXCHANGE_BASE_URL.format(method=''), text=self.account)
+
+        self.assertEqual(self.portfolio.available('BTC'), Decimal('1.5'))
+        self.assertEqual(self.portfolio.held('BTC'), Decimal('0.5'))
+        self.assertEqual(self.portfolio.total('BTC'), Decimal('2.0'))
+        self.assertEqual(self.portfolio.available('ETH'), Decimal(0))
+        self.assertEqual(self.account.calls, ['GetInfo'])  # reads after seeding are in memory
+
+        # trade result carries funds after the call
+        self.portfolio.trade(_type='BUY', currency1='NXT', currency2='BTC', amount=1, rate=0.5)
+        self.assertEqual(self.portfolio.available('BTC'), Decimal('254.7'))
+        self.assertEqual(self.portfolio.available('UAH'), Decimal('4680.84'))
+        self.assertEqual(self.portfolio.held('UAH'), Decimal('319.16'))  # taken by the order
+        self.assertEqual(self.portfolio.held('BTC'), Decimal('0.5'))
+
+        # withdrawal of 9 NXT with fee of 1 NXT
+        self.portfolio.withdraw(currency='NXT', address='NXT-C59X-SZRV-V36P-62SW3', amount=9)
+        self.assertEqual(self.portfolio.available('NXT'), Decimal('-10'))
+
+        self.portfolio.deposit(currency='NXT')
+        self.assertEqual(self.account.calls, ['GetInfo', 'Trade', 'Withdraw', 'Deposit'])
+        self.assertEqual(self.portfolio.get_stats()['applied_calls'], 2)
+        self.assertEqual(self.portfolio.balances()['NXT'], (Decimal('-10'), Decimal('100')))
+
+        # cancelled order returns held funds
+        self.portfolio.cancel_order(order_id=5616820)
+        self.assertEqual(self.portfolio.available('UAH'), Decimal('9680.84'))
+        self.assertEqual(self.portfolio.held('UAH'), Decimal(0))
+
+    @requests_mock.Mocker()
+    def test_history_and_reconcile(self, m):
+        m.register_uri('POST', STOCK_EXCHANGE_BASE_URL.format(method=''), text=self.account)
+        self.account.transactions['DEPOSIT']['1'] = transaction('NXT', '50', SERVER_TIME - 10)  # already in funds
+
+        self.assertEqual(self.portfolio.poll(), 0)
+
+        self.account.transactions['DEPOSIT']['2'] = transaction('NXT', '11', SERVER_TIME + 5)
+        self.account.transactions['WITHDRAWAL']['3'] = transaction('BTC', '0.2', SERVER_TIME + 6,
+                                                                   Withdrawal_Fee='0.001BTC')
+        self.assertEqual(self.portfolio.poll(), 2)
+        self.assertEqual(self.portfolio.available('NXT'), Decimal('111'))
+        self.assertEqual(self.portfolio.available('BTC'), Decimal('1.299'))
+        self.assertEqual(self.portfolio.poll(), 0)  # records are applied once
+
+        # own withdrawal is not applied again when it appears in history
+        self.portfolio.withdraw(currency='NXT', address='NXT-C59X-SZRV-V36P-62SW3', amount=9)
+        self.account.transactions['WITHDRAWAL']['17'] = transaction('NXT', '9', SERVER_TIME + 7,
+                                                                    Withdrawal_Fee='1NXT')
+        self.assertEqual(self.portfolio.poll(), 0)
+        self.assertEqual(self.portfolio.available('NXT'), Decimal('101'))
+
+        # reconciliation is due and reports drift from account
+        self.now = 60.0
+        self.account.funds['NXT'] = '100'
+        self.portfolio.poll()
+        self.assertEqual(self.portfolio.drift, {'NXT': (Decimal('101'), Decimal('100')),
+                                                'BTC': (Decimal('1.299'), Decimal('1.5'))})
+        self.assertEqual(self.portfolio.available('NXT'), Decimal('100'))
+        self.assertEqual(self.portfolio.get_stats()['reconciliations'], 2)
+        self.assertEqual(self.account.calls.count('GetInfo'), 2)
+
+    @requests_mock.Mocker()
+    def test_history_pages(self, m):
+        m.register_uri('POST', STOCK_EXCHANGE_BASE_URL.format(method=''), text=self.account)
+        portfolio = Portfolio(self.api, page_size=2, clock=lambda: self.now)
+
+        # transaction at server time of account info is already in funds
+        self.account.transactions['DEPOSIT']['1'] = transaction('NXT', '50', SERVER_TIME)
+        self.assertEqual(portfolio.poll(), 0)
+
+        # full pages sharing one timestamp
+        for i in range(2, 7):
+            self.account.transactions['DEPOSIT'][str(i)] = transaction('NXT', '1', SERVER_TIME + 1)
+        self.assertEqual(portfolio.poll(), 5)
+        self.assertEqual(portfolio.available('NXT'), Decimal('105'))
+        self.assertEqual(portfolio.poll(), 0)
+
+        # all pages share one deadline
+        for i in range(7, 12):
+            self.account.transactions['DEPOSIT'][str(i)] = transaction('NXT', '1', SERVER_TIME + 2)
+        deadline = Deadline(10.0)
+        with patch.object(self.api, 'call', wraps=self.api.call) as call:
+            self.assertEqual(portfolio.poll(deadline=deadline), 5)
+        self.assertEqual(call.call_count, 6)
+        self.assertTrue(all(c[1]['deadline'] is deadline for c in call.call_args_list))
@@ -0,0 +1,81 @@
+import io
+import time
+import requests_mock
+
+from unittest import TestCase
+
+from pystexchapi.api import StocksExchangeAPI
+from pystexchapi.profiling import CallProfile, Profiler, PHASE, SAMPLER, phase, current_profile
+from pystexchapi.request import STOCK_EXCHANGE_BASE_URL
+from tests import TRADE_RESPONSE, TICKER_RESPONSE
+
+
+class TestProfiling(TestCase):
+
+    def test_nested_phases(self):
+        profile = CallProfile('trade')
+        profile.start(PHASE.PREPARE)
+        profile.start(PHASE.SIGN)
+        time.sleep(0.01)
+        profile.stop()
+        profile.stop()
+
+        self.assertGreaterEqual(profile.phases[PHASE.SIGN], 10 ** 7)
+        self.assertLess(profile.phases[PHASE.PREPARE], profile.phases[PHASE.SIGN])  # signing is excluded
+
+        self.assertIsNone(current_profile())
+        with phase(PHASE.SIGN):  # nothing is profiled outside of call
+            pass
+
+    def test_validation(self):
+        with self.assertRaises(ValueError):
+            Profiler(sampler='perf')
+
+        with self.assertRaises(ValueError):
+            Profiler(sample_rate=2)
+
+    @requests_mock.Mocker()
+    def test_phases_of_calls(self, m):
+        m.register_uri('POST', STOCK_EXCHANGE_BASE_URL.format(method=''), text=TRADE_RESPONSE)
+        m.register_uri('GET', STOCK_EXCHANGE_BASE_URL.format(method='ticker'), text=TICKER_RESPONSE)
+
+        api = StocksExchangeAPI(api_key='key', api_secret='secret', profiling={})
+        api.call('trade', _type='BUY', currency1='ETH', currency2='BTC', amount=1.0, rate=0.1)
+        api.trade('SELL', 'ETH', 'BTC', amount=1.0, rate=0.1)
+        api.ticker()
+
+        with self.assertRaises(ValueError):
+            api.trade('HOLD', 'ETH', 'BTC', amount=1.0, rate=0.1)
+
+        stats = api.profiler.get_stats('trade')
+        self.assertEqual(stats['calls'], 3)
+        self.assertEqual(stats['failed'], 1)
+        self.assertEqual(set(stats['phases']), {PHASE.CONSTRUCT, PHASE.PREPARE, PHASE.SIGN, PHASE.NETWORK,
+                                                PHASE.JSON, PHASE.CHECK, PHASE.OTHER})
+        self.assertAlmostEqual(sum(p['share'] for p in stats['phases'].values()), 1.0, places=2)
+
+        self.assertEqual(set(api.profiler.summary()), {'trade', 'ticker'})
+        self.assertNotIn(PHASE.SIGN, api.profiler.get_stats('ticker')['phases'])
+
+        output = io.StringIO()
+        api.profiler.dump(output)
+        self.assertIn('trade: 3 calls, 1 failed', output.getvalue())
+
+        api.profiler.reset()
+        self.assertEqual(api.profiler.summary(), {})
+
+    @requests_mock.Mocker()
+    def test_sampling(self, m):
+        m.register_uri('GET', STOCK_EXCHANGE_BASE_URL.format(method='ticker'), text=TICKER_RESPONSE)
+
+        api = StocksExchangeAPI(profiling={'sampler': SAMPLER.TRACEMALLOC, 'sample_rate': 1.0})
+        api.ticker()
+        self.assertIsInstance(api.profiler.get_allocations('ticker'), list)
+        self.assertEqual(api.profiler.get_allocations('prices'), [])
+
+        api = StocksExchangeAPI(profiling={'sampler': SAMPLER.CPROFILE, 'sample_rate': 1.0})
+        api.ticker()
+        api.ticker()
+        stats = api.profiler.get_cprofile_stats('ticker')
+        self.assertGreater(stats.total_calls, 0)
+        self.assertIsNone(api.profiler.get_cprofile_stats('prices'))
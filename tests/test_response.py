@@ -1,10 +1,15 @@
 import unittest
 import json
+import math
 import requests
 
-from pystexchapi.response import StockExchangeResponseParser, APIResponse
+from decimal import Decimal
+
+from pystexchapi.response import StockExchangeResponseParser, APIResponse, FloatColumnsResponseParser, \
+    FixedPointColumnsResponseParser, DecimalColumnsResponseParser, LazyResponseParser, LazyAPIResponse
 from pystexchapi.exc import APIDataException, APIResponseParsingException
-from tests import TICKER_RESPONSE, GENERIC_ERROR_RESPONSE
+from tests import TICKER_RESPONSE, GENERIC_ERROR_RESPONSE, ORDERBOOK_RESPONSE, TRADE_HISTORY_RESPONSE, \
+    GET_ACCOUNT_INFO_RESPONSE
 
 
 def raise_value_error():
@@ -43,3 +48,63 @@ class TestStockExchangeResponseParser(unittest.TestCase):
 
         with self.assertRaises(APIResponseParsingException):
             StockExchangeResponseParser.parse(response)
+
+    def test_lazy_parser(self):
+        resp = LazyResponseParser.parse(self._make_response(content=TICKER_RESPONSE.encode()))
+        self.assertIsInstance(resp, LazyAPIResponse)
+        self.assertFalse(resp.decoded)
+        self.assertEqual(resp.nbytes, len(TICKER_RESPONSE))
+        self.assertEqual(resp.data, json.loads(TICKER_RESPONSE))
+        self.assertTrue(resp.decoded)
+
+        resp.release()
+        self.assertFalse(resp.decoded)
+        self.assertEqual(resp.data[0]['market_name'], 'MUN_BTC')
+
+        resp = LazyResponseParser.parse(self._make_response(content=GET_ACCOUNT_INFO_RESPONSE.encode()))
+        self.assertFalse(resp.decoded)  # success flag is found without decoding
+
+        with self.assertRaises(APIDataException):
+            LazyResponseParser.parse(self._make_response(content=GENERIC_ERROR_RESPONSE.encode()))
+
+        with self.assertRaises(APIResponseParsingException):
+            LazyResponseParser.parse(self._make_response(content=b'{"error": '))
+
+        # lazy responses are slotted, callers can set their own attributes only on eager ones
+        self.assertFalse(hasattr(resp, '__dict__'))
+        with self.assertRaises(AttributeError):
+            resp.extra = 1
+        eager = APIResponse([])
+        eager.extra = 1
+        self.assertEqual(eager.extra, 1)
+
+        with self.assertRaises(APIResponseParsingException):
+            LazyAPIResponse(b'[{').data
+
+    def test_columnar_parsers(self):
+        resp = FloatColumnsResponseParser.parse(self._make_response(content=TICKER_RESPONSE))
+        self.assertEqual(list(resp.column('bid')), [0.00002905])
+        self.assertEqual(list(resp.column('updated_time')), [1520779505.0])
+        self.assertNotIn('market_name', resp.columns[None])
+        self.assertIsInstance(resp.data, list)  # raw data is kept
+
+        resp = FixedPointColumnsResponseParser.parse(self._make_response(content=ORDERBOOK_RESPONSE))
+        self.assertEqual(list(resp.column('Rate', table='buy')), [5827632628, 10000000000])
+        self.assertEqual(list(resp.column('Quantity', table='sell')), [11358, 1995])
+
+        resp = DecimalColumnsResponseParser.parse(self._make_response(content=TRADE_HISTORY_RESPONSE))
+        self.assertEqual(resp.column('price')[0], Decimal('0.00003251'))
+
+        # ids and timestamps are not scaled
+        resp = FixedPointColumnsResponseParser.parse(self._make_response(content=TRADE_HISTORY_RESPONSE))
+        self.assertEqual(resp.column('timestamp')[0], 1523479914)
+        self.assertEqual(resp.column('price')[0], 3251)
+
+        # fields missing in some rows
+        rows = json.loads(TICKER_RESPONSE) + [{'market_name': 'ETH_BTC', 'bid': '0.05', 'ask': '0.06'}]
+        resp = FloatColumnsResponseParser.parse(self._make_response(content=json.dumps(rows)))
+        self.assertEqual(list(resp.column('bid')), [0.00002905, 0.05])
+        self.assertTrue(math.isnan(resp.column('vol')[1]))
+
+        with self.assertRaises(ValueError):
+            StockExchangeResponseParser.parse(self._make_response(content=TICKER_RESPONSE)).column('bid')
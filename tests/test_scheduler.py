@@ -0,0 +1,142 @@
+import json
+import requests
+import requests_mock
+
+from unittest import TestCase
+
+from pystexchapi.api import StocksExchangeAPI
+from pystexchapi.request import STOCK_EXCHANGE_BASE_URL
+from pystexchapi.scheduler import AdaptiveScheduler
+from tests import ORDERBOOK_RESPONSE, TRADE_HISTORY_RESPONSE, TICKER_RESPONSE
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def changing_orderbook(request, context):
+    changing_orderbook.counter += 1
+    data = json.loads(ORDERBOOK_RESPONSE)
+    data['result']['buy'][0]['Quantity'] = str(changing_orderbook.counter)
+    return json.dumps(data)
+
+
+class TestAdaptiveScheduler(TestCase):
+
+    def setUp(self):
+        self.api = StocksExchangeAPI()
+        self.clock = FakeClock()
+        self.changes = []
+        self.scheduler = AdaptiveScheduler(self.api, rate_budget=4.0, min_interval=0.5, max_interval=30.0,
+                                           on_change=lambda job, data: self.changes.append(job.key),
+                                           clock=self.clock)
+
+    def test_validation(self):
+        with self.assertRaises(ValueError):
+            AdaptiveScheduler(self.api, rate_budget=0)
+
+        with self.assertRaises(ValueError):
+            AdaptiveScheduler(self.api, smoothing=0)
+
+        with self.assertRaises(ValueError):
+            AdaptiveScheduler(self.api, min_interval=10, max_interval=5)
+
+        with self.assertRaises(ValueError):
+            self.scheduler.add('orderbook')
+
+        with self.assertRaises(ValueError):
+            self.scheduler.add('currencies', 'ETH_BTC')
+
+        # zero rate is raised to minimal one, so allocation does not divide by zero
+        job = self.scheduler.add('orderbook', 'ETH_BTC', initial_rate=0)
+        self.assertGreater(job.change_rate, 0)
+        self.scheduler.add('trade_history', 'ETH_BTC', initial_rate=0)
+        self.scheduler.remove('orderbook', 'ETH_BTC')
+
+    @requests_mock.Mocker()
+    def test_adapts_to_change_rates(self, m):
+        changing_orderbook.counter = 0
+        m.register_uri('GET', STOCK_EXCHANGE_BASE_URL.format(method='orderbook'), text=changing_orderbook)
+        m.register_uri('GET', STOCK_EXCHANGE_BASE_URL.format(method='trades'), text=TRADE_HISTORY_RESPONSE)
+
+        busy = self.scheduler.add('orderbook', 'ETH_BTC')
+        quiet = self.scheduler.add('trade_history', 'ETH_BTC')
+        self.assertEqual(busy.interval, quiet.interval)  # no observations, budget is shared equally
+        self.assertEqual(busy.kwargs, {'currency1': 'ETH', 'currency2': 'BTC'})
+
+        for _ in range(200):
+            self.scheduler.run_pending()
+            self.clock.now = self.scheduler.next_due()
+
+        self.assertGreater(busy.polls, quiet.polls * 5)
+        self.assertGreater(busy.change_rate, quiet.change_rate)
+        self.assertEqual(busy.interval, 0.5)  # limited by min_interval
+        self.assertEqual(quiet.interval, 30.0)  # limited by max_interval
+        self.assertEqual(quiet.changes, 0)
+        self.assertEqual(set(self.changes), {busy.key})
+        self.assertEqual(len(self.changes), busy.changes)
+
+        decisions = {(d['method'], d['pair']): d for d in self.scheduler.decisions()}
+        self.assertEqual(decisions[busy.key]['interval'], 0.5)
+        self.assertEqual(decisions[quiet.key]['polls'], quiet.polls)
+
+        self.scheduler.remove('orderbook', 'ETH_BTC')
+        self.assertEqual(len(self.scheduler.decisions()), 1)
+        self.assertEqual(quiet.interval, 0.5)  # the only job gets the whole budget
+
+    @requests_mock.Mocker()
+    def test_failed_call_is_rescheduled(self, m):
+        m.register_uri('GET', STOCK_EXCHANGE_BASE_URL.format(method='orderbook'), status_code=503)
+
+        job = self.scheduler.add('orderbook', 'ETH_BTC')
+        with self.assertRaises(requests.exceptions.HTTPError):
+            self.scheduler.run_pending()
+        self.assertEqual(job.next_run, job.interval)
+        self.assertEqual(self.scheduler.run_pending(), [])
+
+    def test_budget_of_many_jobs(self):
+        pairs = ['PAIR{}_BTC'.format(i) for i in range(100)]
+        jobs = [self.scheduler.add('orderbook', pair, initial_rate=1.0 if i < 10 else 0.01)
+                for i, pair in enumerate(pairs)]
+
+        intervals = [job.interval for job in jobs]
+        self.assertAlmostEqual(sum(1 / interval for interval in intervals), self.scheduler.rate_budget)
+        self.assertTrue(all(0.5 <= interval <= 30.0 for interval in intervals))
+        self.assertLess(intervals[0], intervals[-1])
+
+        # every job needs at least one poll per max_interval
+        for i in range(100, 120):
+            self.scheduler.add('orderbook', 'PAIR{}_BTC'.format(i))
+        with self.assertRaises(ValueError):
+            self.scheduler.add('orderbook', 'PAIR120_BTC')
+        self.assertAlmostEqual(sum(1 / job.interval for job in self.scheduler.jobs.values()), 4.0)
+
+    @requests_mock.Mocker()
+    def test_ticker_pairs_share_call(self, m):
+        rows = json.loads(TICKER_RESPONSE)
+        rows.append(dict(rows[0], market_name='ETH_BTC'))
+        pairs = [row['market_name'] for row in rows]
+
+        def changing_ticker(request, context):
+            rows[0]['last'] = str(m.call_count)
+            return json.dumps(rows)
+
+        m.register_uri('GET', STOCK_EXCHANGE_BASE_URL.format(method='ticker'), text=changing_ticker)
+        busy = self.scheduler.add('ticker', pairs[0])
+        quiet = self.scheduler.add('ticker', pairs[1])
+        self.assertEqual(busy.kwargs, {})
+
+        for _ in range(5):
+            self.assertEqual(len(self.scheduler.run_pending()), 2)
+            self.clock.now = self.scheduler.next_due()
+
+        self.assertEqual(m.call_count, 5)  # one call per round for both pairs
+        self.assertEqual((busy.changes, quiet.changes), (4, 0))
+        self.assertEqual(self.changes, [busy.key] * 4)
+        self.assertEqual(busy.interval, quiet.interval)
+        self.assertEqual(busy.interval, 0.5)  # the only call gets the whole budget
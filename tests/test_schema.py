@@ -0,0 +1,63 @@
+import inspect
+
+from unittest import TestCase
+
+from pystexchapi.request import StockExchangeRequest, StockExchangePrivateRequest, GetActiveOrdersRequest, \
+    TradeRequest, TicketRequest, GraficPublicRequest
+from pystexchapi.schema import Param, PairParam, OMIT
+
+
+CREDENTIALS = {'api_key': b'key', 'api_secret': b'secret'}
+
+
+class TestSchema(TestCase):
+
+    def test_compiled_constructor(self):
+        class CustomRequest(StockExchangeRequest):
+            api_method = 'custom'
+            schema = (
+                PairParam(),
+                Param('_type', default='ALL', choices=('ALL', 'BUY')),
+                Param('count', default=10, max_value=20, min_value=1, annotation=int),
+                Param('since', default=None, omit=OMIT.NONE),
+                Param('value', default=1, serialize=str)
+            )
+
+        parameters = list(inspect.signature(CustomRequest).parameters)
+        self.assertEqual(parameters, ['currency1', 'currency2', '_type', 'count', 'since', 'value', 'kwargs'])
+        self.assertEqual(CustomRequest.__init__.__annotations__, {'currency1': str, 'currency2': str, 'count': int})
+
+        req = CustomRequest('ETH', 'BTC', with_saving=True)
+        self.assertEqual(req.params, {'pair': 'ETH_BTC', 'type': 'ALL', 'count': 10, 'value': '1'})
+        self.assertEqual(req.method, 'GET')
+
+        req = CustomRequest('ETH', 'BTC', since='2018-04-11', count=None)
+        self.assertEqual(req.params['since'], '2018-04-11')
+        self.assertIsNone(req.params['count'])  # empty values are not checked
+
+        for kwargs in ({'count': 21}, {'count': -1}, {'_type': 'SELL'}):
+            with self.assertRaises(ValueError):
+                CustomRequest('ETH', 'BTC', **kwargs)
+
+        with self.assertRaises(TypeError):
+            CustomRequest('ETH')
+
+    def test_private_requests(self):
+        req = GetActiveOrdersRequest(from_id='10', **CREDENTIALS)
+        self.assertEqual(req.json, {'method': 'ActiveOrders', 'pair': 'ALL', 'count': 50, 'order': 'DESC',
+                                    'type': 'ALL', 'owner': 'OWN', 'from_id': '10'})
+        self.assertIsInstance(req, StockExchangePrivateRequest)
+
+        with self.assertRaisesRegex(ValueError, 'count cannot be greater than 50'):
+            GetActiveOrdersRequest(count=51, **CREDENTIALS)
+
+        with self.assertRaisesRegex(ValueError, 'The parameter type can be one of "BUY" or "SELL"'):
+            TradeRequest('HOLD', 'ETH', 'BTC', 1.0, 1.0, **CREDENTIALS)
+
+        req = TicketRequest(1, 'subject', 'message', currency_name='', **CREDENTIALS)
+        self.assertNotIn('currency_name', req.json)
+
+    def test_body_order(self):
+        req = GraficPublicRequest('ETH', 'BTC', 'ASC', end='2018-04-12')
+        self.assertEqual(list(req.params), ['pair', 'interval', 'order', 'count', 'end'])
+        self.assertEqual(req.params['order'], 'ASC')
@@ -0,0 +1,145 @@
+import json
+import requests_mock
+
+from unittest import TestCase
+from unittest.mock import patch
+
+from pystexchapi import ORDER_STATUS
+from pystexchapi.api import StocksExchangeAPI
+from pystexchapi.request import STOCK_EXCHANGE_BASE_URL
+from pystexchapi.tracker import OrderTracker, ORDER_EVENT
+from pystexchapi.utils import Deadline
+
+
+def make_order(pair='BTC_NXT', _type='buy', amount='0.1', rate='5321.1'):
+    return {'pair': pair, 'type': _type, 'amount': amount, 'rate': rate, 'is_your_order': 1,
+            'timestamp': 1464352941}
+
+
+class FakeExchange(object):
+
+    def __init__(self):
+        self.active = {}
+        self.history = {ORDER_STATUS.FINISHED: {}, ORDER_STATUS.CANCELED: {}}
+
+    def __call__(self, request, context):
+        body = request.json()
+        if body['method'] == 'ActiveOrders':
+            orders = self.active
+        else:
+            orders = self.history[body['status']]
+
+        ids = sorted(map(int, orders), reverse=body['order'] == 'DESC')
+        if body.get('from_id') is not None:
+            ids = [i for i in ids if i >= int(body['from_id'])]
+        ids = ids[:body['count']]
+        return json.dumps({'success': 1, 'data': {str(i): orders[str(i)] for i in ids}})
+
+    def fill(self, order_id, status=ORDER_STATUS.FINISHED):
+        self.history[status][order_id] = self.active.pop(order_id)
+
+
+class TestOrderTracker(TestCase):
+
+    def setUp(self):
+        self.api = StocksExchangeAPI(api_key='key', api_secret='secret')
+        self.exchange = FakeExchange()
+
+    @requests_mock.Mocker()
+    def test_poll(self, m):
+        m.register_uri('POST', STOCK_EXCHANGE_BASE_URL.format(method=''), text=self.exchange)
+        self.exchange.history[ORDER_STATUS.FINISHED]['1'] = make_order()  # filled before tracking
+        for i in range(10, 15):
+            self.exchange.active[str(i)] = make_order(rate=str(i))
+
+        tracker = OrderTracker(self.api, page_size=2)
+        received = []
+        tracker.subscribe(received.append)
+
+        events = tracker.poll()
+        self.assertEqual([e.kind for e in events], [ORDER_EVENT.NEW] * 5)
+        self.assertEqual(sorted(tracker.orders), [10, 11, 12, 13, 14])
+        self.assertEqual(received, events)
+
+        self.assertEqual(tracker.poll(), [])
+
+        # active orders are listed from the oldest tracked one, only new records of history are fetched
+        calls = m.call_count
+        self.exchange.active['15'] = make_order()
+        self.exchange.fill('10')
+        self.exchange.fill('11', status=ORDER_STATUS.CANCELED)
+
+        events = tracker.poll()
+        self.assertEqual([(e.kind, e.order.order_id) for e in events],
+                         [(ORDER_EVENT.NEW, 15), (ORDER_EVENT.FILLED, 10), (ORDER_EVENT.CANCELED, 11)])
+        self.assertEqual(events[1].order.status, ORDER_STATUS.FINISHED)
+        self.assertEqual(m.call_count - calls, 5)
+        from_ids = [m.request_history[i].json().get('from_id') for i in range(calls, m.call_count)]
+        self.assertEqual(from_ids, ['10', '14', '16', '2', '0'])
+        self.assertEqual(sorted(tracker.orders), [12, 13, 14, 15])
+
+    @requests_mock.Mocker()
+    def test_reconcile(self, m):
+        m.register_uri('POST', STOCK_EXCHANGE_BASE_URL.format(method=''), text=self.exchange)
+        self.exchange.active['20'] = make_order()
+
+        tracker = OrderTracker(self.api)
+        tracker.track(7, 'BTC_NXT', 'buy', '1', '2')
+        events = tracker.reconcile()
+
+        self.assertEqual([(e.kind, e.order.order_id) for e in events],
+                         [(ORDER_EVENT.CLOSED, 7), (ORDER_EVENT.NEW, 20)])
+        self.assertEqual(list(tracker.orders), [20])
+
+    @requests_mock.Mocker()
+    def test_fills_out_of_id_order(self, m):
+        m.register_uri('POST', STOCK_EXCHANGE_BASE_URL.format(method=''), text=self.exchange)
+        for i in range(10, 15):
+            self.exchange.active[str(i)] = make_order(rate=str(i))
+
+        tracker = OrderTracker(self.api)
+        tracker.poll()
+
+        self.exchange.fill('14')
+        self.assertEqual([(e.kind, e.order.order_id) for e in tracker.poll()], [(ORDER_EVENT.FILLED, 14)])
+
+        # older orders are closed after newer one
+        self.exchange.fill('12')
+        self.exchange.fill('10', status=ORDER_STATUS.CANCELED)
+        self.assertEqual([(e.kind, e.order.order_id) for e in tracker.poll()],
+                         [(ORDER_EVENT.CANCELED, 10), (ORDER_EVENT.FILLED, 12)])
+        self.assertEqual(sorted(tracker.orders), [11, 13])
+        self.assertEqual(tracker.poll(), [])
+
+    @requests_mock.Mocker()
+    def test_idle_poll_calls(self, m):
+        m.register_uri('POST', STOCK_EXCHANGE_BASE_URL.format(method=''), text=self.exchange)
+        self.exchange.active['10'] = make_order()
+
+        tracker = OrderTracker(self.api)
+        tracker.poll()
+        for i in range(11, 511):
+            self.exchange.history[ORDER_STATUS.FINISHED][str(i)] = make_order()
+        self.assertEqual(len(tracker.poll()), 500)
+
+        # resting order does not make polls fetch history after it again
+        for _ in range(3):
+            calls = m.call_count
+            self.assertEqual(tracker.poll(), [])
+            self.assertEqual(m.call_count - calls, 3)
+        self.assertEqual(list(tracker.orders), [10])
+
+    @requests_mock.Mocker()
+    def test_poll_deadline(self, m):
+        m.register_uri('POST', STOCK_EXCHANGE_BASE_URL.format(method=''), text=self.exchange)
+        for i in range(10, 15):
+            self.exchange.active[str(i)] = make_order()
+
+        tracker = OrderTracker(self.api, page_size=2)
+        with patch.object(self.api, 'call', wraps=self.api.call) as call:
+            tracker.poll(deadline=10.0)
+
+        deadlines = [c[1]['deadline'] for c in call.call_args_list]
+        self.assertEqual(len(deadlines), 7)
+        self.assertIsInstance(deadlines[0], Deadline)
+        self.assertTrue(all(d is deadlines[0] for d in deadlines))
@@ -0,0 +1,111 @@
+import json
+import os
+import tempfile
+import unittest
+import requests
+import requests_mock
+
+from pystexchapi.api import StocksExchangeAPI
+from pystexchapi.request import STOCK_EXCHANGE_BASE_URL, TickerRequest
+from pystexchapi.transport import RequestsTransport, HTTP2Transport, RecordingTransport, ReplayTransport
+from tests import TICKER_RESPONSE, GET_ACCOUNT_INFO_RESPONSE
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+class TestRequestsTransport(unittest.TestCase):
+
+    @requests_mock.Mocker()
+    def test_send(self, m):
+        m.register_uri('GET', STOCK_EXCHANGE_BASE_URL.format(method='ticker'), text=TICKER_RESPONSE)
+        transport = RequestsTransport()
+
+        response = transport.send(TickerRequest().prepare())
+        self.assertIsInstance(response, requests.Response)
+        self.assertEqual(response.text, TICKER_RESPONSE)
+
+        # session is reused between calls
+        session = transport.session
+        transport.send(TickerRequest().prepare())
+        self.assertIs(transport.session, session)
+        self.assertEqual(m.call_count, 2)
+
+
+@unittest.skipIf(httpx is None, 'httpx is not installed')
+class TestHTTP2Transport(unittest.TestCase):
+
+    def setUp(self):
+        self.requests = []
+
+        def handler(request):
+            self.requests.append(request)
+            if request.method == 'POST':
+                return httpx.Response(200, text=GET_ACCOUNT_INFO_RESPONSE)
+            return httpx.Response(200, text=TICKER_RESPONSE)
+
+        self.transport = HTTP2Transport(transport=httpx.MockTransport(handler))
+
+    def tearDown(self):
+        self.transport.close()
+
+    def test_send(self):
+        response = self.transport.send(TickerRequest().prepare(), timeout=(1.0, 5.0))
+        self.assertIsInstance(response, requests.Response)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), requests.models.complexjson.loads(TICKER_RESPONSE))
+        self.assertEqual(self.requests[0].headers['User-Agent'], 'pystexchapi')
+
+    def test_api_calls(self):
+        api = StocksExchangeAPI(api_key='key', api_secret='secret', transport=self.transport)
+        self.assertEqual(len(api.call('ticker').data), 1)
+        self.assertEqual(api.call('get_account_info').data['success'], 1)
+
+        private_request = self.requests[1]
+        self.assertEqual(private_request.method, 'POST')
+        self.assertIn('Sign', private_request.headers)
+
+
+class TestRecordReplay(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'calls.jsonl')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    @requests_mock.Mocker()
+    def _record(self, m):
+        m.register_uri('GET', STOCK_EXCHANGE_BASE_URL.format(method='ticker'), text=TICKER_RESPONSE)
+        m.register_uri('POST', STOCK_EXCHANGE_BASE_URL.format(method=''), text=GET_ACCOUNT_INFO_RESPONSE)
+
+        transport = RecordingTransport(RequestsTransport(), self.path)
+        api = StocksExchangeAPI(api_key='key', api_secret='secret', transport=transport)
+        api.call('ticker')
+        api.call('get_account_info')
+        transport.close()
+
+    def test_record_replay(self):
+        self._record()
+
+        with open(self.path) as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual([r['method'] for r in records], ['GET', 'POST'])
+        self.assertNotIn('Sign', records[1]['headers'])
+
+        api = StocksExchangeAPI(api_key='key', api_secret='secret', transport=ReplayTransport(self.path, speed=None))
+        self.assertEqual(len(api.call('ticker').data), 1)
+        self.assertEqual(api.call('get_account_info').data['success'], 1)  # nonce differs from recorded one
+
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            api.call('ticker')
+
+        api = StocksExchangeAPI(transport=ReplayTransport(self.path, speed=1000.0, loop=True))
+        for _ in range(3):
+            self.assertEqual(len(api.call('ticker').data), 1)
+
+        with self.assertRaises(ValueError):
+            ReplayTransport(self.path, speed=0)
@@ -1,6 +1,12 @@
+import math
+
+from decimal import Decimal
 from unittest import TestCase
+from unittest.mock import patch
 
-from pystexchapi.utils import set_not_none_dict_kwargs, make_nonce
+from pystexchapi.exc import APIDeadlineExceededException
+from pystexchapi.utils import set_not_none_dict_kwargs, make_nonce, NonceGenerator, Deadline, is_numeric, \
+    to_float_array, to_fixed_point_array, to_decimal_list, convert_column, numpy
 
 
 class TestUtils(TestCase):
@@ -27,3 +33,64 @@ class TestUtils(TestCase):
         self.assertNotIn('d', _dict)
         self.assertEqual(_dict['e'], 0)
         self.assertEqual(_dict['f'], '')
+
+    def test_nonce_generator(self):
+        generator = NonceGenerator(start=10)
+        self.assertEqual([generator() for _ in range(3)], [10, 11, 12])
+        self.assertGreater(NonceGenerator()(), make_nonce(makeweight=1) * 1000000 - 1000000)
+
+        with self.assertRaises(ValueError):
+            NonceGenerator(makeweight=-1)
+
+    def test_deadline(self):
+        deadline = Deadline(10.0)
+        self.assertFalse(deadline.expired)
+        self.assertLessEqual(deadline.limit((3.0, 30.0))[1], 10.0)
+        self.assertEqual(deadline.limit((3.0, 30.0))[0], 3.0)
+        self.assertLessEqual(deadline.limit(None), 10.0)
+        self.assertIs(Deadline.make(deadline), deadline)
+        self.assertIsNone(Deadline.make(None))
+
+        with self.assertRaises(APIDeadlineExceededException):
+            Deadline(0).limit(5.0)
+
+        # time runs out right after check of expiry, zero timeout is never returned
+        deadline = Deadline(10.0)
+        with patch.object(deadline, 'remaining', return_value=0.0):
+            with self.assertRaises(APIDeadlineExceededException):
+                deadline.limit((3.0, None))
+
+    def test_numeric_columns(self):
+        values = ['0.00002905', '2665.35219464', '-1.5', '7', '1e-8']
+
+        self.assertEqual(list(to_float_array(values)), [0.00002905, 2665.35219464, -1.5, 7.0, 1e-8])
+        self.assertEqual(list(to_fixed_point_array(values)), [2905, 266535219464, -150000000, 700000000, 1])
+        self.assertEqual(list(to_fixed_point_array(['0.123456789', 3, 0.5], scale=4)), [1234, 30000, 5000])
+        self.assertEqual(to_decimal_list(values)[1], Decimal('2665.35219464'))
+
+        self.assertEqual(list(convert_column(['1.5'], kind='fixed', scale=1)), [15])
+        self.assertEqual(list(to_fixed_point_array(['-0.5', '7.', '0.123', '1.2E-3', '12'], scale=2)),
+                         [-50, 700, 12, 0, 1200])
+        with self.assertRaises(ValueError):
+            to_fixed_point_array(['1.2.3'])
+        for invalid in ('-', '-.5'):  # same as scalar conversion, values without digits are not zero
+            with self.assertRaises(ValueError):
+                to_fixed_point_array(['1', invalid])
+        self.assertEqual(list(to_fixed_point_array(['.', '.5'], scale=1)), [0, 5])
+        if numpy is not None:
+            with self.assertRaises(OverflowError):
+                to_fixed_point_array(['100000000000'])  # int64 overflow
+
+        # gaps
+        self.assertTrue(math.isnan(convert_column(['1.5', None], kind='float')[1]))
+        self.assertEqual(convert_column(['1.5', None], kind='decimal'), [Decimal('1.5'), None])
+        fixed = convert_column([None, '1.5'], kind='fixed', scale=1)
+        self.assertEqual(fixed[1], 15)
+        self.assertTrue(fixed[0] is None or numpy.ma.is_masked(fixed[0]))
+        with self.assertRaises(ValueError):
+            convert_column(values, kind='complex')
+
+        self.assertTrue(is_numeric('0.1'))
+        self.assertTrue(is_numeric(12))
+        self.assertFalse(is_numeric(True))
+        self.assertFalse(is_numeric('MUN_BTC'))